@@ -1,7 +1,14 @@
+from collections import deque
+import threading
+import time
+
 from glusto.core import Glusto
 import six
 
+from openshiftstoragelibs import command_stats
 from openshiftstoragelibs import exceptions
+from openshiftstoragelibs import retry
+from openshiftstoragelibs import utils
 
 
 def monkeypatch_class(name, bases, namespace):
@@ -15,6 +22,10 @@ def monkeypatch_class(name, bases, namespace):
 
 @six.add_metaclass(monkeypatch_class)
 class MonkeyPatchedGlusto(Glusto):
+    # Object with 'run(host, command, user)' method returning tuple of
+    # return code, stdout and stderr. Used instead of SSH when set.
+    _command_backend = None
+
     @classmethod
     def _wrapper_for_get_ssh_connection(cls, host, user=None, recreate=False):
         if recreate and "%s@%s" % (user, host) in cls._ssh_connections:
@@ -32,6 +43,30 @@ class MonkeyPatchedGlusto(Glusto):
                     "connection from your host." % (host, user))
         return ssh
 
+    @classmethod
+    def _popen(cls, host, user, command, universal_newlines=True):
+        recreate = []
+
+        def _open():
+            ssh = cls._wrapper_for_get_ssh_connection(
+                host, user, bool(recreate))
+            return ssh.popen(command, universal_newlines=universal_newlines)
+
+        def _on_retry(error, attempt):
+            cls.log.error(
+                "Failed to establish SSH connection: %s" % (
+                    six.text_type(error)))
+            recreate.append(attempt)
+
+        return retry.get_policy("ssh_connect").call(
+            _open, on_retry=_on_retry)
+
+    @classmethod
+    def _popen_and_communicate(cls, host, user, command):
+        proc = cls._popen(host, user, command)
+        stdout, stderr = proc.communicate()
+        return proc.returncode, stdout, stderr
+
     @classmethod
     def run(cls, host, command, user=None, log_level=None):
         """Wrapper for original "run" method fixing broken connections."""
@@ -46,18 +81,16 @@ class MonkeyPatchedGlusto(Glusto):
         cls.log.info("%s@%s%s: %s" % (user, host, ctlpersist, command))
 
         # run the command
-        ssh = cls._wrapper_for_get_ssh_connection(host, user, False)
-        try:
-            proc = ssh.popen(command, universal_newlines=True)
-        except Exception as e:
-            err_msg = (
-                "Failed to establish SSH connection: %s" % six.text_type(e))
-            cls.log.error(err_msg)
-            ssh = cls._wrapper_for_get_ssh_connection(host, user, True)
-            proc = ssh.popen(command, universal_newlines=True)
-
-        stdout, stderr = proc.communicate()
-        retcode = proc.returncode
+        start_time = time.time()
+        if cls._command_backend is not None:
+            retcode, stdout, stderr = cls._command_backend.run(
+                host, command, user)
+        else:
+            retcode, stdout, stderr = cls._popen_and_communicate(
+                host, user, command)
+        command_stats.record(
+            host, command, time.time() - start_time,
+            len(stdout or '') + len(stderr or ''))
 
         # output command results
         identifier = "%s@%s" % (user, host)
@@ -65,3 +98,172 @@ class MonkeyPatchedGlusto(Glusto):
                          log_level=log_level)
 
         return (retcode, stdout, stderr)
+
+    @classmethod
+    def run_stream(cls, host, command, user=None, log_level=None,
+                   chunk_size=None, stderr_lines=1000):
+        """Run command on a host yielding its stdout as it arrives.
+
+        Args:
+            host (str): hostname where command should run.
+            command (str|list): shell command.
+            user (str|None): user to run command as.
+            log_level (str|None): log level for the results of command.
+            chunk_size (int|None): max size of the yielded pieces of
+                stdout. Lines longer than it are yielded in several pieces.
+                Lines are not limited when it is not provided.
+            stderr_lines (int): amount of the last stderr lines to keep.
+        Returns:
+            CommandStream: iterable over stdout lines of the command, which
+                'returncode' and 'stderr' attributes get defined when
+                the iteration is over.
+        """
+        return CommandStream(
+            cls, host, command, user or cls.user, log_level=log_level,
+            chunk_size=chunk_size, stderr_lines=stderr_lines)
+
+    @classmethod
+    def run_batch(cls, host, commands, user=None, log_level=None):
+        """Run several commands on a host using single SSH channel.
+
+        Commands are run one after another regardless of the results of
+        the previous ones, each in it's own subshell.
+
+        Args:
+            host (str): hostname where commands should run.
+            commands (list): list of shell commands as str objects.
+            user (str|None): user to run commands as.
+            log_level (str|None): log level for the results of commands.
+        Returns:
+            list: tuples of the return code, stdout and stderr
+                of each command in the order of 'commands'.
+        """
+        if not user:
+            user = cls.user
+
+        ctlpersist = ''
+        if cls.use_controlpersist:
+            ctlpersist = " (cp)"
+
+        commands = [
+            command if isinstance(command, six.string_types)
+            else ' '.join(command) for command in commands]
+        for command in commands:
+            cls.log.info("%s@%s%s (batch): %s" % (
+                user, host, ctlpersist, command))
+
+        identifier = "%s@%s" % (user, host)
+        if cls._command_backend is not None:
+            results = []
+            for command in commands:
+                results.append(cls.run(host, command, user, log_level))
+            return results
+
+        marker = "batch-%s" % utils.get_random_str()
+        script = '__err_file=$(mktemp); %s rm -f "$__err_file"' % ''.join([
+            utils.get_framed_cmd(command, marker, index)
+            for index, command in enumerate(commands)])
+        start_time = time.time()
+        retcode, stdout, stderr = cls._popen_and_communicate(
+            host, user, script)
+        # NOTE: commands are not timed separately, so each of them gets
+        # equal share of the batch time in the stats of its family.
+        duration = (time.time() - start_time) / max(len(commands), 1)
+
+        results = []
+        for index, command in enumerate(commands):
+            result = utils.parse_framed_output(stdout, marker, index)
+            if result is None:
+                result = (
+                    retcode or 1, '',
+                    "Results of the '%s' command were not found in the "
+                    "batch output. Batch return code: %s. Err: %s" % (
+                        command, retcode, stderr))
+            command_stats.record(
+                host, command, duration, len(result[1]) + len(result[2]))
+            cls._log_results(identifier, *result, log_level=log_level)
+            results.append(result)
+        return results
+
+
+class CommandStream(object):
+    """Stdout of the command, which is consumed while the command runs.
+
+    Only the last 'stderr_lines' lines of stderr are kept, stdout is not
+    kept at all, so memory consumption does not depend on the output size.
+    Command gets killed if iteration is stopped before the end of output.
+    Object can be iterated over only once.
+    """
+
+    def __init__(self, glusto, host, command, user, log_level=None,
+                 chunk_size=None, stderr_lines=1000):
+        self.glusto = glusto
+        self.host = host
+        self.command = command
+        self.user = user
+        self.log_level = log_level
+        self.chunk_size = chunk_size
+        self.returncode = None
+        self._stderr = deque(maxlen=stderr_lines)
+        self._started = False
+
+    @property
+    def stderr(self):
+        return ''.join(self._stderr)
+
+    def __iter__(self):
+        if self._started:
+            raise exceptions.ExecutionError(
+                "Output of the '%s' command was already consumed." % (
+                    self.command))
+        self._started = True
+
+        ctlpersist = " (cp)" if self.glusto.use_controlpersist else ''
+        self.glusto.log.info("%s@%s%s (stream): %s" % (
+            self.user, self.host, ctlpersist, self.command))
+        start_time, out_size = time.time(), 0
+
+        if self.glusto._command_backend is not None:
+            self.returncode, stdout, stderr = (
+                self.glusto._command_backend.run(
+                    self.host, self.command, self.user))
+            self._stderr.extend(stderr.splitlines(True))
+            for line in stdout.splitlines(True):
+                out_size += len(line)
+                yield line
+        else:
+            proc = self.glusto._popen(self.host, self.user, self.command)
+            stderr_reader = threading.Thread(
+                target=lambda: self._stderr.extend(
+                    iter(proc.stderr.readline, '')))
+            stderr_reader.daemon = True
+            stderr_reader.start()
+            try:
+                while True:
+                    line = (
+                        proc.stdout.readline(self.chunk_size)
+                        if self.chunk_size else proc.stdout.readline())
+                    if not line:
+                        break
+                    out_size += len(line)
+                    yield line
+            finally:
+                if proc.poll() is None:
+                    proc.stdout.close()
+                    proc.kill()
+                self.returncode = proc.wait()
+                stderr_reader.join()
+
+        command_stats.record(
+            self.host, self.command, time.time() - start_time, out_size)
+        self.glusto._log_results(
+            "%s@%s" % (self.user, self.host), self.returncode,
+            "<%s bytes streamed>" % out_size, self.stderr,
+            log_level=self.log_level)
+
+
+_FAKE_CLUSTER_CONFIG = dict(
+    Glusto.config.get("common", {}).get("fake_cluster") or {})
+if _FAKE_CLUSTER_CONFIG.pop("enabled", False):
+    from openshiftstoragelibs import fake_cluster
+    fake_cluster.install(fake_cluster.FakeCluster(**_FAKE_CLUSTER_CONFIG))
@@ -1,5 +1,6 @@
 import datetime
 import re
+import threading
 import unittest
 
 from glusto.core import Glusto as g
@@ -14,6 +15,10 @@ from openshiftstoragelibs.exceptions import (
 from openshiftstoragelibs.gluster_ops import (
     get_block_hosting_volume_name,
 )
+from openshiftstoragelibs.heketi_metrics import (
+    HEKETI_METRICS_SAMPLING_INTERVAL,
+    HeketiMetricsSampler,
+)
 from openshiftstoragelibs.heketi_ops import (
     hello_heketi,
     heketi_blockvolume_delete,
@@ -29,14 +34,16 @@ from openshiftstoragelibs.node_ops import (
     node_delete_iptables_rules,
     power_off_vm_by_name,
     power_on_vm_by_name,
+    warm_up_connections,
 )
 from openshiftstoragelibs.openshift_ops import (
+    get_app_dc_with_io_name,
     get_block_provisioner,
     get_pod_name_from_dc,
     get_pod_name_from_rc,
     get_pv_name_from_pvc,
-    oc_create_app_dc_with_io,
-    oc_create_pvc,
+    oc_create_app_dcs_with_io,
+    oc_create_pvcs,
     oc_create_sc,
     oc_create_secret,
     oc_delete,
@@ -72,6 +79,18 @@ class BaseClass(unittest.TestCase):
     CHECK_HEKETI_DB_INCONSISTENCIES = (
         g.config.get("common", {}).get("check_heketi_db_inconsistencies", True)
         in (True, 'TRUE', 'True', 'true', 'yes', 'Yes', 'YES'))
+    # One of 'sync', 'async', 'class' or 'sample'
+    HEKETI_DB_CHECK_MODE = str(g.config.get("common", {}).get(
+        "heketi_db_check_mode", "sync")).lower()
+    HEKETI_DB_CHECK_SAMPLE_RATE = int(g.config.get("common", {}).get(
+        "heketi_db_check_sample_rate", 10))
+    # NOTE: state is shared by all the test classes, because windows
+    # of tests checked in 'async' and 'sample' modes span them.
+    _heketi_db_check_state = {
+        "baseline": None, "window": [], "pending": None}
+    WARM_UP_CONNECTIONS = (
+        g.config.get("common", {}).get("warm_up_connections", True)
+        in (True, 'TRUE', 'True', 'true', 'yes', 'Yes', 'YES'))
 
     @classmethod
     def setUpClass(cls):
@@ -111,6 +130,11 @@ class BaseClass(unittest.TestCase):
             'storage_class1', cls.storage_classes.get('file_storage_class'))
         cls.secret_type = "kubernetes.io/glusterfs"
 
+        if cls.WARM_UP_CONNECTIONS:
+            # NOTE: open connections to all the hosts at once instead of
+            # opening them one by one on the first use.
+            warm_up_connections()
+
         cmd = "echo -n %s | base64" % cls.heketi_cli_key
         ret, out, err = g.run(cls.ocp_master_node[0], cmd, "root")
         if ret != 0:
@@ -134,6 +158,19 @@ class BaseClass(unittest.TestCase):
             g.config['glustotest_run_id'] = (
                 datetime.datetime.now().strftime('%H_%M_%d_%m_%Y'))
         cls.glustotest_run_id = g.config['glustotest_run_id']
+
+        if cls.CHECK_HEKETI_DB_INCONSISTENCIES:
+            if cls.HEKETI_DB_CHECK_MODE not in (
+                    'sync', 'async', 'class', 'sample'):
+                raise ConfigError(
+                    "Unknown Heketi DB check mode '%s'. Expected one of "
+                    "'sync', 'async', 'class' or 'sample'." % (
+                        cls.HEKETI_DB_CHECK_MODE))
+            if cls.HEKETI_DB_CHECK_MODE == 'class':
+                BaseClass._heketi_db_check_state.update(
+                    baseline=None, window=[])
+                cls._start_heketi_db_check_window()
+
         msg = "Setupclass: %s : %s" % (cls.__name__, cls.glustotest_run_id)
         g.log.info(msg)
 
@@ -144,7 +181,13 @@ class BaseClass(unittest.TestCase):
                           "to one test case failure.")
 
         super(BaseClass, self).setUp()
-        if self.CHECK_HEKETI_DB_INCONSISTENCIES:
+        if (self.CHECK_HEKETI_DB_INCONSISTENCIES
+                and self.HEKETI_DB_CHECK_MODE != 'sync'):
+            if self._start_heketi_db_check_window():
+                BaseClass._heketi_db_check_state["window"].append(self.id())
+                if self.HEKETI_DB_CHECK_MODE != 'class':
+                    self.addCleanup(self.check_heketi_db_window)
+        elif self.CHECK_HEKETI_DB_INCONSISTENCIES:
             try:
                 self.heketi_db_inconsistencies = heketi_db_check(
                     self.heketi_client_node, self.heketi_server_url)
@@ -156,6 +199,13 @@ class BaseClass(unittest.TestCase):
                     self.check_heketi_db_inconsistencies,
                     self.heketi_db_inconsistencies["totalinconsistencies"])
 
+        self.heketi_metrics_sampler = None
+        if HEKETI_METRICS_SAMPLING_INTERVAL:
+            self.heketi_metrics_sampler = HeketiMetricsSampler(
+                self.heketi_client_node, self.heketi_server_url)
+            self.heketi_metrics_sampler.start()
+            self.addCleanup(self.stop_heketi_metrics_sampler)
+
         msg = "Starting Test : %s : %s" % (self.id(), self.glustotest_run_id)
         g.log.info(msg)
 
@@ -167,6 +217,19 @@ class BaseClass(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
         super(BaseClass, cls).tearDownClass()
+        if cls.CHECK_HEKETI_DB_INCONSISTENCIES:
+            state = BaseClass._heketi_db_check_state
+            if cls.HEKETI_DB_CHECK_MODE == 'async':
+                cls._finish_async_heketi_db_check()
+            elif (cls.HEKETI_DB_CHECK_MODE in ('class', 'sample')
+                    and state["baseline"] is not None and state["window"]):
+                # NOTE: in 'sample' mode tests left after the last sample
+                # are checked at the end of the test class
+                window, state["window"] = state["window"], []
+                cls._verify_heketi_db_check_window(
+                    heketi_db_check(
+                        cls.heketi_client_node, cls.heketi_server_url),
+                    window)
         msg = "Teardownclass: %s : %s" % (cls.__name__, cls.glustotest_run_id)
         g.log.info(msg)
 
@@ -176,6 +239,13 @@ class BaseClass(unittest.TestCase):
         return command.cmd_run(
             cmd=cmd, hostname=hostname, raise_on_error=raise_on_error)
 
+    def stop_heketi_metrics_sampler(self):
+        self.heketi_metrics_sampler.stop()
+        g.log.info("Heketi metrics changes during the '%s' test case, "
+                   "sampled %s times: %s" % (
+                       self.id(), self.heketi_metrics_sampler.samples,
+                       self.heketi_metrics_sampler.get_summary()))
+
     def check_heketi_db_inconsistencies(
             self, number_of_allowed_heketi_db_inconsistencies):
         current_heketi_db_inconsistencies = heketi_db_check(
@@ -194,6 +264,119 @@ class BaseClass(unittest.TestCase):
             current_number_of_heketi_db_inconsistencies,
             error_msg)
 
+    @classmethod
+    def _start_heketi_db_check_window(cls):
+        """Get amount of Heketi DB inconsistencies before window of tests.
+
+        Returns:
+            bool: False if Heketi DB can not be checked.
+        """
+        state = BaseClass._heketi_db_check_state
+        if state["baseline"] is not None or state["pending"] is not None:
+            return True
+        try:
+            state["baseline"] = heketi_db_check(
+                cls.heketi_client_node,
+                cls.heketi_server_url)["totalinconsistencies"]
+        except NotImplementedError as e:
+            g.log.info("Can not check Heketi DB inconsistencies due to "
+                       "the following error: %s" % e)
+            BaseClass.CHECK_HEKETI_DB_INCONSISTENCIES = False
+            return False
+        return True
+
+    @classmethod
+    def _verify_heketi_db_check_window(cls, heketi_db_inconsistencies, window):
+        """Compare amount of Heketi DB inconsistencies with the previous one.
+
+        Args:
+            heketi_db_inconsistencies (dict): output of the
+                'heketi_db_check' function got after the window of tests.
+            window (list): IDs of the test cases run since the previous
+                check, which are blamed for the new inconsistencies.
+        """
+        state = BaseClass._heketi_db_check_state
+        number_of_allowed_heketi_db_inconsistencies = state["baseline"]
+        current_number_of_heketi_db_inconsistencies = state["baseline"] = (
+            heketi_db_inconsistencies["totalinconsistencies"])
+        if (number_of_allowed_heketi_db_inconsistencies
+                == current_number_of_heketi_db_inconsistencies):
+            return
+        error_msg = (
+            "Before the '%s' test case(s) we had %s inconsistencies, but "
+            "after them we have %s inconsistencies in the Heketi DB.\n"
+            "'heketi-cli db check' command output is following:\n%s" % (
+                "', '".join(window),
+                number_of_allowed_heketi_db_inconsistencies,
+                current_number_of_heketi_db_inconsistencies,
+                heketi_db_inconsistencies))
+        g.log.error(error_msg)
+        raise AssertionError(error_msg)
+
+    @classmethod
+    def _finish_async_heketi_db_check(cls):
+        """Wait for the Heketi DB check started after previous tests.
+
+        Check runs concurrently with the next test, so new inconsistencies
+        are blamed on the tests it ran together with too.
+        """
+        state = BaseClass._heketi_db_check_state
+        pending, state["pending"] = state["pending"], None
+        if pending is None:
+            return
+        thread, outcome, window = pending
+        thread.join()
+        window = window + state["window"]
+        if "error" in outcome:
+            msg = ("Failed to check Heketi DB after the '%s' test case(s): "
+                   "%s" % ("', '".join(window), outcome["error"]))
+            g.log.error(msg)
+            raise ExecutionError(msg)
+        cls._verify_heketi_db_check_window(outcome["result"], window)
+
+    def check_heketi_db_window(self):
+        """Check Heketi DB after the window of tests in non-sync modes.
+
+        In 'sample' mode Heketi DB is checked after each
+        'HEKETI_DB_CHECK_SAMPLE_RATE' tests and after the rest of tests
+        at the end of the test class. In 'async' mode Heketi DB
+        check is started after each test in background and its result
+        is verified after the next test or at the end of the test class.
+        Failures are reported with IDs of the tests of the window, which
+        introduced the new inconsistencies.
+        """
+        state = BaseClass._heketi_db_check_state
+        try:
+            self._finish_async_heketi_db_check()
+        finally:
+            if self.HEKETI_DB_CHECK_MODE == 'async':
+                window, state["window"] = state["window"], []
+                outcome = {}
+
+                def _check():
+                    try:
+                        # NOTE: next test may patch shared 'g.run'
+                        # using 'podcmd.GlustoPod'
+                        with command.direct_run():
+                            outcome["result"] = heketi_db_check(
+                                self.heketi_client_node,
+                                self.heketi_server_url)
+                    except Exception as e:
+                        outcome["error"] = e
+
+                thread = threading.Thread(
+                    target=_check, name="heketi-db-check")
+                thread.daemon = True
+                thread.start()
+                state["pending"] = (thread, outcome, window)
+        if (self.HEKETI_DB_CHECK_MODE == 'sample'
+                and len(state["window"]) >= self.HEKETI_DB_CHECK_SAMPLE_RATE):
+            window, state["window"] = state["window"], []
+            self._verify_heketi_db_check_window(
+                heketi_db_check(
+                    self.heketi_client_node, self.heketi_server_url),
+                window)
+
     def create_secret(self, secret_name_prefix="autotests-secret",
                       secret_type=None):
         secret_name = oc_create_secret(
@@ -316,12 +499,9 @@ class BaseClass(unittest.TestCase):
                 sc_name = self.create_storage_class()
 
         # Create PVCs
-        pvc_names = []
-        for i in range(pvc_amount):
-            pvc_name = oc_create_pvc(
-                node, sc_name, pvc_name_prefix=pvc_name_prefix,
-                pvc_size=pvc_size)
-            pvc_names.append(pvc_name)
+        pvc_names = oc_create_pvcs(
+            node, sc_name, pvc_name_prefix=pvc_name_prefix,
+            pvc_size=pvc_size, pvc_amount=pvc_amount)
         self.addCleanup(
             wait_for_resources_absence, node, 'pvc', pvc_names)
 
@@ -394,11 +574,18 @@ class BaseClass(unittest.TestCase):
         pvc_names = (
             pvc_names
             if isinstance(pvc_names, (list, set, tuple)) else [pvc_names])
+        pvc_names = list(pvc_names)
         dc_and_pod_names, dc_names = {}, {}
         for pvc_name in pvc_names:
-            dc_name = oc_create_app_dc_with_io(self.ocp_client[0], pvc_name)
+            dc_name = get_app_dc_with_io_name()
             dc_names[pvc_name] = dc_name
-            self.addCleanup(oc_delete, self.ocp_client[0], 'dc', dc_name)
+            # NOTE: register cleanups before creation, because List of DCs
+            # may get created partially
+            self.addCleanup(oc_delete, self.ocp_client[0], 'dc', dc_name,
+                            raise_on_absence=False)
+        oc_create_app_dcs_with_io(
+            self.ocp_client[0], pvc_names,
+            dc_names=[dc_names[pvc_name] for pvc_name in pvc_names])
         self.addCleanup(
             scale_dcs_pod_amount_and_wait, self.ocp_client[0],
             dc_names.values(), 0, timeout=timeout, wait_step=wait_step)
@@ -693,9 +880,9 @@ class GlusterBlockBaseClass(BaseClass):
         self.assertEqual(hacount, len(devices), msg)
 
         # Get mpath names and verify that only one mpath is there
-        mpaths = set()
-        for device in devices.keys():
-            mpaths.add(get_mpath_name_from_device_name(node, device))
+        mpaths = set(command.run_in_parallel(
+            lambda device: get_mpath_name_from_device_name(node, device),
+            devices.keys()))
         msg = ("Only one mpath was expected on Node %s, but got %s" % (
             node, mpaths))
         self.assertEqual(1, len(mpaths), msg)
@@ -1,4 +1,51 @@
+from collections import deque
+from collections import namedtuple
+import contextlib
+from multiprocessing.pool import ThreadPool
+import errno
+import os
+import select
+import threading
+import time
+
 from glusto.core import Glusto as g
+import six
+
+from openshiftstoragelibs import command_stats
+from openshiftstoragelibs import exceptions
+from openshiftstoragelibs import retry
+
+
+PARALLEL_WORKERS = g.config.get("common", {}).get("parallel_workers", 10)
+ASYNC_MAX_IN_FLIGHT = g.config.get("common", {}).get(
+    "async_max_in_flight", PARALLEL_WORKERS)
+
+CmdResult = namedtuple('CmdResult', 'ret out err duration')
+
+_thread_state = threading.local()
+
+
+@contextlib.contextmanager
+def direct_run():
+    """Make 'g.run' calls of the current thread skip POD routing.
+
+    'podcmd.GlustoPod' replaces 'g.run' method, which is shared by all
+    the threads, with the one resolving targets to Gluster PODs. Commands
+    run by the current thread within this context manager go to the
+    original 'g.run' method, e.g. lookup of Gluster PODs itself or
+    commands of background threads, which run only on nodes.
+    """
+    prev_state = getattr(_thread_state, "direct_run", False)
+    _thread_state.direct_run = True
+    try:
+        yield
+    finally:
+        _thread_state.direct_run = prev_state
+
+
+def is_direct_run():
+    """Check whether current thread is within 'direct_run' context."""
+    return getattr(_thread_state, "direct_run", False)
 
 
 def cmd_run(cmd, hostname, raise_on_error=True):
@@ -12,11 +59,7 @@ def cmd_run(cmd, hostname, raise_on_error=True):
     Returns:
         str: Stripped shell command's stdout value if not None.
     """
-    ret, out, err = g.run(hostname, cmd, "root")
-    if ("no ssh connection" in err.lower()
-            or "tls handshake timeout" in err.lower()):
-        g.ssh_close_connection(hostname)
-        ret, out, err = g.run(hostname, cmd, "root")
+    ret, out, err, _ = timed_run(hostname, cmd)
     msg = ("Failed to execute command '%s' on '%s' node. Got non-zero "
            "return code '%s'. Err: %s" % (cmd, hostname, ret, err))
     if int(ret) != 0:
@@ -27,3 +70,449 @@ def cmd_run(cmd, hostname, raise_on_error=True):
     out = out.strip() if out else out
 
     return out
+
+
+def cmd_run_batch(cmds, hostname, raise_on_error=True):
+    """Run several shell commands on a host using single SSH round trip.
+
+    Args:
+        cmds (list): Shell commands to run on the specified hostname.
+        hostname (str): hostname where Glusto should run specified commands.
+        raise_on_error (bool): defines whether we should raise exception
+                               in case execution of any command failed.
+    Returns:
+        list: Stripped shell commands' stdout values in the order of 'cmds'.
+    """
+    results = retry.get_policy("ssh").call(
+        lambda: g.run_batch(hostname, cmds, "root"),
+        get_error=lambda results: "\n".join(r[2] for r in results),
+        on_retry=lambda error, attempt: g.ssh_close_connection(hostname))
+
+    outs, err_msg = [], ""
+    for cmd, (ret, out, err) in zip(cmds, results):
+        if int(ret) != 0:
+            msg = ("Failed to execute command '%s' on '%s' node. Got non-zero "
+                   "return code '%s'. Err: %s" % (cmd, hostname, ret, err))
+            g.log.error(msg)
+            err_msg += msg + "\n"
+        outs.append(out.strip() if out else out)
+    if raise_on_error:
+        assert not err_msg, err_msg
+    return outs
+
+
+def cmd_run_stream(cmd, hostname, raise_on_error=True, chunk_size=None):
+    """Streaming variant of the 'cmd_run' function.
+
+    Args:
+        cmd (str): Shell command to run on the specified hostname.
+        hostname (str): hostname where Glusto should run specified command.
+        raise_on_error (bool): defines whether we should raise exception
+                               in case command execution failed.
+        chunk_size (int|None): max size of the yielded pieces of stdout.
+    Yields:
+        str: not stripped lines of the shell command's stdout as they come.
+    Raises:
+        AssertionError: after the last line of output, if command failed
+            and 'raise_on_error' is True.
+    """
+    policy, start_time, attempt = retry.get_policy("ssh"), time.time(), 0
+    while True:
+        attempt += 1
+        stream, yielded = g.run_stream(
+            hostname, cmd, "root", chunk_size=chunk_size), False
+        for line in stream:
+            yielded = True
+            yield line
+        err = stream.stderr
+        # NOTE: output which was already yielded can't be taken back
+        delay = (
+            None if yielded
+            else policy.get_retry_delay(err, attempt, start_time))
+        if delay is None:
+            break
+        g.ssh_close_connection(hostname)
+        command_stats.add_retry()
+        time.sleep(delay)
+
+    msg = ("Failed to execute command '%s' on '%s' node. Got non-zero "
+           "return code '%s'. Err: %s" % (
+               cmd, hostname, stream.returncode, err))
+    if int(stream.returncode) != 0:
+        g.log.error(msg)
+    if raise_on_error:
+        assert int(stream.returncode) == 0, msg
+
+
+def run_in_parallel(func, args_list, max_workers=None):
+    """Call a function with each of the provided arguments concurrently.
+
+    Args:
+        func (callable): function to be called.
+        args_list (iterable): sequence of argument tuples, one per call.
+            Non-tuple items are passed as the single positional argument.
+        max_workers (int): upper limit of concurrently running calls.
+            Defaults to the 'common.parallel_workers' config option or 10.
+    Returns:
+        list: results of the calls in the same order as 'args_list'.
+    Raises:
+        The first exception raised by any of the calls, after all of the
+        calls are finished.
+    """
+    args_list = [
+        args if isinstance(args, tuple) else (args, ) for args in args_list]
+    if not args_list:
+        return []
+
+    def _call(args):
+        try:
+            return True, func(*args)
+        except Exception as e:
+            g.log.error("Failed to call '%s' with '%s' args: %s" % (
+                getattr(func, '__name__', func), args, e))
+            return False, e
+
+    workers = min(max_workers or PARALLEL_WORKERS, len(args_list))
+    pool = ThreadPool(workers)
+    try:
+        results = pool.map(_call, args_list)
+    finally:
+        pool.close()
+        pool.join()
+
+    for is_ok, result in results:
+        if not is_ok:
+            raise result
+    return [result for _, result in results]
+
+
+def timed_run(hostname, cmd):
+    """Run shell command not checking its return code.
+
+    Args:
+        hostname (str): hostname where Glusto should run specified command.
+        cmd (str|list): Shell command to run.
+    Returns:
+        CmdResult: 'ret', 'out', 'err' and 'duration' of the command.
+            Output is not stripped.
+    """
+    start_time = time.time()
+    ret, out, err = retry.get_policy("ssh").call(
+        lambda: g.run(hostname, cmd, "root"),
+        get_error=lambda result: result[2],
+        on_retry=lambda error, attempt: g.ssh_close_connection(hostname))
+    return CmdResult(ret, out, err, time.time() - start_time)
+
+
+def cmd_run_on_hosts(cmd, hostnames=None, raise_on_error=True,
+                     max_workers=None):
+    """Run shell command(s) on several hosts at the same time.
+
+    Args:
+        cmd (str|dict): Shell command to run on each of the 'hostnames' or
+            dict where keys are hostnames and values are commands to run
+            on the appropriate host.
+        hostnames (iterable): hostnames to run 'cmd' on. Must be provided
+            only when 'cmd' is a str object.
+        raise_on_error (bool): defines whether we should raise exception
+            in case execution failed on any of the hosts.
+        max_workers (int): upper limit of concurrently served hosts.
+    Returns:
+        dict: hostnames as keys and 'CmdResult' objects as values, where
+            the latter consist of 'ret', 'out', 'err' and 'duration' fields.
+            'out' is stripped like in the 'cmd_run' function.
+    """
+    if isinstance(cmd, dict):
+        if hostnames is not None:
+            raise ValueError(
+                "'hostnames' must not be provided when 'cmd' is a dict.")
+        host_cmd_pairs = list(cmd.items())
+    else:
+        hostnames = (
+            [hostnames] if isinstance(hostnames, six.string_types)
+            else list(hostnames or []))
+        host_cmd_pairs = [(hostname, cmd) for hostname in hostnames]
+
+    results = run_in_parallel(
+        timed_run, host_cmd_pairs, max_workers=max_workers)
+
+    host_results, err_msg = {}, ""
+    for (hostname, host_cmd), result in zip(host_cmd_pairs, results):
+        host_results[hostname] = result._replace(
+            out=result.out.strip() if result.out else result.out)
+        if int(result.ret) != 0:
+            msg = ("Failed to execute command '%s' on '%s' node. Got non-zero "
+                   "return code '%s'. Err: %s" % (
+                       host_cmd, hostname, result.ret, result.err))
+            g.log.error(msg)
+            err_msg += msg + "\n"
+    if raise_on_error:
+        assert not err_msg, err_msg
+    return host_results
+
+
+class AsyncCmd(object):
+    """Shell command, which runs on a remote host not blocking the caller.
+
+    Objects of this class are created by the 'cmd_run_async' function and
+    are driven by the 'wait_for_async_cmds' function, which serves any
+    amount of commands from the calling thread without a thread per
+    command.
+    """
+
+    def __init__(self, cmd, hostname, raise_on_error=True, processor=None,
+                 error_handler=None):
+        """Args:
+            cmd (str|list): Shell command to run on the specified hostname.
+            hostname (str): hostname where command should run.
+            raise_on_error (bool): defines whether we should raise exception
+                in case command execution failed.
+            processor (callable): function which gets stripped stdout of
+                the command and returns result of the command.
+            error_handler (callable): function which gets exception raised
+                on processing of the command results and returns result
+                of the command or raises an exception.
+        """
+        self.cmd = cmd
+        self.hostname = hostname
+        self.raise_on_error = raise_on_error
+        self.processor = processor
+        self.error_handler = error_handler
+        self.ret = self.out = self.err = self.duration = None
+        self._proc = None
+        self._streams = {}
+        self._open_fds = set()
+        self._start_time = None
+        self._attempt = 1
+        self._retry_at = None
+        self._result = self._error = None
+        self.done = False
+
+    def __repr__(self):
+        return "AsyncCmd(%s: %s)" % (self.hostname, self.cmd)
+
+    @property
+    def started(self):
+        return self._proc is not None or self.done
+
+    def _start(self):
+        """Start the command and return file descriptors to be polled."""
+        g.log.info("root@%s (async): %s" % (self.hostname, self.cmd))
+        self._start_time = self._start_time or time.time()
+        if g._command_backend is not None:
+            # NOTE: commands to the fake backends are run synchronously
+            self._complete(*g._command_backend.run(
+                self.hostname, self.cmd, "root"))
+            return []
+        try:
+            self._proc = g._popen(
+                self.hostname, "root", self.cmd, universal_newlines=False)
+        except Exception as e:
+            self._set_result(error=e)
+            return []
+        self._streams = {
+            self._proc.stdout.fileno(): [],
+            self._proc.stderr.fileno(): [],
+        }
+        self._open_fds = set(self._streams.keys())
+        return list(self._open_fds)
+
+    def _read(self, fd):
+        """Read available data of the stream and return False on EOF."""
+        data = os.read(fd, 65536)
+        if data:
+            self._streams[fd].append(data)
+        else:
+            self._open_fds.discard(fd)
+        return bool(data)
+
+    def _finish(self):
+        """Complete the command and return True if it should be restarted."""
+        proc, self._proc = self._proc, None
+        ret = proc.wait()
+        out, err = [
+            b''.join(self._streams[stream.fileno()])
+            for stream in (proc.stdout, proc.stderr)]
+        if six.PY3:
+            out, err = out.decode('utf-8'), err.decode('utf-8')
+        proc.stdout.close()
+        proc.stderr.close()
+        if proc.stdin:
+            proc.stdin.close()
+        return self._complete(ret, out, err)
+
+    def _complete(self, ret, out, err):
+        delay = retry.get_policy("ssh").get_retry_delay(
+            err, self._attempt, self._start_time)
+        if delay is not None:
+            self._attempt += 1
+            self._retry_at = time.time() + delay
+            g.ssh_close_connection(self.hostname)
+            return True
+
+        g._log_results("root@%s" % self.hostname, ret, out, err)
+        self.ret, self.out, self.err = ret, out, err
+        self.duration = time.time() - self._start_time
+        command_stats.record(
+            self.hostname, self.cmd, self.duration, len(out) + len(err),
+            retries=self._attempt - 1)
+        try:
+            self._set_result(result=self._process())
+        except Exception as e:
+            self._set_result(error=e)
+        return False
+
+    def _process(self):
+        msg = ("Failed to execute command '%s' on '%s' node. Got non-zero "
+               "return code '%s'. Err: %s" % (
+                   self.cmd, self.hostname, self.ret, self.err))
+        if int(self.ret) != 0:
+            g.log.error(msg)
+        if self.raise_on_error:
+            assert int(self.ret) == 0, msg
+
+        out = self.out.strip() if self.out else self.out
+
+        return self.processor(out) if self.processor else out
+
+    def _set_result(self, result=None, error=None):
+        if error is not None and self.error_handler:
+            try:
+                result, error = self.error_handler(error), None
+            except Exception as e:
+                error = e
+        self._result, self._error = result, error
+        self.done = True
+
+    def result(self, timeout=None):
+        """Wait for the command to finish and return its result.
+
+        Args:
+            timeout (int|None): seconds to wait for the command.
+        Returns:
+            Stripped shell command's stdout value or value returned
+            by the 'processor' function.
+        Raises:
+            exceptions.ExecutionError: when timeout is reached.
+            Exception raised on processing of the command results.
+        """
+        if not self.done:
+            wait_for_async_cmds([self], timeout=timeout)
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def cmd_run_async(cmd, hostname, raise_on_error=True, processor=None,
+                  error_handler=None):
+    """Non-blocking variant of the 'cmd_run' function.
+
+    Command is started by the 'wait_for_async_cmds' function or by the
+    'result' method of the returned object.
+
+    Args:
+        cmd (str|list): Shell command to run on the specified hostname.
+        hostname (str): hostname where command should run.
+        raise_on_error (bool): defines whether we should raise exception
+            in case command execution failed.
+        processor (callable): function which gets stripped stdout of
+            the command and returns result of the command.
+        error_handler (callable): function which gets exception raised
+            on processing of the command results and returns result
+            of the command or raises an exception.
+    Returns:
+        AsyncCmd: handle of the command.
+    """
+    return AsyncCmd(
+        cmd, hostname, raise_on_error=raise_on_error, processor=processor,
+        error_handler=error_handler)
+
+
+def wait_for_async_cmds(handles, timeout=None, max_in_flight=None):
+    """Run commands created by 'cmd_run_async' and wait for them to finish.
+
+    All the commands are served by the calling thread, polling their
+    output streams. Results of the commands are not raised, use 'result'
+    method of the handles to get them.
+
+    Args:
+        handles (iterable): 'AsyncCmd' objects to be waited for.
+        timeout (int|None): seconds to wait for all the commands.
+        max_in_flight (int): upper limit of concurrently running commands.
+            Defaults to the 'common.async_max_in_flight' config option,
+            which defaults to the 'common.parallel_workers' one.
+            Note that commands to the same host share single SSH
+            connection, which limits amount of sessions opened using it.
+    Returns:
+        list: handles in the order of 'handles'.
+    Raises:
+        exceptions.ExecutionError: when timeout is reached.
+    """
+    handles = list(handles)
+    limit = max_in_flight or ASYNC_MAX_IN_FLIGHT
+    deadline = time.time() + timeout if timeout else None
+    poller, fd_handles, running, delayed = select.poll(), {}, set(), []
+
+    def _start(handle):
+        fds = handle._start()
+        for fd in fds:
+            fd_handles[fd] = handle
+            poller.register(fd, select.POLLIN | select.POLLPRI)
+        if fds:
+            running.add(handle)
+
+    for handle in handles:
+        if handle._proc is not None:
+            # NOTE: handle was started by one of the previous calls,
+            # which was interrupted by timeout.
+            for fd in handle._open_fds:
+                fd_handles[fd] = handle
+                poller.register(fd, select.POLLIN | select.POLLPRI)
+            running.add(handle)
+    pending = deque(handle for handle in handles if not handle.started)
+
+    while pending or running or delayed:
+        for handle in [h for h in delayed if h._retry_at <= time.time()]:
+            delayed.remove(handle)
+            _start(handle)
+        while pending and len(running) < limit:
+            _start(pending.popleft())
+        if not (running or delayed):
+            continue
+
+        poll_timeout = None
+        if deadline is not None:
+            poll_timeout = deadline - time.time()
+            if poll_timeout <= 0:
+                unfinished = [h for h in handles if not h.done]
+                raise exceptions.ExecutionError(
+                    "%s commands didn't finish in %s seconds: %s" % (
+                        len(unfinished), timeout, unfinished))
+        if delayed:
+            # NOTE: wake up to restart commands retried after backoff
+            retry_timeout = max(
+                0, min(h._retry_at for h in delayed) - time.time())
+            poll_timeout = min(
+                poll_timeout if poll_timeout is not None else retry_timeout,
+                retry_timeout)
+        if poll_timeout is not None:
+            poll_timeout *= 1000
+        try:
+            events = poller.poll(poll_timeout)
+        except (IOError, OSError, select.error) as e:
+            if e.args and e.args[0] == errno.EINTR:
+                continue
+            raise
+
+        for fd, event in events:
+            handle = fd_handles[fd]
+            if handle._read(fd):
+                continue
+            poller.unregister(fd)
+            del fd_handles[fd]
+            if handle._open_fds:
+                continue
+            running.discard(handle)
+            if handle._finish():
+                delayed.append(handle)
+    return handles
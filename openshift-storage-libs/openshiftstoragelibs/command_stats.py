@@ -0,0 +1,227 @@
+"""
+Use this module for collecting latency statistics of remote commands.
+
+Every command run using patched Glusto 'run' and 'run_batch' methods,
+non-blocking commands and POD sessions is recorded with its host,
+command family, wall time, output size and amount of retries.
+
+Usage example:
+
+    from openshiftstoragelibs import command_stats
+
+    command_stats.get_command_family(
+        "timeout 120 heketi-cli -s http://heketi volume create --size=1")
+    # 'heketi-cli volume create'
+
+    report = command_stats.get_report()
+    report['families']['oc get']['p95']
+    # 1.53
+
+Report is written to the file defined by the 'common.command_stats_file'
+config option, if it is set, on exit of the process. '%(pid)s' in the
+file path is replaced with the process ID.
+"""
+try:
+    # py2/3
+    import simplejson as json
+except ImportError:
+    # py2
+    import json
+
+import atexit
+from collections import namedtuple
+import os
+import threading
+
+from glusto.core import Glusto as g
+import six
+
+
+COMMAND_STATS_FILE = g.config.get("common", {}).get("command_stats_file")
+
+# Amount of words, which define command family, after skipping of options
+FAMILY_DEPTHS = {
+    "oc": 2,
+    "heketi-cli": 3,
+    "gluster": 3,
+    "gluster-block": 2,
+    "heketi-rest": 3,
+}
+# Options, which take value as separate word
+OPTIONS_WITH_VALUE = (
+    "-s", "--server", "--user", "--secret", "-n", "--namespace", "-o",
+    "--output", "-l", "--selector", "-c", "--container", "--mode",
+)
+COMMAND_SEPARATORS = ("|", "||", "&&", ";")
+# Commands, which only feed data to the next command of the pipeline
+PIPE_PRODUCERS = ("echo", "printf", "cat")
+HISTOGRAM_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+PERCENTILES = (50, 95, 99)
+
+CmdRecord = namedtuple('CmdRecord', 'host family duration out_size retries')
+
+_RECORDS = []
+_LOCK = threading.Lock()
+_LOCAL = threading.local()
+
+
+def get_command_family(cmd):
+    """Get short name of the command, which groups similar commands.
+
+    'timeout N' prefix and 'oc exec'/'oc rsh' prefixes are skipped,
+    so the commands run in PODs are grouped with the ones run on nodes.
+    Pipelines starting with 'echo', 'printf' or 'cat' are grouped by
+    the command reading their output, e.g. "echo '{...}' | oc create -f -"
+    is 'oc create'.
+
+    Args:
+        cmd (str|list): shell command.
+    Returns:
+        str: family of the command, e.g. 'oc get' or 'gluster volume info'.
+    """
+    words = (
+        cmd.split() if isinstance(cmd, six.string_types)
+        else ' '.join(cmd).split())
+    while words:
+        if words[0] == 'timeout' and len(words) > 1:
+            words = words[2:]
+        elif (words[0].split('/')[-1] in PIPE_PRODUCERS
+                and '|' in words[1:]):
+            words = words[words.index('|') + 1:]
+        elif words[:2] in (['oc', 'exec'], ['oc', 'rsh']):
+            if '--' in words:
+                words = words[words.index('--') + 1:]
+            else:
+                words = [w for w in words[2:] if not w.startswith('-')][1:]
+        else:
+            break
+    if not words:
+        return ''
+
+    program = words[0].split('/')[-1]
+    family, depth, skip_next = [program], FAMILY_DEPTHS.get(program, 1), False
+    for word in words[1:]:
+        if len(family) >= depth or word in COMMAND_SEPARATORS:
+            break
+        if skip_next:
+            skip_next = False
+        elif word.startswith('-'):
+            skip_next = word in OPTIONS_WITH_VALUE
+        else:
+            family.append(word)
+    return ' '.join(family)
+
+
+def add_retry(count=1):
+    """Count retry of the command, which is going to be run next.
+
+    Retries are attributed to the next command recorded by the same thread.
+    """
+    _LOCAL.retries = getattr(_LOCAL, 'retries', 0) + count
+
+
+def record(host, cmd, duration, out_size=0, retries=None):
+    """Record results of the remote command.
+
+    Args:
+        host (str): host where command ran.
+        cmd (str|list): shell command or its family.
+        duration (float): wall time of the command in seconds.
+        out_size (int): size of the command output.
+        retries (int|None): amount of retries of the command. Retries
+            counted using 'add_retry' function are used if not provided.
+    """
+    if retries is None:
+        retries, _LOCAL.retries = getattr(_LOCAL, 'retries', 0), 0
+    with _LOCK:
+        _RECORDS.append(CmdRecord(
+            host, get_command_family(cmd), duration, out_size, retries))
+
+
+def get_records():
+    """Get list of the 'CmdRecord' objects recorded so far."""
+    with _LOCK:
+        return list(_RECORDS)
+
+
+def reset():
+    """Drop all the records."""
+    with _LOCK:
+        del _RECORDS[:]
+
+
+def _get_percentile(sorted_values, percentile):
+    index = int(round(percentile / 100.0 * len(sorted_values) + 0.5)) - 1
+    return sorted_values[max(0, min(index, len(sorted_values) - 1))]
+
+
+def _get_stats(records):
+    durations = sorted(r.duration for r in records)
+    stats = {
+        "count": len(durations),
+        "total": sum(durations),
+        "max": durations[-1],
+        "out_size": sum(r.out_size for r in records),
+        "retries": sum(r.retries for r in records),
+        "histogram": {},
+    }
+    for percentile in PERCENTILES:
+        stats["p%d" % percentile] = _get_percentile(durations, percentile)
+    bucket_index = 0
+    for bucket in HISTOGRAM_BUCKETS + (None, ):
+        key = "le_%s" % bucket if bucket is not None else "inf"
+        count = 0
+        while (bucket_index < len(durations)
+               and (bucket is None or durations[bucket_index] <= bucket)):
+            count, bucket_index = count + 1, bucket_index + 1
+        stats["histogram"][key] = count
+    return stats
+
+
+def get_report():
+    """Get latency statistics grouped by command families and hosts.
+
+    Returns:
+        dict: with 'families' and 'hosts' keys. Each of them contains
+            dict with family or host as keys and dicts with 'count',
+            'total', 'max', 'p50', 'p95', 'p99', 'out_size', 'retries'
+            and 'histogram' keys as values. Histogram buckets are not
+            cumulative, 'le_X' bucket counts durations greater than
+            the previous bucket's bound and not greater than 'X'.
+    """
+    groups = {"families": {}, "hosts": {}}
+    for r in get_records():
+        groups["families"].setdefault(r.family, []).append(r)
+        groups["hosts"].setdefault(r.host, []).append(r)
+    return {
+        group: {key: _get_stats(records) for key, records in items.items()}
+        for group, items in groups.items()
+    }
+
+
+def write_report(path):
+    """Write latency statistics report as JSON to the local file.
+
+    Args:
+        path (str): path to the file. '%(pid)s' is replaced with
+            the process ID.
+    Returns:
+        str: path to the written file.
+    """
+    path = path % {"pid": os.getpid()}
+    with open(path, "w") as f:
+        json.dump(get_report(), f, indent=2, sort_keys=True)
+    return path
+
+
+def _write_report_at_exit():
+    if not (COMMAND_STATS_FILE and get_records()):
+        return
+    try:
+        path = write_report(COMMAND_STATS_FILE)
+        g.log.info("Commands latency report is written to '%s'." % path)
+    except Exception as e:
+        g.log.error("Failed to write commands latency report: %s" % e)
+
+
+atexit.register(_write_report_at_exit)
@@ -0,0 +1,177 @@
+"""
+Use this module for reading events of the current project incrementally.
+
+'get_events' function of the 'openshift_ops' module used to download all
+the events of the project on each call, and 'wait_for_events' polls it
+in a loop. 'EventFeed' lists events once and then gets only the changed
+ones using watch API, starting from the resourceVersion of the last seen
+change, so all the callers using the same node share one feed of events
+kept in memory.
+
+Watch requests are done by 'oc get --raw' with the 'timeoutSeconds' query
+parameter, so each poll returns changes made since the previous one.
+Events are relisted when server reports that resourceVersion is too old.
+
+Usage example:
+
+    from openshiftstoragelibs import event_feed
+
+    feed = event_feed.get_event_feed(ocp_node)
+    new_events = feed.poll()
+    all_events = feed.get_events()
+
+Set 'common.use_event_feed' config option to 'True' to enable it. Each poll
+keeps the watch request open up to 'EVENT_FEED_WATCH_TIMEOUT' seconds
+when nothing changes, and watch permission on events is required.
+"""
+try:
+    # py2/3
+    import simplejson as json
+except ImportError:
+    # py2
+    import json
+
+import threading
+
+from glusto.core import Glusto as g
+
+from openshiftstoragelibs import command
+
+
+USE_EVENT_FEED = g.config.get("common", {}).get("use_event_feed", False)
+# Seconds for which server keeps watch request open on each poll
+EVENT_FEED_WATCH_TIMEOUT = 1
+
+_FEEDS = {}
+_FEEDS_LOCK = threading.Lock()
+
+
+def _get_name(event):
+    return event["metadata"]["name"]
+
+
+class EventFeed(object):
+    """Events of the current project updated incrementally."""
+
+    def __init__(self, hostname):
+        """Args:
+            hostname (str): node where 'oc' commands run.
+        """
+        self.hostname = hostname
+        self.namespace = None
+        self.resource_version = None
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "EventFeed(%s, %s)" % (self.hostname, self.namespace)
+
+    def _get_api_path(self):
+        if self.namespace is None:
+            self.namespace = command.cmd_run(
+                "oc project -q", hostname=self.hostname).strip()
+        return "/api/v1/namespaces/%s/events" % self.namespace
+
+    def _list(self):
+        out = command.cmd_run(
+            "oc get --raw '%s'" % self._get_api_path(),
+            hostname=self.hostname)
+        data = json.loads(out)
+        events = {_get_name(event): event for event in data.get("items") or []}
+        changed = [
+            event for name, event in events.items()
+            if self._events.get(name) != event]
+        self._events = events
+        self.resource_version = data["metadata"]["resourceVersion"]
+        return changed
+
+    def _watch(self):
+        out = command.cmd_run(
+            "oc get --raw '%s?watch=true&resourceVersion=%s"
+            "&timeoutSeconds=%s'" % (
+                self._get_api_path(), self.resource_version,
+                EVENT_FEED_WATCH_TIMEOUT),
+            hostname=self.hostname)
+        changed = {}
+        for line in out.splitlines():
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            event_type, obj = data["type"], data["object"]
+            if event_type == "ERROR":
+                # NOTE: e.g. '410 Gone' when resourceVersion is too old
+                g.log.info("Relisting events of the '%s' project: %s" % (
+                    self.namespace, obj.get("message")))
+                return self._list()
+            self.resource_version = obj["metadata"].get(
+                "resourceVersion", self.resource_version)
+            if event_type == "DELETED":
+                self._events.pop(_get_name(obj), None)
+                changed.pop(_get_name(obj), None)
+            elif event_type in ("ADDED", "MODIFIED"):
+                self._events[_get_name(obj)] = changed[_get_name(obj)] = obj
+        return list(changed.values())
+
+    def poll(self):
+        """Get events added or changed since the previous poll.
+
+        First poll lists all the events of the project.
+
+        Returns:
+            list: events sorted by name.
+        Raises:
+            AssertionError: if 'oc' command fails.
+        """
+        with self._lock:
+            try:
+                if self.resource_version is None:
+                    changed = self._list()
+                else:
+                    changed = self._watch()
+            except Exception:
+                # NOTE: changes could be lost, so relist on the next poll
+                self.resource_version = None
+                raise
+        return sorted(changed, key=_get_name)
+
+    def get_events(self):
+        """Get all the events of the project polling changes first.
+
+        Returns:
+            list: events sorted by name.
+        Raises:
+            AssertionError: if 'oc' command fails.
+        """
+        self.poll()
+        with self._lock:
+            return sorted(self._events.values(), key=_get_name)
+
+
+def get_event_feed(hostname):
+    """Get event feed shared by all the callers using the node.
+
+    Args:
+        hostname (str): node where 'oc' commands run.
+    Returns:
+        EventFeed|None: feed or None if it is disabled.
+    """
+    if not USE_EVENT_FEED or g._command_backend is not None:
+        return None
+    with _FEEDS_LOCK:
+        feed = _FEEDS.get(hostname)
+        if feed is None:
+            feed = _FEEDS[hostname] = EventFeed(hostname)
+    return feed
+
+
+def drop_feeds(hostname=None):
+    """Drop event feeds, e.g. when current project gets switched.
+
+    Args:
+        hostname (str|None): node which feeds should be dropped. All the
+            feeds are dropped if None.
+    """
+    with _FEEDS_LOCK:
+        for key in list(_FEEDS):
+            if hostname in (None, key):
+                _FEEDS.pop(key)
@@ -0,0 +1,938 @@
+"""
+Use this module for running the library against in-memory simulated cluster.
+
+'FakeCluster' emulates subset of 'oc', 'heketi-cli', 'gluster' and
+'gluster-block' CLIs using in-memory model of OCP objects, Heketi volumes,
+block volumes, nodes, devices and bricks. It is useful for benchmarking and
+profiling of the library itself, i.e. waiters, parsers, cleanup paths and
+concurrency, without real cluster.
+
+Usage example:
+
+    from openshiftstoragelibs import fake_cluster
+
+    cluster = fake_cluster.FakeCluster(
+        gluster_nodes=3, latency={'default': 0.05, 'heketi-cli': 0.5})
+    fake_cluster.install(cluster)
+    ...
+    fake_cluster.uninstall()
+
+Fake cluster also gets installed automatically, when 'common.fake_cluster'
+config option has 'enabled' key set to 'True'. Rest of the keys of
+this option are passed to the 'FakeCluster' constructor.
+
+Supported commands:
+    - 'oc get' with 'yaml', 'json', 'name', 'wide' and 'custom-columns'
+      output formats, label selectors and comma separated resource types,
+    - 'oc create -f <local-file>', "echo '<data>' | oc create -f -",
+    - 'oc delete', 'oc scale dc', 'oc exec', 'oc rsh', 'oc version',
+    - 'oc project -q',
+    - 'heketi-cli volume create/info/list/delete',
+    - 'heketi-cli blockvolume create/info/list/delete',
+    - 'heketi-cli node list/info', 'heketi-cli cluster list',
+    - 'heketi-cli topology info', 'heketi-cli db check',
+    - 'gluster volume list/info', 'gluster-block list',
+    - 'rpm -q heketi/heketi-client' version queries.
+Dynamic provisioning of the PVCs is emulated for 'kubernetes.io/glusterfs'
+and 'gluster.org/glusterblock' provisioners. Deleted PODs owned by DCs and
+DaemonSets get replaced with the new ones.
+"""
+try:
+    # py2/3
+    import simplejson as json
+except ImportError:
+    # py2
+    import json
+
+import copy
+import datetime
+import random
+import re
+import shlex
+import threading
+import time
+import uuid
+
+from glusto.core import Glusto as g
+import six
+import yaml
+
+from openshiftstoragelibs import command_stats
+from openshiftstoragelibs import utils
+
+
+KIND_ALIASES = {
+    "Pod": ("po", "pod", "pods"),
+    "PersistentVolumeClaim": (
+        "pvc", "pvcs", "persistentvolumeclaim", "persistentvolumeclaims"),
+    "PersistentVolume": (
+        "pv", "pvs", "persistentvolume", "persistentvolumes"),
+    "StorageClass": ("sc", "storageclass", "storageclasses"),
+    "DeploymentConfig": (
+        "dc", "deploymentconfig", "deploymentconfigs"),
+    "DaemonSet": ("ds", "daemonset", "daemonsets"),
+    "Node": ("no", "node", "nodes"),
+    "Secret": ("secret", "secrets"),
+    "Service": ("svc", "service", "services"),
+    "Endpoints": ("ep", "endpoints"),
+    "Event": ("ev", "event", "events"),
+}
+KINDS = {
+    alias: kind for kind, aliases in KIND_ALIASES.items()
+    for alias in aliases}
+FILE_PROVISIONER = "kubernetes.io/glusterfs"
+BLOCK_PROVISIONER = "gluster.org/glusterblock"
+KIB_IN_GIB = 1024 ** 2
+
+_ECHO_CREATE_RE = re.compile(
+    r"^echo\s+'(.*)'\s*\|\s*oc\s+create\s+-f\s+-\s*$", re.DOTALL)
+_VERSION_CMDS = (
+    (re.compile(r"^oc version \| grep openshift"), "openshift"),
+    (re.compile(r"^(oc exec \S+ -- )?rpm -q heketi-client "), "heketi_client"),
+    (re.compile(r"^(oc exec \S+ -- )?rpm -q heketi "), "heketi"),
+)
+
+
+class FakeCommandError(Exception):
+    def __init__(self, err, ret=1):
+        super(FakeCommandError, self).__init__(err)
+        self.err, self.ret = err, ret
+
+
+def _new_id():
+    return uuid.uuid4().hex
+
+
+def _size_to_gib(size):
+    match = re.match(r"^(\d+)(Gi|G|Mi|M)?$", six.text_type(size))
+    if not match:
+        raise FakeCommandError("Unsupported size value '%s'." % size)
+    value = int(match.group(1))
+    return max(1, value // 1024) if match.group(2) in ("Mi", "M") else value
+
+
+class FakeCluster(object):
+    """In-memory model of the OCP cluster with Heketi and Gluster."""
+
+    def __init__(self, gluster_nodes=3, device_size=512, latency=None,
+                 provision_delay=0, openshift_version="3.11.0",
+                 heketi_version="9.0.0-9", heketi_dc_name=None,
+                 namespace="glusterfs"):
+        """Args:
+            gluster_nodes (int): amount of nodes with Gluster PODs.
+            device_size (int): size of the single Heketi device
+                on each of the nodes in GiB.
+            latency (float|dict): seconds each command takes. Dict may
+                have command families as keys, e.g. 'oc get' or 'heketi-cli',
+                and 'default' key for the rest of commands.
+            provision_delay (float): seconds after which PVCs get bound.
+            openshift_version (str): value returned by 'oc version'.
+            heketi_version (str): Heketi server and client versions.
+            heketi_dc_name (str): name of the Heketi DC. Defaults to the
+                value from the config file.
+            namespace (str): namespace of the created objects.
+        """
+        if not isinstance(latency, dict):
+            latency = {"default": latency or 0}
+        if not heketi_dc_name:
+            openshift_config = g.config.get(
+                "cns", g.config.get("openshift", {}))
+            heketi_dc_name = openshift_config.get(
+                "heketi_config", {}).get("heketi_dc_name", "heketi-storage")
+        self.latency = latency
+        self.provision_delay = provision_delay
+        self.namespace = namespace
+        self.versions = {
+            "openshift": "v%s" % openshift_version.lstrip("v"),
+            "heketi": heketi_version,
+            "heketi_client": heketi_version,
+        }
+        self.objects = {kind: {} for kind in KIND_ALIASES}
+        self.heketi_volumes = {}
+        self.heketi_block_volumes = {}
+        self.heketi_nodes = {}
+        self.heketi_cluster_id = _new_id()
+        self._lock = threading.RLock()
+        self._setup(gluster_nodes, device_size, heketi_dc_name)
+
+    # Model setup and manipulation
+
+    def _setup(self, gluster_nodes, device_size, heketi_dc_name):
+        for index in range(gluster_nodes + 1):
+            name = "node-%s" % index if index else "master-0"
+            ip = "10.0.0.%s" % (index + 10)
+            self._add_object({
+                "kind": "Node", "metadata": {"name": name, "labels": {
+                    "kubernetes.io/hostname": name}},
+                "status": {
+                    "addresses": [{"type": "InternalIP", "address": ip}],
+                    "conditions": [{"type": "Ready", "status": "True"}]},
+            })
+            if not index:
+                continue
+            self._add_object({
+                "kind": "Pod",
+                "metadata": {
+                    "name": "glusterfs-storage-%s" % utils.get_random_str(5),
+                    "labels": {
+                        "glusterfs-node": "pod",
+                        "glusterfs": "storage-pod"},
+                    "ownerReferences": [{
+                        "kind": "DaemonSet", "name": "glusterfs-storage"}],
+                },
+                "spec": {"nodeName": name, "hostNetwork": True},
+            })
+            node_id = _new_id()
+            self.heketi_nodes[node_id] = {
+                "zone": 1, "id": node_id, "state": "online",
+                "cluster": self.heketi_cluster_id,
+                "hostnames": {"manage": [name], "storage": [ip]},
+                "devices": [{
+                    "id": _new_id(), "name": "/dev/sdd", "state": "online",
+                    "storage": {
+                        "total": device_size * KIB_IN_GIB,
+                        "free": device_size * KIB_IN_GIB, "used": 0},
+                    "bricks": [],
+                }],
+            }
+        self._add_object({
+            "kind": "DeploymentConfig",
+            "metadata": {"name": heketi_dc_name},
+            "spec": {"replicas": 1, "template": {"metadata": {"labels": {
+                "glusterfs": "heketi-storage-pod",
+                "heketi": "storage-pod",
+                "deploymentconfig": heketi_dc_name}}}},
+        })
+
+    def _now(self):
+        return datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def _add_object(self, obj):
+        obj = copy.deepcopy(obj)
+        kind, metadata = obj["kind"], obj.setdefault("metadata", {})
+        if kind not in self.objects:
+            raise FakeCommandError(
+                'error: unable to recognize "STDIN": no matches for kind '
+                '"%s"' % kind)
+        name = metadata.get("name")
+        if not name and metadata.get("generateName"):
+            name = metadata["name"] = (
+                metadata["generateName"] + utils.get_random_str(5))
+        if name in self.objects[kind]:
+            raise FakeCommandError(
+                'Error from server (AlreadyExists): %s "%s" already '
+                'exists' % (kind.lower(), name))
+        obj.setdefault("apiVersion", "v1")
+        metadata.setdefault("namespace", self.namespace)
+        metadata.setdefault("labels", {})
+        metadata.setdefault("annotations", {})
+        metadata["uid"] = six.text_type(uuid.uuid4())
+        metadata["creationTimestamp"] = self._now()
+        self.objects[kind][name] = obj
+
+        handler = getattr(self, "_on_%s_create" % kind.lower(), None)
+        if handler:
+            handler(obj)
+        self._add_event(obj, "Created", "Created %s" % kind.lower())
+        return obj
+
+    def _add_event(self, obj, reason, message, event_type="Normal"):
+        self.objects["Event"]["%s.%s" % (
+            obj["metadata"]["name"], utils.get_random_str(16))] = {
+            "kind": "Event", "apiVersion": "v1",
+            "metadata": {
+                "name": obj["metadata"]["name"],
+                "namespace": self.namespace, "labels": {}},
+            "involvedObject": {
+                "kind": obj["kind"], "name": obj["metadata"]["name"],
+                "namespace": self.namespace},
+            "reason": reason, "message": message, "type": event_type,
+            "lastTimestamp": self._now(),
+        }
+
+    def _delete_object(self, kind, name):
+        obj = self.objects[kind].pop(name, None)
+        if obj is None:
+            raise FakeCommandError(
+                'Error from server (NotFound): %s "%s" not found' % (
+                    kind.lower(), name))
+        handler = getattr(self, "_on_%s_delete" % kind.lower(), None)
+        if handler:
+            handler(obj)
+        return obj
+
+    def _on_pod_create(self, pod):
+        spec = pod.setdefault("spec", {})
+        if not spec.get("nodeName"):
+            spec["nodeName"] = random.choice([
+                name for name in self.objects["Node"]
+                if name != "master-0"])
+        node = self.objects["Node"][spec["nodeName"]]
+        host_ip = node["status"]["addresses"][0]["address"]
+        pod["status"] = {
+            "phase": "Running", "hostIP": host_ip,
+            "podIP": host_ip if spec.get("hostNetwork") else (
+                "10.128.%s.%s" % (random.randint(0, 255),
+                                  random.randint(2, 254))),
+            "conditions": [{"type": "Ready", "status": "True"}],
+            "containerStatuses": [{"ready": True, "restartCount": 0}],
+            "startTime": self._now(),
+        }
+
+    def _on_pod_delete(self, pod):
+        for owner in pod["metadata"].get("ownerReferences", []):
+            if (owner["kind"] == "DaemonSet"
+                    or owner["name"] in self.objects["DeploymentConfig"]):
+                new_pod = {
+                    "kind": "Pod",
+                    "metadata": {
+                        "name": re.sub(
+                            r"-[a-z0-9]{5}$",
+                            "-%s" % utils.get_random_str(5),
+                            pod["metadata"]["name"]),
+                        "labels": pod["metadata"]["labels"],
+                        "ownerReferences": [owner],
+                    },
+                    "spec": pod["spec"],
+                }
+                self._add_object(new_pod)
+
+    def _on_deploymentconfig_create(self, dc):
+        dc.setdefault("status", {})["latestVersion"] = 1
+        self._scale_dc(dc, dc.get("spec", {}).get("replicas", 1))
+
+    def _on_deploymentconfig_delete(self, dc):
+        self._scale_dc(dc, 0)
+
+    def _get_dc_pods(self, dc):
+        return [
+            name for name, pod in self.objects["Pod"].items()
+            if dc["metadata"]["name"] in [
+                owner["name"] for owner in pod["metadata"].get(
+                    "ownerReferences", [])]]
+
+    def _scale_dc(self, dc, replicas):
+        dc["spec"]["replicas"] = replicas
+        pods = self._get_dc_pods(dc)
+        for pod_name in pods[replicas:]:
+            self.objects["Pod"].pop(pod_name)
+        template = dc["spec"].get("template", {})
+        for _ in range(replicas - len(pods)):
+            self._add_object({
+                "kind": "Pod",
+                "metadata": {
+                    "name": "%s-%s-%s" % (
+                        dc["metadata"]["name"], dc["status"]["latestVersion"],
+                        utils.get_random_str(5)),
+                    "labels": dict(template.get("metadata", {}).get(
+                        "labels", {"deploymentconfig": dc["metadata"]["name"]
+                                   })),
+                    "ownerReferences": [{
+                        "kind": "ReplicationController",
+                        "name": dc["metadata"]["name"]}],
+                },
+                "spec": copy.deepcopy(template.get("spec", {})),
+            })
+
+    def _on_persistentvolumeclaim_create(self, pvc):
+        pvc["status"] = {"phase": "Pending"}
+        pvc["metadata"]["annotations"]["_provision_at"] = (
+            time.time() + self.provision_delay)
+
+    def _on_persistentvolumeclaim_delete(self, pvc):
+        pv_name = pvc.get("spec", {}).get("volumeName")
+        pv = self.objects["PersistentVolume"].get(pv_name)
+        if pv and pv["spec"].get("persistentVolumeReclaimPolicy") == "Delete":
+            self._delete_object("PersistentVolume", pv_name)
+
+    def _on_persistentvolume_delete(self, pv):
+        annotations = pv["metadata"]["annotations"]
+        volume_id = annotations.get(
+            "gluster.kubernetes.io/heketi-volume-id",
+            annotations.get("gluster.org/volume-id"))
+        if volume_id in self.heketi_volumes:
+            self._heketi_delete_volume(volume_id)
+        elif volume_id in self.heketi_block_volumes:
+            self._heketi_delete_block_volume(volume_id)
+
+    def _reconcile(self):
+        """Bind PVCs, which provisioning time has come."""
+        for pvc in list(self.objects["PersistentVolumeClaim"].values()):
+            annotations = pvc["metadata"]["annotations"]
+            if (pvc["status"]["phase"] != "Pending"
+                    or annotations.get("_provision_at", 0) > time.time()):
+                continue
+            sc_name = pvc.get("spec", {}).get("storageClassName") or (
+                annotations.get("volume.beta.kubernetes.io/storage-class"))
+            sc = self.objects["StorageClass"].get(sc_name)
+            if not sc:
+                continue
+            annotations.pop("_provision_at")
+            try:
+                self._provision(pvc, sc)
+            except FakeCommandError as e:
+                self._add_event(
+                    pvc, "ProvisioningFailed", e.err, event_type="Warning")
+
+    def _provision(self, pvc, sc):
+        size = _size_to_gib(
+            pvc["spec"]["resources"]["requests"]["storage"])
+        pv_name = "pvc-%s" % pvc["metadata"]["uid"]
+        prefix = sc.get("parameters", {}).get("volumenameprefix")
+        name = "%s_%s_%s_%s" % (
+            prefix, self.namespace, pvc["metadata"]["name"],
+            utils.get_random_str(8)) if prefix else None
+        pv = {
+            "kind": "PersistentVolume",
+            "metadata": {"name": pv_name, "annotations": {}},
+            "spec": {
+                "capacity": {"storage": "%sGi" % size},
+                "accessModes": pvc["spec"].get("accessModes", []),
+                "claimRef": {
+                    "kind": "PersistentVolumeClaim",
+                    "name": pvc["metadata"]["name"],
+                    "namespace": self.namespace,
+                    "uid": pvc["metadata"]["uid"]},
+                "persistentVolumeReclaimPolicy": sc.get(
+                    "reclaimPolicy", "Delete"),
+                "storageClassName": sc["metadata"]["name"],
+            },
+            "status": {"phase": "Bound"},
+        }
+        if sc.get("provisioner", "").startswith(BLOCK_PROVISIONER):
+            block_volume = self._heketi_create_block_volume(size, name=name)
+            pv["metadata"]["annotations"].update({
+                "gluster.org/volume-id": block_volume["id"],
+                "glusterBlockShare": block_volume["blockhostingvolumename"],
+                "gluster.org/type": "block",
+            })
+            pv["spec"]["iscsi"] = {
+                "iqn": block_volume["blockvolume"]["iqn"], "lun": 0,
+                "targetPortal": block_volume["blockvolume"]["hosts"][0],
+                "portals": block_volume["blockvolume"]["hosts"][1:],
+            }
+        elif sc.get("provisioner") == FILE_PROVISIONER:
+            volume = self._heketi_create_volume(size, name=name)
+            pv["metadata"]["annotations"].update({
+                "gluster.kubernetes.io/heketi-volume-id": volume["id"],
+                "gluster.org/type": "file",
+            })
+            pv["spec"]["glusterfs"] = {
+                "endpoints": "glusterfs-dynamic-%s" % pvc["metadata"]["uid"],
+                "path": volume["name"],
+            }
+        else:
+            return
+        self._add_object(pv)
+        pvc["spec"]["volumeName"] = pv_name
+        pvc["status"] = {
+            "phase": "Bound", "accessModes": pv["spec"]["accessModes"],
+            "capacity": {"storage": "%sGi" % size}}
+        self._add_event(pvc, "ProvisioningSucceeded", "Successfully "
+                        "provisioned volume %s" % pv_name)
+
+    def _heketi_create_volume(self, size, name=None, block=False):
+        nodes = sorted(
+            self.heketi_nodes.values(),
+            key=lambda node: -node["devices"][0]["storage"]["free"])[:3]
+        if (len(nodes) < 3 or nodes[-1]["devices"][0]["storage"]["free"]
+                < size * KIB_IN_GIB):
+            raise FakeCommandError("Error: No space", ret=255)
+        volume_id = _new_id()
+        name = name or "vol_%s" % volume_id
+        hosts = [node["hostnames"]["storage"][0] for node in nodes]
+        volume = {
+            "size": size, "name": name, "id": volume_id,
+            "cluster": self.heketi_cluster_id,
+            "durability": {"type": "replicate", "replicate": {"replica": 3},
+                           "disperse": {}},
+            "gid": 0, "glustervolumeoptions": [""],
+            "snapshot": {"enable": True, "factor": 1},
+            "mount": {"glusterfs": {
+                "hosts": hosts, "device": "%s:%s" % (hosts[0], name),
+                "options": {"backup-volfile-servers": ",".join(hosts[1:])}}},
+            "blockinfo": {} if not block else {
+                "freesize": size, "reservedsize": 0, "blockvolume": []},
+            "block": block,
+            "bricks": [],
+        }
+        for node in nodes:
+            device = node["devices"][0]
+            brick_id = _new_id()
+            brick = {
+                "id": brick_id, "device": device["id"], "node": node["id"],
+                "volume": volume_id, "size": size * KIB_IN_GIB,
+                "path": "/var/lib/heketi/mounts/vg_%s/brick_%s/brick" % (
+                    device["id"], brick_id),
+            }
+            device["storage"]["free"] -= brick["size"]
+            device["storage"]["used"] += brick["size"]
+            device["bricks"].append(brick)
+            volume["bricks"].append(brick)
+        self.heketi_volumes[volume_id] = volume
+        return volume
+
+    def _heketi_delete_volume(self, volume_id):
+        volume = self.heketi_volumes.get(volume_id)
+        if volume is None:
+            raise FakeCommandError("Error: Id not found", ret=255)
+        if volume["blockinfo"].get("blockvolume"):
+            raise FakeCommandError(
+                "Error: Cannot delete a block hosting volume containing "
+                "block volumes", ret=255)
+        del self.heketi_volumes[volume_id]
+        for brick in volume["bricks"]:
+            device = self.heketi_nodes[brick["node"]]["devices"][0]
+            device["storage"]["free"] += brick["size"]
+            device["storage"]["used"] -= brick["size"]
+            device["bricks"] = [
+                b for b in device["bricks"] if b["id"] != brick["id"]]
+
+    def _heketi_create_block_volume(self, size, name=None):
+        bhv = next((
+            v for v in self.heketi_volumes.values()
+            if v["block"] and v["blockinfo"]["freesize"] >= size), None)
+        if bhv is None:
+            bhv = self._heketi_create_volume(
+                max(size, 100), block=True)
+        volume_id = _new_id()
+        hosts = bhv["mount"]["glusterfs"]["hosts"]
+        block_volume = {
+            "size": size, "name": name or "blockvol_%s" % volume_id,
+            "id": volume_id, "cluster": self.heketi_cluster_id,
+            "blockhostingvolume": bhv["id"],
+            "blockhostingvolumename": bhv["name"],
+            "hacount": 3, "usernamepassword": False,
+            "blockvolume": {
+                "hosts": hosts, "iqn": "iqn.2016-12.org.gluster-block:%s" % (
+                    uuid.uuid4()),
+                "lun": 0, "username": "", "password": ""},
+        }
+        bhv["blockinfo"]["freesize"] -= size
+        bhv["blockinfo"]["blockvolume"].append(volume_id)
+        self.heketi_block_volumes[volume_id] = block_volume
+        return block_volume
+
+    def _heketi_delete_block_volume(self, volume_id):
+        block_volume = self.heketi_block_volumes.pop(volume_id, None)
+        if block_volume is None:
+            raise FakeCommandError("Error: Id not found", ret=255)
+        bhv = self.heketi_volumes[block_volume["blockhostingvolume"]]
+        bhv["blockinfo"]["freesize"] += block_volume["size"]
+        bhv["blockinfo"]["blockvolume"].remove(volume_id)
+
+    # Commands processing
+
+    def get_latency(self, cmd):
+        family = command_stats.get_command_family(cmd)
+        while family:
+            if family in self.latency:
+                return self.latency[family]
+            family = family.rpartition(" ")[0]
+        return self.latency.get("default", 0)
+
+    def run(self, host, cmd, user=None):
+        """Run command in the simulated cluster.
+
+        Args:
+            host (str): host where command is expected to run. Ignored.
+            cmd (str|list): shell command.
+            user (str): user to run command as. Ignored.
+        Returns:
+            tuple: return code, stdout and stderr of the command.
+        """
+        if not isinstance(cmd, six.string_types):
+            cmd = " ".join(cmd)
+        latency = self.get_latency(cmd)
+        if latency:
+            time.sleep(latency)
+        try:
+            with self._lock:
+                self._reconcile()
+                out = self._run(cmd.strip())
+        except FakeCommandError as e:
+            return e.ret, "", e.err + "\n"
+        return 0, out, ""
+
+    def _run(self, cmd):
+        match = _ECHO_CREATE_RE.match(cmd)
+        if match:
+            return self._oc_create(yaml.safe_load(match.group(1)))
+        for version_re, version_key in _VERSION_CMDS:
+            if version_re.match(cmd):
+                return self.versions[version_key] + "\n"
+        try:
+            args = shlex.split(cmd)
+        except ValueError as e:
+            raise FakeCommandError("Failed to parse command: %s" % e)
+        if args[:1] == ["timeout"]:
+            args = args[2:]
+        if set(args) & set(("|", "||", "&&", ";", ">", "<")):
+            raise FakeCommandError(
+                "fake cluster: unsupported shell construction in '%s'" % cmd,
+                ret=127)
+        program = args[0] if args else ""
+        handler = {
+            "oc": self._oc, "heketi-cli": self._heketi_cli,
+            "gluster": self._gluster, "gluster-block": self._gluster_block,
+        }.get(program)
+        if handler is None:
+            raise FakeCommandError(
+                "fake cluster: %s: command not found" % program, ret=127)
+        return handler(args[1:])
+
+    @staticmethod
+    def _parse_args(args, value_options=()):
+        """Split args to positional ones and dict of options."""
+        positional, options, args = [], {}, list(args)
+        while args:
+            arg = args.pop(0)
+            if arg == "--":
+                positional.append(arg)
+                positional.extend(args)
+                break
+            if not arg.startswith("-"):
+                positional.append(arg)
+                continue
+            if re.match(r"^-o\w", arg):
+                arg = "-o=" + arg[2:]
+            key, sep, value = arg.partition("=")
+            key = key.lstrip("-")
+            if sep:
+                options[key] = value
+            elif key in value_options and args:
+                options[key] = args.pop(0)
+            else:
+                options[key] = True
+        return positional, options
+
+    def _oc(self, args):
+        if args[:1] in (["exec"], ["rsh"]):
+            # NOTE: options of the command run in POD must not be parsed
+            args = args[1:]
+            while args and args[0].startswith("-"):
+                args = args[2:] if args[0] in ("-c", "--container") else (
+                    args[1:])
+            pod_name, cmd = args[0], args[1:]
+            if pod_name not in self.objects["Pod"]:
+                raise FakeCommandError(
+                    'Error from server (NotFound): pods "%s" not '
+                    'found' % pod_name)
+            if cmd[:1] == ["--"]:
+                cmd = cmd[1:]
+            return self._run(" ".join(
+                six.moves.shlex_quote(arg) for arg in cmd))
+
+        positional, options = self._parse_args(args, (
+            "o", "output", "l", "selector", "f", "n", "namespace", "c",
+            "container", "replicas", "field-selector"))
+        action = positional[0] if positional else ""
+        if action == "get":
+            return self._oc_get(positional[1:], options)
+        if action == "create":
+            try:
+                with open(options["f"]) as f:
+                    data = yaml.safe_load(f)
+            except (IOError, OSError, KeyError) as e:
+                raise FakeCommandError("error: %s" % e)
+            return self._oc_create(data)
+        if action == "delete":
+            kind = self._get_kind(positional[1])
+            for name in positional[2:]:
+                self._delete_object(kind, name)
+            return "".join(
+                '%s "%s" deleted\n' % (positional[1], name)
+                for name in positional[2:])
+        if action == "project" and options.get("q"):
+            return "%s\n" % self.namespace
+        if action == "scale":
+            dc = self.objects["DeploymentConfig"].get(positional[2])
+            if dc is None:
+                raise FakeCommandError(
+                    'Error from server (NotFound): deploymentconfigs "%s" '
+                    'not found' % positional[2])
+            self._scale_dc(dc, int(options["replicas"]))
+            return 'deploymentconfig "%s" scaled\n' % positional[2]
+        raise FakeCommandError(
+            "fake cluster: unsupported 'oc %s' command" % action, ret=127)
+
+    @staticmethod
+    def _get_kind(rtype):
+        kind = KINDS.get(rtype.lower().split(".")[0])
+        if kind is None:
+            raise FakeCommandError(
+                'error: the server doesn\'t have a resource type "%s"' % (
+                    rtype))
+        return kind
+
+    def _oc_create(self, data):
+        items = data.get("items", []) if data.get("kind") == "List" else [
+            data]
+        return "".join(
+            '%s "%s" created\n' % (
+                obj["kind"].lower(), obj["metadata"]["name"])
+            for obj in [self._add_object(item) for item in items])
+
+    def _oc_get(self, positional, options):
+        kinds = [self._get_kind(rtype) for rtype in positional[0].split(",")]
+        kind, names = kinds[0], positional[1:]
+        if names and len(kinds) > 1:
+            raise FakeCommandError(
+                "error: there is no need to specify a resource type as a "
+                "separate argument when passing arguments in resource/name "
+                "form")
+        if names:
+            missing = [n for n in names if n not in self.objects[kind]]
+            if missing:
+                raise FakeCommandError(
+                    'Error from server (NotFound): %s "%s" not found' % (
+                        positional[0], missing[0]))
+            objects = [self.objects[kind][name] for name in names]
+        else:
+            objects = sorted(
+                (obj for kind in kinds for obj in self.objects[kind].values()
+                 if utils.match_label_selector(
+                     obj["metadata"]["labels"],
+                     options.get("selector", options.get("l")))),
+                key=lambda obj: (obj["kind"], obj["metadata"]["name"]))
+        for field_selector in filter(None, options.get(
+                "field-selector", "").split(",")):
+            path, _, value = field_selector.partition("=")
+            objects = [
+                obj for obj in objects
+                if utils.format_json_path_value(
+                    utils.get_by_json_path(obj, "." + path)) == value]
+
+        output = options.get("o", options.get("output", ""))
+        no_headers = options.get("no-headers") in (True, "true")
+        if output in ("yaml", "json"):
+            data = (copy.deepcopy(objects[0]) if len(names) == 1 else {
+                "kind": "List", "apiVersion": "v1",
+                "items": copy.deepcopy(objects)})
+            for obj in data.get("items", [data]):
+                obj["metadata"].get("annotations", {}).pop(
+                    "_provision_at", None)
+            if output == "json":
+                return json.dumps(data, indent=4) + "\n"
+            return yaml.safe_dump(data, default_flow_style=False)
+        if output == "name":
+            return "".join(
+                "%s/%s\n" % (obj["kind"].lower(), obj["metadata"]["name"])
+                for obj in objects)
+        if output.startswith("custom-columns="):
+            columns = [
+                column.partition(":")
+                for column in output[len("custom-columns="):].split(",")]
+            rows = [] if no_headers else [
+                [header or "" for header, _, _ in columns]]
+            rows.extend(
+                [utils.format_json_path_value(
+                    utils.get_by_json_path(obj, path))
+                 for _, _, path in columns] for obj in objects)
+        elif output == "wide" and kind == "Pod":
+            rows = [] if no_headers else [[
+                "NAME", "READY", "STATUS", "RESTARTS", "AGE", "IP", "NODE"]]
+            rows.extend([
+                pod["metadata"]["name"], "1/1", pod["status"]["phase"],
+                six.text_type(pod["status"]["containerStatuses"][0][
+                    "restartCount"]),
+                "1d", pod["status"]["podIP"], pod["spec"]["nodeName"],
+            ] for pod in objects)
+        elif not output:
+            rows = [] if no_headers else [["NAME"]]
+            rows.extend([obj["metadata"]["name"]] for obj in objects)
+        else:
+            raise FakeCommandError(
+                "fake cluster: unsupported output format '%s'" % output,
+                ret=127)
+        if not rows:
+            return ""
+        widths = [max(len(row[i]) for row in rows) + 3
+                  for i in range(len(rows[0]))]
+        return "".join(
+            "".join(value.ljust(width) for value, width in zip(
+                row, widths)).rstrip() + "\n" for row in rows)
+
+    def _heketi_cli(self, args):
+        positional, options = self._parse_args(args, (
+            "s", "server", "user", "secret", "size", "name", "clusters",
+            "replica", "durability", "gid", "ha", "persistent-volume-file",
+            "gluster-volume-options", "snapshot-factor", "disperse-data",
+            "redundancy", "expand-size"))
+        as_json = options.get("json") is True
+        resource, action = (positional + ["", ""])[:2]
+        if resource == "volume" and action == "create":
+            volume = self._heketi_create_volume(
+                int(options["size"]), name=options.get("name"),
+                block=options.get("block") is True)
+            return self._format_heketi_volume(volume, as_json)
+        if resource == "volume" and action == "info":
+            volume = self.heketi_volumes.get(positional[2])
+            if volume is None:
+                raise FakeCommandError("Error: Id not found", ret=255)
+            return self._format_heketi_volume(volume, as_json)
+        if resource == "volume" and action == "delete":
+            self._heketi_delete_volume(positional[2])
+            return "Volume %s deleted\n" % positional[2]
+        if resource == "volume" and action == "list":
+            if as_json:
+                return json.dumps(
+                    {"volumes": sorted(self.heketi_volumes)}) + "\n"
+            return "".join(
+                "Id:%s    Cluster:%s    Name:%s%s\n" % (
+                    v["id"], v["cluster"], v["name"],
+                    " [block]" if v["block"] else "")
+                for v in sorted(self.heketi_volumes.values(),
+                                key=lambda v: v["id"]))
+        if resource == "blockvolume" and action == "create":
+            block_volume = self._heketi_create_block_volume(
+                int(options["size"]), name=options.get("name"))
+            return self._format_heketi_block_volume(block_volume, as_json)
+        if resource == "blockvolume" and action == "info":
+            block_volume = self.heketi_block_volumes.get(positional[2])
+            if block_volume is None:
+                raise FakeCommandError("Error: Id not found", ret=255)
+            return self._format_heketi_block_volume(block_volume, as_json)
+        if resource == "blockvolume" and action == "delete":
+            self._heketi_delete_block_volume(positional[2])
+            return "Volume %s deleted\n" % positional[2]
+        if resource == "blockvolume" and action == "list":
+            if as_json:
+                return json.dumps(
+                    {"blockvolumes": sorted(self.heketi_block_volumes)}
+                ) + "\n"
+            return "".join(
+                "Id:%s    Cluster:%s    Name:%s\n" % (
+                    v["id"], v["cluster"], v["name"])
+                for v in sorted(self.heketi_block_volumes.values(),
+                                key=lambda v: v["id"]))
+        if resource == "node" and action == "list":
+            return "".join(
+                "Id:%s\tCluster:%s\n" % (node_id, self.heketi_cluster_id)
+                for node_id in sorted(self.heketi_nodes))
+        if resource == "node" and action == "info":
+            node = self.heketi_nodes.get(positional[2])
+            if node is None:
+                raise FakeCommandError("Error: Id not found", ret=255)
+            return json.dumps(node) + "\n"
+        if resource == "cluster" and action == "list":
+            if as_json:
+                return json.dumps({"clusters": [self.heketi_cluster_id]})
+            return "Clusters:\nId:%s [file][block]\n" % (
+                self.heketi_cluster_id)
+        if resource == "topology" and action == "info":
+            return json.dumps({"clusters": [{
+                "id": self.heketi_cluster_id, "file": True, "block": True,
+                "volumes": list(self.heketi_volumes.values()),
+                "blockvolumes": sorted(self.heketi_block_volumes),
+                "nodes": list(self.heketi_nodes.values()),
+            }]}) + "\n"
+        if resource == "db" and action == "check":
+            report = {
+                key: {"total": len(items), "found": len(items),
+                      "inconsistencies": []}
+                for key, items in (
+                    ("clusters", [self.heketi_cluster_id]),
+                    ("nodes", self.heketi_nodes),
+                    ("volumes", self.heketi_volumes),
+                    ("blockvolumes", self.heketi_block_volumes))}
+            report["totalinconsistencies"] = 0
+            return json.dumps(report) + "\n"
+        raise FakeCommandError(
+            "fake cluster: unsupported 'heketi-cli %s %s' command" % (
+                resource, action), ret=127)
+
+    @staticmethod
+    def _format_heketi_volume(volume, as_json):
+        if as_json:
+            return json.dumps(volume) + "\n"
+        mount = volume["mount"]["glusterfs"]
+        return (
+            "Name: %s\nSize: %s\nVolume Id: %s\nCluster Id: %s\n"
+            "Mount: %s\nMount Options: backup-volfile-servers=%s\n"
+            "Block: %s\nFree Size: %s\nReserved Size: 0\n"
+            "Block Volumes: %s\nDurability Type: replicate\n"
+            "Distribute Count: 1\nReplica Count: 3\n" % (
+                volume["name"], volume["size"], volume["id"],
+                volume["cluster"], mount["device"],
+                mount["options"]["backup-volfile-servers"],
+                "true" if volume["block"] else "false",
+                volume["blockinfo"].get("freesize", 0),
+                volume["blockinfo"].get("blockvolume", [])))
+
+    @staticmethod
+    def _format_heketi_block_volume(block_volume, as_json):
+        if as_json:
+            return json.dumps(block_volume) + "\n"
+        return (
+            "Name: %s\nSize: %s\nVolume Id: %s\nCluster Id: %s\n"
+            "Hosts: %s\nIQN: %s\nLUN: 0\nHacount: 3\nUsername: \n"
+            "Password: \nBlock Hosting Volume: %s\n" % (
+                block_volume["name"], block_volume["size"],
+                block_volume["id"], block_volume["cluster"],
+                block_volume["blockvolume"]["hosts"],
+                block_volume["blockvolume"]["iqn"],
+                block_volume["blockhostingvolume"]))
+
+    def _gluster(self, args):
+        positional, options = self._parse_args(args, ("mode", ))
+        volumes = {v["name"]: v for v in self.heketi_volumes.values()}
+        if positional[:2] == ["volume", "list"]:
+            return "".join("%s\n" % name for name in sorted(volumes))
+        if positional[:2] == ["volume", "info"] and "xml" not in options:
+            names = positional[2:] or sorted(volumes)
+            if names[0] != "all" and names[0] not in volumes:
+                raise FakeCommandError(
+                    "Volume %s does not exist" % names[0])
+            infos = []
+            for name in (sorted(volumes) if names[0] == "all" else names):
+                bricks = "".join(
+                    "Brick%s: %s:%s\n" % (
+                        index + 1, self.heketi_nodes[brick["node"]][
+                            "hostnames"]["storage"][0], brick["path"])
+                    for index, brick in enumerate(volumes[name]["bricks"]))
+                infos.append(
+                    "\nVolume Name: %s\nType: Replicate\nVolume ID: %s\n"
+                    "Status: Started\nSnapshot Count: 0\n"
+                    "Number of Bricks: 1 x 3 = 3\nTransport-type: tcp\n"
+                    "Bricks:\n%sOptions Reconfigured:\n"
+                    "performance.client-io-threads: off\n" % (
+                        name, uuid.UUID(volumes[name]["id"]), bricks))
+            return "".join(infos)
+        raise FakeCommandError(
+            "fake cluster: unsupported 'gluster %s' command" % (
+                " ".join(positional[:2])), ret=127)
+
+    def _gluster_block(self, args):
+        positional, options = self._parse_args(args)
+        if positional[:1] == ["list"]:
+            names = sorted(
+                v["name"] for v in self.heketi_block_volumes.values()
+                if v["blockhostingvolumename"] == positional[1])
+            if "json" in options:
+                return json.dumps(
+                    {"blocks": names, "RESULT": "SUCCESS"}) + "\n"
+            return "".join("%s\n" % name for name in names)
+        raise FakeCommandError(
+            "fake cluster: unsupported 'gluster-block %s' command" % (
+                " ".join(positional[:1])), ret=127)
+
+
+def install(cluster=None):
+    """Route commands of patched Glusto to the fake cluster.
+
+    Args:
+        cluster (FakeCluster|None): cluster to be used. New one with
+            default parameters is created if not provided.
+    Returns:
+        FakeCluster: installed cluster.
+    """
+    cluster = cluster or FakeCluster()
+    g._command_backend = cluster
+    g.log.info("Commands are routed to the fake cluster.")
+    return cluster
+
+
+def uninstall():
+    """Route commands of patched Glusto back to the real hosts."""
+    g._command_backend = None
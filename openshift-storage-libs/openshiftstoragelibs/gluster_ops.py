@@ -18,6 +18,7 @@ from glustolibs.gluster.volume_ops import (
     volume_stop,
 )
 
+from openshiftstoragelibs import command
 from openshiftstoragelibs import exceptions
 from openshiftstoragelibs.heketi_ops import heketi_blockvolume_info
 from openshiftstoragelibs.openshift_ops import cmd_run_on_gluster_pod_or_node
@@ -84,6 +85,25 @@ def get_gluster_vol_hosting_nodes(file_vol):
     return g_nodes
 
 
+def _wait_for_brick_process_be_killed(ocp_client_node, gluster_node, pid,
+                                      timeout=60, wait_step=2):
+    killed_pid_cmd = "ps -eaf | grep %s | grep -v grep | awk '{print $2}'"
+    for w in waiter.Waiter(timeout=timeout, interval=wait_step):
+        result = cmd_run_on_gluster_pod_or_node(
+            ocp_client_node, killed_pid_cmd, gluster_node)
+        if result.strip() == pid:
+            continue
+        g.log.info("Brick process '%s' was killed successfully on '%s'" % (
+            pid, gluster_node))
+        break
+    if w.expired:
+        error_msg = ("Process ID '%s' still exists on '%s' after waiting "
+                     "for it %s seconds to get killed." % (
+                         pid, gluster_node, timeout))
+        g.log.error(error_msg)
+        raise exceptions.ExecutionError(error_msg)
+
+
 @podcmd.GlustoPod()
 def restart_gluster_vol_brick_processes(ocp_client_node, file_vol,
                                         gluster_nodes):
@@ -121,28 +141,16 @@ def restart_gluster_vol_brick_processes(ocp_client_node, file_vol,
         pids.append((gluster_node, pid))
 
     # Restart Gluster vol brick processes using found PIDs
-    for gluster_node, pid in pids:
-        cmd = "kill -9 %s" % pid
-        cmd_run_on_gluster_pod_or_node(ocp_client_node, cmd, gluster_node)
+    command.run_in_parallel(
+        lambda gluster_node, pid: cmd_run_on_gluster_pod_or_node(
+            ocp_client_node, "kill -9 %s" % pid, gluster_node),
+        pids)
 
     # Wait for Gluster vol brick processes to be recreated
-    for gluster_node, pid in pids:
-        killed_pid_cmd = "ps -eaf | grep %s | grep -v grep | awk '{print $2}'"
-        _waiter = waiter.Waiter(timeout=60, interval=2)
-        for w in _waiter:
-            result = cmd_run_on_gluster_pod_or_node(
-                ocp_client_node, killed_pid_cmd, gluster_node)
-            if result.strip() == pid:
-                continue
-            g.log.info("Brick process '%s' was killed successfully on '%s'" % (
-                pid, gluster_node))
-            break
-        if w.expired:
-            error_msg = ("Process ID '%s' still exists on '%s' after waiting "
-                         "for it 60 seconds to get killed." % (
-                             pid, gluster_node))
-            g.log.error(error_msg)
-            raise exceptions.ExecutionError(error_msg)
+    command.run_in_parallel(
+        lambda gluster_node, pid: _wait_for_brick_process_be_killed(
+            ocp_client_node, gluster_node, pid),
+        pids)
 
     # Start volume after gluster vol brick processes recreation
     ret, out, err = volume_start(
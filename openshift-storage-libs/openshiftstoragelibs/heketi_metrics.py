@@ -0,0 +1,242 @@
+"""
+Use this module for sampling Heketi metrics in background.
+
+'HeketiMetricsSampler' scrapes Heketi metrics at fixed interval in
+separate thread and keeps time series of the Heketi state, such as
+free and used space of devices, amounts of clusters, nodes, devices,
+volumes and bricks. It allows to correlate latency of the provisioning
+with the Heketi state without scraping metrics in test bodies.
+
+Series are stored compactly: new point is added only when value of the
+series changes, so values between points are the same as of the
+previous point.
+
+Usage example:
+
+    from openshiftstoragelibs import heketi_metrics
+
+    with heketi_metrics.HeketiMetricsSampler(h_node, h_url) as sampler:
+        create_pvcs(...)
+    sampler.get_delta('heketi_volumes_count')
+    # 10
+    sampler.get_rate('heketi_device_used', hostname='node1')
+    # 1048576.0
+
+Set 'common.heketi_metrics_sampling_interval' config option to the
+amount of seconds to make each test case, based on the 'BaseClass',
+sample metrics using 'self.heketi_metrics_sampler' object.
+"""
+
+import bisect
+import threading
+import time
+
+from glusto.core import Glusto as g
+
+from openshiftstoragelibs import command
+from openshiftstoragelibs import heketi_ops
+
+
+HEKETI_METRICS_SAMPLING_INTERVAL = g.config.get("common", {}).get(
+    "heketi_metrics_sampling_interval", 0)
+SAMPLED_METRICS = (
+    "heketi_cluster_count",
+    "heketi_nodes_count",
+    "heketi_device_count",
+    "heketi_volumes_count",
+    "heketi_device_brick_count",
+    "heketi_device_size",
+    "heketi_device_free",
+    "heketi_device_used",
+)
+
+
+class HeketiMetricsSampler(object):
+    """Thread scraping Heketi metrics at fixed interval."""
+
+    def __init__(self, heketi_client_node, heketi_server_url, interval=None,
+                 metrics=SAMPLED_METRICS):
+        """Args:
+            heketi_client_node (str): node where metrics are scraped from.
+            heketi_server_url (str): Heketi server URL.
+            interval (float|None): seconds between scrapes. Defaults to the
+                'common.heketi_metrics_sampling_interval' config option or
+                to 10 seconds if it is not set.
+            metrics (iterable): names of the metrics to be stored.
+        """
+        self.heketi_client_node = heketi_client_node
+        self.heketi_server_url = heketi_server_url
+        self.interval = float(
+            interval or HEKETI_METRICS_SAMPLING_INTERVAL or 10)
+        self.metrics = tuple(metrics)
+        self.samples, self.errors = 0, 0
+        self.first_sampled_at = self.sampled_at = None
+        # {(metric, ((label, value), ...)): ([timestamps], [values])}
+        self._series = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __repr__(self):
+        return "HeketiMetricsSampler(%s, %s samples)" % (
+            self.heketi_server_url, self.samples)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        """Start sampling in background thread."""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="heketi-metrics-sampler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling taking the last sample."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        if self.samples:
+            self.sample()
+
+    def _run(self):
+        # NOTE: test body may patch shared 'g.run' using 'podcmd.GlustoPod'
+        with command.direct_run():
+            self._sample_periodically()
+
+    def _sample_periodically(self):
+        while not self._stop_event.is_set():
+            try:
+                self.sample()
+            except NotImplementedError as e:
+                g.log.info("Stopping sampling of Heketi metrics: %s" % e)
+                return
+            except Exception as e:
+                self.errors += 1
+                g.log.error("Failed to sample Heketi metrics: %s" % e)
+            self._stop_event.wait(self.interval)
+
+    def sample(self):
+        """Scrape Heketi metrics and store values of the sampled ones."""
+        metrics = heketi_ops.get_heketi_metrics(
+            self.heketi_client_node, self.heketi_server_url)
+        now = time.time()
+        with self._lock:
+            for metric in self.metrics:
+                data = metrics.get(metric)
+                if data is None:
+                    continue
+                if not isinstance(data, list):
+                    data = [{"value": data}]
+                for labels in data:
+                    labels = dict(labels)
+                    value = labels.pop("value")
+                    key = (metric, tuple(sorted(labels.items())))
+                    times, values = self._series.setdefault(key, ([], []))
+                    if not values or values[-1] != value:
+                        times.append(now)
+                        values.append(value)
+            self.samples += 1
+            self.sampled_at = now
+            if self.first_sampled_at is None:
+                self.first_sampled_at = now
+
+    def _get_matching_series(self, metric, labels):
+        return [
+            (series_labels, series)
+            for (name, series_labels), series in self._series.items()
+            if name == metric and all(
+                dict(series_labels).get(k) == v for k, v in labels.items())]
+
+    def get_series(self, metric, **labels):
+        """Get stored points of the series.
+
+        Args:
+            metric (str): metric name, e.g. 'heketi_device_free'.
+            labels: label values which series should have,
+                e.g. hostname='node1'.
+        Returns:
+            dict: lists of (timestamp, value) tuples with tuples of
+                (label, value) tuples as keys.
+        """
+        with self._lock:
+            return {
+                series_labels: list(zip(*series))
+                for series_labels, series in self._get_matching_series(
+                    metric, labels)}
+
+    def get_value(self, metric, at=None, **labels):
+        """Get sum of values of the matching series at the given time.
+
+        Args:
+            metric (str): metric name.
+            at (float|None): timestamp. Time of the last sample if None.
+            labels: label values which series should have.
+        Returns:
+            float|None: sum of values or None if nothing was sampled
+                before the given time.
+        """
+        at = self.sampled_at if at is None else at
+        result = None
+        if at is None:
+            return result
+        with self._lock:
+            for _, (times, values) in self._get_matching_series(
+                    metric, labels):
+                index = bisect.bisect_right(times, at) - 1
+                if index >= 0:
+                    result = (result or 0) + values[index]
+        return result
+
+    def get_delta(self, metric, start=None, end=None, **labels):
+        """Get change of the metric value within the time range.
+
+        Args:
+            metric (str): metric name.
+            start (float|None): timestamp. Time of the first sample if None.
+            end (float|None): timestamp. Time of the last sample if None.
+            labels: label values which series should have.
+        Returns:
+            float|None: difference of values or None if there is no data.
+        """
+        start = self.first_sampled_at if start is None else start
+        start_value = self.get_value(metric, at=start, **labels)
+        end_value = self.get_value(metric, at=end, **labels)
+        if start_value is None or end_value is None:
+            return None
+        return end_value - start_value
+
+    def get_rate(self, metric, start=None, end=None, **labels):
+        """Get average per second change of the metric within time range.
+
+        Args are the same as of the 'get_delta' method.
+
+        Returns:
+            float|None: rate of change or None if there is no data or
+                time range is empty.
+        """
+        start = self.first_sampled_at if start is None else start
+        end = self.sampled_at if end is None else end
+        delta = self.get_delta(metric, start=start, end=end, **labels)
+        if delta is None or start is None or end is None or end <= start:
+            return None
+        return delta / float(end - start)
+
+    def get_summary(self):
+        """Get deltas of all the sampled metrics summed over their labels.
+
+        Returns:
+            dict: deltas with metric names as keys.
+        """
+        with self._lock:
+            metrics = set(metric for metric, _ in self._series)
+        return {metric: self.get_delta(metric) for metric in metrics}
@@ -5,15 +5,21 @@ except ImportError:
     # py2
     import json
 
+from collections import namedtuple
 import re
+import threading
 import time
 
 from glusto.core import Glusto as g
-import six
 
 from openshiftstoragelibs import command
+from openshiftstoragelibs import command_stats
 from openshiftstoragelibs import exceptions
+from openshiftstoragelibs import heketi_rest
+from openshiftstoragelibs import heketi_topology
 from openshiftstoragelibs import heketi_version
+from openshiftstoragelibs import pod_session
+from openshiftstoragelibs import retry
 from openshiftstoragelibs.utils import parse_prometheus_data
 from openshiftstoragelibs import waiter
 
@@ -23,54 +29,196 @@ HEKETI_DC = g.config.get("cns", g.config.get("openshift"))[
 HEKETI_COMMAND_TIMEOUT = g.config.get("common", {}).get(
     "heketi_command_timeout", 120)
 MASTER_NODE = list(g.config["ocp_servers"]["master"].keys())[0]
+# NOTE: Heketi runs 8 operations at the same time by default
+HEKETI_BULK_WORKERS = g.config.get("common", {}).get(
+    "heketi_bulk_workers", 8)
 
 HEKETI_BHV = re.compile(r"Id:(\S+)\s+Cluster:(\S+)\s+Name:(\S+)\s\[block\]")
 HEKETI_OPERATIONS = re.compile(r"Id:(\S+)\s+Type:(\S+)\s+Status:(\S+)")
 HEKETI_NODES = re.compile(r"Id:(\S+)\s+Cluster:(\S+)")
+HEKETI_VOLUME_LIST_ROW = re.compile(
+    r"^Id:(\S+)\s+Cluster:(\S+)\s+Name:(\S+)([ \t]+\[block\])?", re.M)
 
-GET_HEKETI_PODNAME_CMD = (
-    "oc get pods -l deploymentconfig=%s -o=custom-columns=:.metadata.name "
-    "--no-headers" % HEKETI_DC)
+HeketiBulkResult = namedtuple(
+    'HeketiBulkResult', 'spec result error duration')
+
+GET_HEKETI_PODS_CMD = (
+    "oc get pods -l deploymentconfig=%s --no-headers -o=custom-columns="
+    ":.metadata.name,:.status.containerStatuses[0].ready,"
+    ":.metadata.deletionTimestamp" % HEKETI_DC)
 TIMEOUT_PREFIX = "timeout %s " % HEKETI_COMMAND_TIMEOUT
+# Last words of the families of Heketi commands, which do not change state
+READ_ONLY_HEKETI_ACTIONS = (
+    "info", "list", "metrics", "dump", "check", "operations", "state")
+HEKETI_POD_CACHE_TTL = g.config.get("common", {}).get(
+    "heketi_pod_cache_ttl", 60)
+
+_HEKETI_PODS_CACHE = {"cached_at": 0, "pods": [], "index": 0}
+_HEKETI_PODS_LOCK = threading.Lock()
+
+
+def _get_heketi_pods():
+    """Get names of the ready Heketi PODs.
+
+    PODs which are being deleted are skipped. If none of the PODs is
+    ready, then all the rest of them are returned.
+    """
+    out = command.cmd_run(cmd=GET_HEKETI_PODS_CMD, hostname=MASTER_NODE)
+    pods, ready_pods = [], []
+    for line in out.splitlines():
+        columns = line.split()
+        if not columns or (len(columns) > 2 and columns[2] != "<none>"):
+            continue
+        pods.append(columns[0])
+        if len(columns) > 1 and columns[1] == "true":
+            ready_pods.append(columns[0])
+    assert pods, (
+        "Heketi POD not found on '%s' node using following command: \n%s" % (
+            MASTER_NODE, GET_HEKETI_PODS_CMD))
+    return ready_pods or pods
+
+
+def _get_heketi_podname(use_cache=False):
+    """Get name of the Heketi POD.
+
+    If several Heketi PODs are ready, then they are picked in turn.
+
+    Args:
+        use_cache (bool): defines whether PODs found less than
+            'common.heketi_pod_cache_ttl' seconds ago can be used
+            instead of querying the cluster.
+    Returns:
+        str: name of the Heketi POD.
+    """
+    with _HEKETI_PODS_LOCK:
+        cache = _HEKETI_PODS_CACHE
+        if not (use_cache and HEKETI_POD_CACHE_TTL and cache["pods"]
+                and time.time() - cache["cached_at"] < HEKETI_POD_CACHE_TTL):
+            cache["pods"], cache["cached_at"] = _get_heketi_pods(), time.time()
+        heketi_podname = cache["pods"][cache["index"] % len(cache["pods"])]
+        cache["index"] += 1
+    return heketi_podname
+
+
+def invalidate_heketi_pod_cache():
+    """Drop cached Heketi POD names.
+
+    Should be called when Heketi PODs may get changed, for example,
+    on POD restarts and scaling of the Heketi DC.
+    """
+    with _HEKETI_PODS_LOCK:
+        _HEKETI_PODS_CACHE["pods"] = []
+
+
+def _is_heketi_pod_gone_error(err, heketi_podname):
+    err = err or ''
+    return "not found" in err.lower() and (
+        heketi_podname in err or "container not found" in err)
 
 
 def cmd_run_on_heketi_pod(cmd, raise_on_error=True):
     """Autodetect Heketi podname and run specified command on it."""
-    heketi_podname = command.cmd_run(
-        cmd=GET_HEKETI_PODNAME_CMD, hostname=MASTER_NODE).strip()
     # NOTE(vponomar): we redefine '--server' option which is provided
     # as part of the 'cmd' var.
-    assert heketi_podname.strip(), (
-        "Heketi POD not found on '%s' node using following command: \n%s" % (
-            MASTER_NODE, GET_HEKETI_PODNAME_CMD))
     if '--server=' in cmd and 'heketi-cli' in cmd:
-        cmd_with_podname_prefix = (
-            "oc exec %s -- %s --server=http://localhost:8080" % (
-                heketi_podname, cmd))
-    else:
+        cmd = "%s --server=http://localhost:8080" % cmd
+    if pod_session.USE_POD_SESSIONS:
+        # NOTE: Heketi POD name is resolved only when session gets
+        # (re)opened, e.g. after restart of the Heketi POD.
+        return pod_session.cmd_run_in_pod(
+            cmd, MASTER_NODE, pod_resolver=_get_heketi_podname,
+            raise_on_error=raise_on_error)
+    for use_cache in (True, False):
+        heketi_podname = _get_heketi_podname(use_cache=use_cache)
         cmd_with_podname_prefix = "oc exec %s -- %s" % (heketi_podname, cmd)
-    result = command.cmd_run(
-        cmd=cmd_with_podname_prefix, hostname=MASTER_NODE,
-        raise_on_error=raise_on_error)
-    return result
+        ret, out, err, _ = command.timed_run(
+            MASTER_NODE, cmd_with_podname_prefix)
+        if (use_cache and int(ret) != 0
+                and _is_heketi_pod_gone_error(err, heketi_podname)):
+            # NOTE: cached Heketi POD may have been replaced with new one
+            g.log.info("Heketi POD '%s' is gone, looking for new one." % (
+                heketi_podname))
+            invalidate_heketi_pod_cache()
+            continue
+        break
 
+    msg = ("Failed to execute command '%s' on '%s' node. Got non-zero "
+           "return code '%s'. Err: %s" % (
+               cmd_with_podname_prefix, MASTER_NODE, ret, err))
+    if int(ret) != 0:
+        g.log.error(msg)
+    if raise_on_error:
+        assert int(ret) == 0, msg
 
-def heketi_cmd_run(hostname, cmd, raise_on_error=True):
-    """Run Heketi client command from a node backing up with Heketi pod CLI."""
+    return out.strip() if out else out
+
+
+def _get_heketi_retry_policy(cmd):
+    """Get retry policy for the Heketi command.
+
+    Commands changing Heketi state use the 'heketi_mutation' policy,
+    which does not retry them on timeouts.
+    """
+    family = command_stats.get_command_family(cmd).split()
+    if family[:1] == ["curl"] or family[-1:][0] in READ_ONLY_HEKETI_ACTIONS:
+        return retry.get_policy("heketi")
+    return retry.get_policy("heketi_mutation")
+
+
+def _call_with_heketi_pod_fallback(hostname, cmd, func, fallback):
+    """Call 'func' retrying it with 'fallback' run in the Heketi POD.
+
+    Retries are done according to the retry policy of the command.
+    """
     try:
-        out = command.cmd_run(
-            cmd=cmd, hostname=hostname, raise_on_error=raise_on_error)
+        return _get_heketi_retry_policy(cmd).call(func, fallback=fallback)
     except Exception as e:
         g.log.error(
             'Failed to run "%s" command on the "%s" host. '
             'Got following error:\n%s' % (cmd, hostname, e))
-        if ('connection refused' in six.text_type(e).lower()
-                or 'operation timed out' in six.text_type(e).lower()):
-            time.sleep(1)
-            out = cmd_run_on_heketi_pod(cmd, raise_on_error=raise_on_error)
-        else:
-            raise
-    return out
+        raise
+
+
+def heketi_cmd_run(hostname, cmd, raise_on_error=True):
+    """Run Heketi client command from a node backing up with Heketi pod CLI."""
+    return _call_with_heketi_pod_fallback(
+        hostname, cmd,
+        lambda: command.cmd_run(
+            cmd=cmd, hostname=hostname, raise_on_error=raise_on_error),
+        lambda: cmd_run_on_heketi_pod(cmd, raise_on_error=raise_on_error))
+
+
+def _heketi_cmd_run_async(hostname, cmd, raise_on_error=True,
+                          processor=None):
+    """Non-blocking variant of the 'heketi_cmd_run' function.
+
+    Cached Heketi topology is dropped on completion of the command,
+    because all the non-blocking Heketi commands change it.
+    """
+
+    def _processor(out):
+        heketi_topology.invalidate()
+        return processor(out) if processor else out
+
+    def _error_handler(e):
+        heketi_topology.invalidate()
+        g.log.error(
+            'Failed to run "%s" command on the "%s" host. '
+            'Got following error:\n%s' % (cmd, hostname, e))
+        policy = _get_heketi_retry_policy(cmd)
+        delay = policy.get_retry_delay(e, 1, time.time())
+        if delay is None:
+            raise e
+        # NOTE: fallback is expected to be rare, so run it synchronously
+        time.sleep(delay)
+        command_stats.add_retry()
+        out = policy.call(
+            lambda: cmd_run_on_heketi_pod(cmd, raise_on_error=raise_on_error))
+        return _processor(out)
+
+    return command.cmd_run_async(
+        cmd, hostname, raise_on_error=raise_on_error, processor=_processor,
+        error_handler=_error_handler)
 
 
 def _set_heketi_global_flags(heketi_server_url, **kwargs):
@@ -98,6 +246,83 @@ def _set_heketi_global_flags(heketi_server_url, **kwargs):
     return (heketi_server_url, json_arg, secret_arg, user_arg)
 
 
+def _get_heketi_rest_client(heketi_server_url, require_json=True, **kwargs):
+    """Get Heketi REST client if it should be used for the call.
+
+    REST client is used only when it is enabled by the
+    'common.use_heketi_rest_client' config option and, if 'require_json'
+    is True, JSON output is requested, because plain text output of
+    'heketi-cli' is not reproduced by it.
+
+    Returns:
+        heketi_rest.HeketiRestClient|None: client or None if 'heketi-cli'
+            should be used.
+    """
+    if not heketi_rest.USE_HEKETI_REST_CLIENT or g._command_backend:
+        return None
+    if require_json and not kwargs.get("json"):
+        return None
+    user, secret = kwargs.get("user"), kwargs.get("secret")
+    if not user:
+        openshift_config = g.config.get("cns", g.config.get("openshift"))
+        heketi_cli_user = openshift_config['heketi_config']['heketi_cli_user']
+        if heketi_cli_user:
+            user = heketi_cli_user
+            heketi_cli_key = openshift_config[
+                'heketi_config']['heketi_cli_key']
+            if heketi_cli_key is not None:
+                secret = heketi_cli_key
+    heketi_server_url = (
+        heketi_server_url if heketi_server_url else (
+            "http://heketi-storage-project.cloudapps.mystorage.com"))
+    return heketi_rest.get_heketi_rest_client(
+        heketi_server_url, user=user, secret=secret)
+
+
+def _heketi_rest_call(func, mutating=False):
+    """Call Heketi REST client method retrying it on connection errors.
+
+    Calls changing Heketi state are retried according to the
+    'heketi_mutation' retry policy, which does not retry timeouts.
+    """
+    return retry.get_policy(
+        "heketi_mutation" if mutating else "heketi").call(func)
+
+
+def _get_heketi_volume_create_body(size, **kwargs):
+    """Get Heketi REST API request equal to 'heketi-cli volume create'."""
+    body = {"size": int(size)}
+    if kwargs.get("name"):
+        body["name"] = kwargs["name"]
+    if kwargs.get("clusters"):
+        body["clusters"] = kwargs["clusters"].split(",")
+    if kwargs.get("gid"):
+        body["gid"] = int(kwargs["gid"])
+    if kwargs.get("block"):
+        body["block"] = True
+    if kwargs.get("gluster_volume_options"):
+        body["glustervolumeoptions"] = [
+            opt.strip()
+            for opt in kwargs["gluster_volume_options"].split(",")]
+    if kwargs.get("snapshot_factor"):
+        body["snapshot"] = {
+            "enable": True, "factor": float(kwargs["snapshot_factor"])}
+    durability = kwargs.get("durability")
+    if durability or kwargs.get("replica") or kwargs.get("disperse_data"):
+        durability = durability or (
+            "replicate" if kwargs.get("replica") else "disperse")
+        body["durability"] = {"type": durability}
+        if durability == "replicate":
+            body["durability"]["replicate"] = {
+                "replica": int(kwargs.get("replica") or 3)}
+        elif durability == "disperse":
+            body["durability"]["disperse"] = {
+                "data": int(kwargs.get("disperse_data") or 4),
+                "redundancy": int(kwargs.get("redundancy") or 2)}
+    return body
+
+
+@heketi_topology.invalidates_topology
 def heketi_volume_create(heketi_client_node, heketi_server_url, size,
                          **kwargs):
     """Creates heketi volume with the given user options.
@@ -136,7 +361,38 @@ def heketi_volume_create(heketi_client_node, heketi_server_url, size,
     Example:
         heketi_volume_create(heketi_client_node, heketi_server_url, size)
     """
+    client = _get_heketi_rest_client(heketi_server_url, **kwargs)
+    if client and not any(
+            kwargs.get(k) for k in ("persistent_volume",
+                                    "persistent_volume_endpoint",
+                                    "persistent_volume_file")):
+        body = _get_heketi_volume_create_body(size, **kwargs)
+        return _heketi_rest_call(
+            lambda: client.volume_create(body), mutating=True)
+    cmd = _get_heketi_volume_create_cmd(heketi_server_url, size, **kwargs)
+    out = heketi_cmd_run(heketi_client_node, cmd)
+    if kwargs.get("json"):
+        return json.loads(out)
+    return out
+
+
+def heketi_volume_create_async(heketi_client_node, heketi_server_url, size,
+                               **kwargs):
+    """Non-blocking variant of the 'heketi_volume_create' function.
+
+    Args and kwargs are the same as for the 'heketi_volume_create' function.
+
+    Returns:
+        command.AsyncCmd: handle of the command. Its 'result' method returns
+            the same value as the 'heketi_volume_create' function.
+    """
+    cmd = _get_heketi_volume_create_cmd(heketi_server_url, size, **kwargs)
+    return _heketi_cmd_run_async(
+        heketi_client_node, cmd,
+        processor=json.loads if kwargs.get("json") else None)
+
 
+def _get_heketi_volume_create_cmd(heketi_server_url, size, **kwargs):
     if not kwargs.get('user'):
         openshift_config = g.config.get("cns", g.config.get("openshift"))
         heketi_cli_user = openshift_config['heketi_config']['heketi_cli_user']
@@ -197,11 +453,7 @@ def heketi_volume_create(heketi_client_node, heketi_server_url, size,
                persistent_volume_arg, persistent_volume_endpoint_arg,
                persistent_volume_file_arg, redundancy_arg, replica_arg,
                snapshot_factor_arg, json_arg, secret_arg, user_arg))
-    cmd = TIMEOUT_PREFIX + cmd
-    out = heketi_cmd_run(heketi_client_node, cmd)
-    if json_arg:
-        return json.loads(out)
-    return out
+    return TIMEOUT_PREFIX + cmd
 
 
 def heketi_volume_info(heketi_client_node, heketi_server_url, volume_id,
@@ -228,6 +480,9 @@ def heketi_volume_info(heketi_client_node, heketi_server_url, volume_id,
     Example:
         heketi_volume_info(heketi_client_node, volume_id)
     """
+    client = _get_heketi_rest_client(heketi_server_url, **kwargs)
+    if client:
+        return _heketi_rest_call(lambda: client.volume_info(volume_id))
 
     heketi_server_url, json_arg, admin_key, user = _set_heketi_global_flags(
         heketi_server_url, **kwargs)
@@ -241,6 +496,7 @@ def heketi_volume_info(heketi_client_node, heketi_server_url, volume_id,
     return out
 
 
+@heketi_topology.invalidates_topology
 def heketi_volume_expand(heketi_client_node, heketi_server_url, volume_id,
                          expand_size, **kwargs):
     """Executes heketi volume expand command.
@@ -268,6 +524,11 @@ def heketi_volume_expand(heketi_client_node, heketi_server_url, volume_id,
         heketi_volume_expand(heketi_client_node, heketi_server_url, volume_id,
                              expand_size)
     """
+    client = _get_heketi_rest_client(heketi_server_url, **kwargs)
+    if client:
+        return _heketi_rest_call(
+            lambda: client.volume_expand(volume_id, expand_size),
+            mutating=True)
 
     heketi_server_url, json_arg, admin_key, user = _set_heketi_global_flags(
         heketi_server_url, **kwargs)
@@ -283,6 +544,7 @@ def heketi_volume_expand(heketi_client_node, heketi_server_url, volume_id,
     return out
 
 
+@heketi_topology.invalidates_topology
 def heketi_volume_delete(heketi_client_node, heketi_server_url, volume_id,
                          raise_on_error=True, **kwargs):
     """Executes heketi volume delete command.
@@ -309,16 +571,160 @@ def heketi_volume_delete(heketi_client_node, heketi_server_url, volume_id,
     Example:
         heketi_volume_delete(heketi_client_node, heketi_server_url, volume_id)
     """
+    client = _get_heketi_rest_client(
+        heketi_server_url, require_json=False, **kwargs)
+    if client:
+        try:
+            _heketi_rest_call(
+                lambda: client.volume_delete(volume_id), mutating=True)
+        except AssertionError:
+            if raise_on_error:
+                raise
+            return ''
+        return "Volume %s deleted" % volume_id
+
+    cmd = _get_heketi_volume_delete_cmd(
+        heketi_server_url, volume_id, **kwargs)
+    out = heketi_cmd_run(
+        heketi_client_node, cmd, raise_on_error=raise_on_error)
+    return out
+
+
+def heketi_volume_delete_async(heketi_client_node, heketi_server_url,
+                               volume_id, raise_on_error=True, **kwargs):
+    """Non-blocking variant of the 'heketi_volume_delete' function.
+
+    Args and kwargs are the same as for the 'heketi_volume_delete' function.
+
+    Returns:
+        command.AsyncCmd: handle of the command. Its 'result' method returns
+            the same value as the 'heketi_volume_delete' function.
+    """
+    cmd = _get_heketi_volume_delete_cmd(
+        heketi_server_url, volume_id, **kwargs)
+    return _heketi_cmd_run_async(
+        heketi_client_node, cmd, raise_on_error=raise_on_error)
+
 
+def _get_heketi_volume_delete_cmd(heketi_server_url, volume_id, **kwargs):
     heketi_server_url, json_arg, admin_key, user = _set_heketi_global_flags(
         heketi_server_url, **kwargs)
 
     cmd = "heketi-cli -s %s volume delete %s %s %s %s" % (
         heketi_server_url, volume_id, json_arg, admin_key, user)
-    cmd = TIMEOUT_PREFIX + cmd
-    out = heketi_cmd_run(
-        heketi_client_node, cmd, raise_on_error=raise_on_error)
-    return out
+    return TIMEOUT_PREFIX + cmd
+
+
+def _run_heketi_bulk(func, specs, max_workers=None, raise_on_error=True,
+                     description="Heketi operation"):
+    """Call 'func' for each of the 'specs' using bounded worker pool.
+
+    Calls rejected by Heketi because of its operations throttling are
+    retried according to the 'heketi_throttle' retry policy.
+
+    Returns:
+        list: 'HeketiBulkResult' objects in the order of 'specs'.
+    Raises:
+        AssertionError: if any of the calls failed and 'raise_on_error'
+            is True. All the results are stored in its 'results' attribute.
+    """
+    def _call(spec):
+        start_time = time.time()
+        try:
+            result, error = retry.get_policy("heketi_throttle").call(
+                lambda: func(spec)), None
+        except Exception as e:
+            result, error = None, e
+        return HeketiBulkResult(spec, result, error, time.time() - start_time)
+
+    results = command.run_in_parallel(
+        _call, [(spec, ) for spec in specs],
+        max_workers=max_workers or HEKETI_BULK_WORKERS)
+
+    failed = [r for r in results if r.error is not None]
+    if failed and raise_on_error:
+        msg = "%s failed for %s of %s items:\n%s" % (
+            description, len(failed), len(results), "\n".join(
+                "%s: %s" % (r.spec, r.error) for r in failed))
+        g.log.error(msg)
+        error = AssertionError(msg)
+        error.results = results
+        raise error
+    return results
+
+
+def heketi_volume_create_many(heketi_client_node, heketi_server_url, specs,
+                              max_workers=None, raise_on_error=True,
+                              **kwargs):
+    """Create several heketi volumes at the same time.
+
+    Args:
+        heketi_client_node (str): Node on which cmd has to be executed.
+        heketi_server_url (str): Heketi server url
+        specs (list): volume sizes or dicts with 'size' key and
+            other 'heketi_volume_create' kwargs for each of the volumes.
+        max_workers (int): amount of volumes created at the same time.
+            Defaults to the 'common.heketi_bulk_workers' config option.
+        raise_on_error (bool): whether or not to raise exception
+            in case creation of any volume failed.
+
+    Kwargs:
+        'heketi_volume_create' kwargs common for all the volumes.
+        'json' is always True.
+
+    Returns:
+        list: 'HeketiBulkResult' objects in the order of 'specs' with
+            volume info dicts as 'result' and seconds spent as 'duration'.
+
+    Raises:
+        AssertionError: if any of the volumes failed to be created and
+            'raise_on_error' is True. Results are stored in its 'results'
+            attribute, so created volumes can be cleaned up.
+
+    Example:
+        heketi_volume_create_many(
+            heketi_client_node, heketi_server_url, [1] * 50)
+    """
+    def _create(spec):
+        spec_kwargs = dict(kwargs, json=True)
+        spec_kwargs.update(spec if isinstance(spec, dict) else {"size": spec})
+        return heketi_volume_create(
+            heketi_client_node, heketi_server_url, **spec_kwargs)
+
+    return _run_heketi_bulk(
+        _create, specs, max_workers=max_workers,
+        raise_on_error=raise_on_error, description="Volume creation")
+
+
+def heketi_volume_delete_many(heketi_client_node, heketi_server_url,
+                              volume_ids, max_workers=None,
+                              raise_on_error=True, **kwargs):
+    """Delete several heketi volumes at the same time.
+
+    Args:
+        heketi_client_node (str): Node on which cmd has to be executed.
+        heketi_server_url (str): Heketi server url
+        volume_ids (list): IDs of the volumes to be deleted.
+        max_workers (int): amount of volumes deleted at the same time.
+            Defaults to the 'common.heketi_bulk_workers' config option.
+        raise_on_error (bool): whether or not to raise exception
+            in case deletion of any volume failed.
+
+    Kwargs:
+        'heketi_volume_delete' kwargs common for all the volumes.
+
+    Returns:
+        list: 'HeketiBulkResult' objects in the order of 'volume_ids'.
+
+    Raises:
+        AssertionError: if any of the volumes failed to be deleted and
+            'raise_on_error' is True.
+    """
+    return _run_heketi_bulk(
+        lambda volume_id: heketi_volume_delete(
+            heketi_client_node, heketi_server_url, volume_id, **kwargs),
+        volume_ids, max_workers=max_workers, raise_on_error=raise_on_error,
+        description="Volume deletion")
 
 
 def heketi_volume_list(heketi_client_node, heketi_server_url, **kwargs):
@@ -344,6 +750,9 @@ def heketi_volume_list(heketi_client_node, heketi_server_url, **kwargs):
     Example:
         heketi_volume_info(heketi_client_node, heketi_server_url)
     """
+    client = _get_heketi_rest_client(heketi_server_url, **kwargs)
+    if client:
+        return _heketi_rest_call(client.volume_list)
 
     heketi_server_url, json_arg, admin_key, user = _set_heketi_global_flags(
         heketi_server_url, **kwargs)
@@ -357,6 +766,90 @@ def heketi_volume_list(heketi_client_node, heketi_server_url, **kwargs):
     return out
 
 
+class HeketiVolumeList(object):
+    """Indexed output of the 'heketi-cli volume list' command.
+
+    Also works for the 'heketi-cli blockvolume list' command output.
+    Each row is a dict with 'id', 'cluster', 'name' and 'block' keys,
+    where 'block' shows whether volume hosts block volumes.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.by_id, self.by_name = {}, {}
+        self.by_cluster, self.by_name_prefix = {}, {}
+        self.block_hosting_ids = []
+        for row in rows:
+            self.by_id[row["id"]] = row
+            self.by_name[row["name"]] = row["id"]
+            self.by_cluster.setdefault(row["cluster"], []).append(row["id"])
+            if row["block"]:
+                self.block_hosting_ids.append(row["id"])
+            # NOTE: names with prefix look like '<prefix>_<suffix>'
+            name_parts = row["name"].split("_")
+            for i in range(1, len(name_parts)):
+                self.by_name_prefix.setdefault(
+                    "_".join(name_parts[:i]), []).append(row["id"])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def get_by_name_prefix(self, prefix):
+        """Get rows of volumes which names start with '<prefix>_'."""
+        return [self.by_id[vol_id]
+                for vol_id in self.by_name_prefix.get(prefix, [])]
+
+
+def parse_heketi_volume_list(out):
+    """Parse 'heketi-cli volume list' or 'blockvolume list' output.
+
+    Args:
+        out (str): output of the command run without '--json' option.
+    Returns:
+        HeketiVolumeList: indexed rows of the output.
+    """
+    return HeketiVolumeList([
+        {"id": vol_id, "cluster": cluster, "name": name, "block": bool(block)}
+        for vol_id, cluster, name, block in HEKETI_VOLUME_LIST_ROW.findall(
+            out)])
+
+
+def get_heketi_volume_list_index(heketi_client_node, heketi_server_url,
+                                 block=False, **kwargs):
+    """Get indexed list of heketi volumes or block volumes.
+
+    'heketi-cli volume list --json' returns only volume IDs, while plain
+    output contains names and clusters of volumes as well.
+
+    Args:
+        heketi_client_node (str): Node on which cmd has to be executed.
+        heketi_server_url (str): Heketi server url
+        block (bool): defines whether block volumes should be listed.
+
+    Kwargs:
+        The keys, values in kwargs are:
+            - secret : (str)|None
+            - user : (str)|None
+
+    Returns:
+        HeketiVolumeList: indexed list of volumes.
+
+    Raises:
+        AssertionError: if command fails.
+
+    Example:
+        vols = get_heketi_volume_list_index(h_node, h_url)
+        vol_id = vols.by_name['heketidbstorage']
+    """
+    kwargs.pop("json", None)
+    list_func = heketi_blockvolume_list if block else heketi_volume_list
+    return parse_heketi_volume_list(
+        list_func(heketi_client_node, heketi_server_url, **kwargs))
+
+
 def heketi_topology_info(heketi_client_node, heketi_server_url, **kwargs):
     """Executes heketi topology info command.
 
@@ -393,6 +886,43 @@ def heketi_topology_info(heketi_client_node, heketi_server_url, **kwargs):
     return out
 
 
+def get_heketi_topology(heketi_client_node, heketi_server_url,
+                        use_cache=False, **kwargs):
+    """Get indexed snapshot of the Heketi topology.
+
+    Args:
+        heketi_client_node (str): Node on which cmd has to be executed.
+        heketi_server_url (str): Heketi server url
+        use_cache (bool): defines whether snapshot cached less than
+            'common.heketi_topology_cache_ttl' seconds ago can be returned
+            instead of querying Heketi. Cache is dropped by the functions
+            which change Heketi topology.
+
+    Kwargs:
+        The keys, values in kwargs are:
+            - secret : (str)|None
+            - user : (str)|None
+
+    Returns:
+        heketi_topology.HeketiTopology: topology snapshot.
+
+    Raises:
+        AssertionError: if command fails.
+    """
+    kwargs.pop("json", None)
+    key = (heketi_client_node, heketi_server_url,
+           kwargs.get("user"), kwargs.get("secret"))
+    if use_cache:
+        topology = heketi_topology.get_cached(key)
+        if topology is not None:
+            return topology
+
+    topology = heketi_topology.HeketiTopology(heketi_topology_info(
+        heketi_client_node, heketi_server_url, json=True, **kwargs))
+    heketi_topology.set_cached(key, topology)
+    return topology
+
+
 def hello_heketi(heketi_client_node, heketi_server_url, **kwargs):
     """Executes curl command to check if heketi server is alive.
 
@@ -420,22 +950,15 @@ def hello_heketi(heketi_client_node, heketi_server_url, **kwargs):
 
     cmd = "curl --max-time 10 %s/hello" % heketi_server_url
 
-    try:
-        command.cmd_run(cmd=cmd, hostname=heketi_client_node)
-    except Exception as e:
-        g.log.error(
-            'Failed to run "%s" command on the "%s" host. '
-            'Got following error:\n%s' % (cmd, heketi_client_node, e))
-        if ('connection refused' in six.text_type(e).lower()
-                or 'operation timed out' in six.text_type(e).lower()):
-            time.sleep(1)
-            cmd_run_on_heketi_pod(
-                "curl --max-time 10 http://localhost:8080/hello")
-        else:
-            raise
+    _call_with_heketi_pod_fallback(
+        heketi_client_node, cmd,
+        lambda: command.cmd_run(cmd=cmd, hostname=heketi_client_node),
+        lambda: cmd_run_on_heketi_pod(
+            "curl --max-time 10 http://localhost:8080/hello"))
     return True
 
 
+@heketi_topology.invalidates_topology
 def heketi_cluster_create(heketi_client_node, heketi_server_url, **kwargs):
     """Executes heketi cluster create command with provided options.
 
@@ -480,6 +1003,7 @@ def heketi_cluster_create(heketi_client_node, heketi_server_url, **kwargs):
     return out
 
 
+@heketi_topology.invalidates_topology
 def heketi_cluster_delete(heketi_client_node, heketi_server_url, cluster_id,
                           **kwargs):
     """Executes heketi cluster delete command.
@@ -577,6 +1101,9 @@ def heketi_cluster_list(heketi_client_node, heketi_server_url, **kwargs):
     Example:
         heketi_cluster_info(heketi_client_node, heketi_server_url)
     """
+    client = _get_heketi_rest_client(heketi_server_url, **kwargs)
+    if client:
+        return _heketi_rest_call(client.cluster_list)
 
     heketi_server_url, json_arg, admin_key, user = _set_heketi_global_flags(
         heketi_server_url, **kwargs)
@@ -590,6 +1117,7 @@ def heketi_cluster_list(heketi_client_node, heketi_server_url, **kwargs):
     return out
 
 
+@heketi_topology.invalidates_topology
 def heketi_device_add(heketi_client_node, heketi_server_url, device_name,
                       node_id, **kwargs):
     """Executes heketi device add command.
@@ -626,6 +1154,7 @@ def heketi_device_add(heketi_client_node, heketi_server_url, device_name,
     return out
 
 
+@heketi_topology.invalidates_topology
 def heketi_device_delete(heketi_client_node, heketi_server_url, device_id,
                          **kwargs):
     """Executes heketi device delete command.
@@ -661,6 +1190,7 @@ def heketi_device_delete(heketi_client_node, heketi_server_url, device_id,
     return out
 
 
+@heketi_topology.invalidates_topology
 def heketi_device_disable(heketi_client_node, heketi_server_url, device_id,
                           **kwargs):
     """Executes heketi device disable command.
@@ -695,6 +1225,7 @@ def heketi_device_disable(heketi_client_node, heketi_server_url, device_id,
     return out
 
 
+@heketi_topology.invalidates_topology
 def heketi_device_enable(heketi_client_node, heketi_server_url, device_id,
                          **kwargs):
     """Executes heketi device enable command.
@@ -769,6 +1300,7 @@ def heketi_device_info(heketi_client_node, heketi_server_url, device_id,
         return out
 
 
+@heketi_topology.invalidates_topology
 def heketi_device_remove(heketi_client_node, heketi_server_url, device_id,
                          **kwargs):
     """Executes heketi device remove command.
@@ -804,6 +1336,7 @@ def heketi_device_remove(heketi_client_node, heketi_server_url, device_id,
     return out
 
 
+@heketi_topology.invalidates_topology
 def heketi_node_add(heketi_client_node, heketi_server_url, zone, cluster_id,
                     management_host_name, storage_host_name, **kwargs):
     """Executes heketi node add command.
@@ -853,6 +1386,7 @@ def heketi_node_add(heketi_client_node, heketi_server_url, zone, cluster_id,
         return out
 
 
+@heketi_topology.invalidates_topology
 def heketi_node_delete(heketi_client_node, heketi_server_url, node_id,
                        **kwargs):
     """Executes heketi node delete command.
@@ -888,6 +1422,7 @@ def heketi_node_delete(heketi_client_node, heketi_server_url, node_id,
     return out
 
 
+@heketi_topology.invalidates_topology
 def heketi_node_remove(heketi_client_node, heketi_server_url, node_id,
                        **kwargs):
     """Executes heketi node remove command.
@@ -922,6 +1457,7 @@ def heketi_node_remove(heketi_client_node, heketi_server_url, node_id,
     return out
 
 
+@heketi_topology.invalidates_topology
 def heketi_node_disable(heketi_client_node, heketi_server_url, node_id,
                         **kwargs):
     """Executes heketi node disable command.
@@ -957,6 +1493,7 @@ def heketi_node_disable(heketi_client_node, heketi_server_url, node_id,
     return out
 
 
+@heketi_topology.invalidates_topology
 def heketi_node_enable(heketi_client_node, heketi_server_url, node_id,
                        **kwargs):
     """Executes heketi node enable command.
@@ -1016,6 +1553,9 @@ def heketi_node_info(heketi_client_node, heketi_server_url, node_id, **kwargs):
     Example:
         heketi_node_info(heketi_client_node, heketi_server_url, node_id)
     """
+    client = _get_heketi_rest_client(heketi_server_url, **kwargs)
+    if client:
+        return _heketi_rest_call(lambda: client.node_info(node_id))
 
     heketi_server_url, json_arg, admin_key, user = _set_heketi_global_flags(
         heketi_server_url, **kwargs)
@@ -1086,6 +1626,10 @@ def heketi_blockvolume_info(heketi_client_node, heketi_server_url,
     Example:
         heketi_blockvolume_info(heketi_client_node, block_volume_id)
     """
+    client = _get_heketi_rest_client(heketi_server_url, **kwargs)
+    if client:
+        return _heketi_rest_call(
+            lambda: client.blockvolume_info(block_volume_id))
 
     heketi_server_url, json_arg, admin_key, user = _set_heketi_global_flags(
         heketi_server_url, **kwargs)
@@ -1099,6 +1643,7 @@ def heketi_blockvolume_info(heketi_client_node, heketi_server_url,
     return out
 
 
+@heketi_topology.invalidates_topology
 def heketi_blockvolume_create(heketi_client_node, heketi_server_url, size,
                               **kwargs):
     """Executes heketi blockvolume create
@@ -1168,6 +1713,7 @@ def heketi_blockvolume_create(heketi_client_node, heketi_server_url, size,
     return out
 
 
+@heketi_topology.invalidates_topology
 def heketi_blockvolume_delete(heketi_client_node, heketi_server_url,
                               block_volume_id, raise_on_error=True, **kwargs):
     """Executes heketi blockvolume delete command.
@@ -1207,6 +1753,76 @@ def heketi_blockvolume_delete(heketi_client_node, heketi_server_url,
     return out
 
 
+def heketi_blockvolume_create_many(heketi_client_node, heketi_server_url,
+                                   specs, max_workers=None,
+                                   raise_on_error=True, **kwargs):
+    """Create several heketi block volumes at the same time.
+
+    Args:
+        heketi_client_node (str): Node on which cmd has to be executed.
+        heketi_server_url (str): Heketi server url
+        specs (list): block volume sizes or dicts with 'size' key and
+            other 'heketi_blockvolume_create' kwargs for each of them.
+        max_workers (int): amount of volumes created at the same time.
+            Defaults to the 'common.heketi_bulk_workers' config option.
+        raise_on_error (bool): whether or not to raise exception
+            in case creation of any block volume failed.
+
+    Kwargs:
+        'heketi_blockvolume_create' kwargs common for all the volumes.
+        'json' is always True.
+
+    Returns:
+        list: 'HeketiBulkResult' objects in the order of 'specs' with
+            block volume info dicts as 'result'.
+
+    Raises:
+        AssertionError: if any of the block volumes failed to be created
+            and 'raise_on_error' is True. Results are stored in its
+            'results' attribute.
+    """
+    def _create(spec):
+        spec_kwargs = dict(kwargs, json=True)
+        spec_kwargs.update(spec if isinstance(spec, dict) else {"size": spec})
+        return heketi_blockvolume_create(
+            heketi_client_node, heketi_server_url, **spec_kwargs)
+
+    return _run_heketi_bulk(
+        _create, specs, max_workers=max_workers,
+        raise_on_error=raise_on_error, description="Block volume creation")
+
+
+def heketi_blockvolume_delete_many(heketi_client_node, heketi_server_url,
+                                   block_volume_ids, max_workers=None,
+                                   raise_on_error=True, **kwargs):
+    """Delete several heketi block volumes at the same time.
+
+    Args:
+        heketi_client_node (str): Node on which cmd has to be executed.
+        heketi_server_url (str): Heketi server url
+        block_volume_ids (list): IDs of the block volumes to be deleted.
+        max_workers (int): amount of volumes deleted at the same time.
+            Defaults to the 'common.heketi_bulk_workers' config option.
+        raise_on_error (bool): whether or not to raise exception
+            in case deletion of any block volume failed.
+
+    Kwargs:
+        'heketi_blockvolume_delete' kwargs common for all the volumes.
+
+    Returns:
+        list: 'HeketiBulkResult' objects in the order of 'block_volume_ids'.
+
+    Raises:
+        AssertionError: if any of the block volumes failed to be deleted
+            and 'raise_on_error' is True.
+    """
+    return _run_heketi_bulk(
+        lambda volume_id: heketi_blockvolume_delete(
+            heketi_client_node, heketi_server_url, volume_id, **kwargs),
+        block_volume_ids, max_workers=max_workers,
+        raise_on_error=raise_on_error, description="Block volume deletion")
+
+
 def heketi_blockvolume_list(heketi_client_node, heketi_server_url, **kwargs):
     """Executes heketi blockvolume list command.
 
@@ -1231,6 +1847,9 @@ def heketi_blockvolume_list(heketi_client_node, heketi_server_url, **kwargs):
     Example:
         heketi_volume_info(heketi_client_node, heketi_server_url)
     """
+    client = _get_heketi_rest_client(heketi_server_url, **kwargs)
+    if client:
+        return _heketi_rest_call(client.blockvolume_list)
 
     heketi_server_url, json_arg, admin_key, user = _set_heketi_global_flags(
         heketi_server_url, **kwargs)
@@ -1265,15 +1884,11 @@ def heketi_blockvolume_list_by_name_prefix(
         exceptions.AssertionError: if command fails to execute on
                                    heketi server.
     """
-    # Delete json key from kwargs
-    kwargs.pop("json", None)
-
-    block_vols = heketi_blockvolume_list(
-        heketi_client_node, heketi_server_url, **kwargs)
-
-    block_vol_regex = re.compile(
-        r"Id:(\S+)\s+Cluster:(\S+)\s+Name:(%s_\S+)" % prefix)
-    return block_vol_regex.findall(block_vols.strip())
+    block_vols = get_heketi_volume_list_index(
+        heketi_client_node, heketi_server_url, block=True, **kwargs)
+    return [
+        (row["id"], row["cluster"], row["name"])
+        for row in block_vols.get_by_name_prefix(prefix)]
 
 
 def verify_volume_name_prefix(hostname, prefix, namespace, pvc_name,
@@ -1313,6 +1928,7 @@ def verify_volume_name_prefix(hostname, prefix, namespace, pvc_name,
     return True
 
 
+@heketi_topology.invalidates_topology
 def set_tags(heketi_client_node, heketi_server_url, source, source_id, tag,
              **kwargs):
     """Set any tags on Heketi node or device.
@@ -1400,6 +2016,7 @@ def set_arbiter_tag(heketi_client_node, heketi_server_url, source,
     raise ValueError(msg)
 
 
+@heketi_topology.invalidates_topology
 def rm_tags(heketi_client_node, heketi_server_url, source, source_id, tag,
             **kwargs):
     """Remove any kind of tags from Heketi node or device.
@@ -1503,19 +2120,11 @@ def get_heketi_metrics(heketi_client_node, heketi_server_url,
 
     cmd = "curl --max-time 10 %s/metrics" % heketi_server_url
 
-    try:
-        out = command.cmd_run(cmd=cmd, hostname=heketi_client_node)
-    except Exception as e:
-        g.log.error(
-            'Failed to run "%s" command on the "%s" host. '
-            'Got following error:\n%s' % (cmd, heketi_client_node, e))
-        if ('connection refused' in six.text_type(e).lower()
-                or 'operation timed out' in six.text_type(e).lower()):
-            time.sleep(1)
-            out = cmd_run_on_heketi_pod(
-                "curl --max-time 10 http://localhost:8080/metrics")
-        else:
-            raise
+    out = _call_with_heketi_pod_fallback(
+        heketi_client_node, cmd,
+        lambda: command.cmd_run(cmd=cmd, hostname=heketi_client_node),
+        lambda: cmd_run_on_heketi_pod(
+            "curl --max-time 10 http://localhost:8080/metrics"))
 
     if prometheus_format:
         return out.strip()
@@ -1555,12 +2164,14 @@ def heketi_examine_gluster(heketi_client_node, heketi_server_url):
 
 
 def get_block_hosting_volume_list(
-        heketi_client_node, heketi_server_url, **kwargs):
+        heketi_client_node, heketi_server_url, use_cache=False, **kwargs):
     """Get heketi block hosting volume list.
 
     Args:
         heketi_client_node (str): Node on which cmd has to be executed.
         heketi_server_url (str): Heketi server url
+        use_cache (bool): defines whether cached Heketi topology can be
+            used. Heketi volume list is queried otherwise.
 
     Kwargs:
         The keys, values in kwargs are:
@@ -1573,49 +2184,78 @@ def get_block_hosting_volume_list(
     Raises:
         exceptions.ExecutionError: if command fails.
     """
-    # Delete json key from kwargs
-    kwargs.pop("json", None)
-
-    volume_list = heketi_volume_list(
+    if use_cache:
+        topology = get_heketi_topology(
+            heketi_client_node, heketi_server_url, use_cache=True, **kwargs)
+        return {
+            vol_id: {"Cluster": vol["cluster"], "Name": vol["name"]}
+            for vol_id, vol in topology.get_block_hosting_volumes().items()}
+
+    volumes = get_heketi_volume_list_index(
         heketi_client_node, heketi_server_url, **kwargs)
-
     bhv = {
-        volume[0]: {"Cluster": volume[1], "Name": volume[2]}
-        for volume in HEKETI_BHV.findall(volume_list.strip())}
+        vol_id: {"Cluster": volumes.by_id[vol_id]["cluster"],
+                 "Name": volumes.by_id[vol_id]["name"]}
+        for vol_id in volumes.block_hosting_ids}
 
     return bhv
 
 
-def get_total_free_space(heketi_client_node, heketi_server_url):
+def get_total_free_space(heketi_client_node, heketi_server_url,
+                         use_cache=False):
     """
     Calculates free space across devices which are online
     and skips the ones which are offline.
     Args:
         - heketi_client_node (str): Node where we want to run our commands.
         - heketi_server_url (str): This is a heketi server url.
+        - use_cache (bool): defines whether cached Heketi topology
+            can be used.
 
     Returns:
         int: if successful
 
     """
-    device_free_spaces = []
-    heketi_node_id_list = heketi_node_list(
-        heketi_client_node, heketi_server_url)
-    for node_id in heketi_node_id_list:
-        total_device_free_space = 0
-        node_info_dict = heketi_node_info(
-            heketi_client_node, heketi_server_url,
-            node_id, json=True)
-        if (node_info_dict["state"].strip().lower() != "online"):
-            continue
-        for device in node_info_dict["devices"]:
-            if (device["state"].strip().lower() != "online"):
-                continue
-            total_device_free_space += (device["storage"]["free"])
-        device_free_spaces.append(total_device_free_space / 1024 ** 2)
+    capacity = get_heketi_capacity(
+        heketi_client_node, heketi_server_url, use_cache=use_cache)
+    device_free_spaces = [
+        node["free"] / 1024 ** 2 for node in capacity["nodes"].values()]
     return int(sum(device_free_spaces)), len(device_free_spaces)
 
 
+def get_heketi_capacity(heketi_client_node, heketi_server_url,
+                        online_only=True, use_cache=False, **kwargs):
+    """Get free, used and total space of Heketi nodes, devices and zones.
+
+    Whole capacity info is calculated using single Heketi topology call.
+
+    Args:
+        heketi_client_node (str): Node on which cmd has to be executed.
+        heketi_server_url (str): Heketi server url
+        online_only (bool): defines whether offline nodes and devices
+            should be skipped.
+        use_cache (bool): defines whether cached Heketi topology can be used.
+
+    Kwargs:
+        The keys, values in kwargs are:
+            - secret : (str)|None
+            - user : (str)|None
+
+    Returns:
+        dict: capacity info in KiB, see 'HeketiTopology.get_capacity'.
+
+    Raises:
+        AssertionError: if command fails.
+
+    Example:
+        capacity = get_heketi_capacity(heketi_client_node, heketi_server_url)
+        free_space_in_gb = capacity['total']['free'] / 1024 ** 2
+    """
+    topology = get_heketi_topology(
+        heketi_client_node, heketi_server_url, use_cache=use_cache, **kwargs)
+    return topology.get_capacity(online_only=online_only)
+
+
 def heketi_server_operations_list(
         heketi_client_node, heketi_server_url, **kwargs):
     """Executes heketi server operations list command.
@@ -1659,6 +2299,7 @@ def heketi_server_operations_list(
         return []
 
 
+@heketi_topology.invalidates_topology
 def heketi_server_operation_cleanup(
         heketi_client_node, heketi_server_url, operation_id=None,
         timeout=120, wait_time=5, **kwargs):
@@ -1782,12 +2423,13 @@ def heketi_volume_endpoint_patch(
 
 
 def get_heketi_volume_and_brick_count_list(
-        heketi_client_node, heketi_server_url, **kwargs):
+        heketi_client_node, heketi_server_url, use_cache=False, **kwargs):
     """Calculate amount of volumes and bricks.
 
     Args:
         heketi_client_node (str): Node on which cmd has to be executed.
         heketi_server_url (str): Heketi server url
+        use_cache (bool): defines whether cached Heketi topology can be used.
 
     Kwargs:
         The keys, values in kwargs are:
@@ -1804,12 +2446,10 @@ def get_heketi_volume_and_brick_count_list(
         AssertionError: if command fails.
 
     """
-    topology_info = heketi_topology_info(
-        heketi_client_node, heketi_server_url, json=True, **kwargs)
-    volume_name_brick_count = []
-    for c in topology_info['clusters']:
-        volume_name_brick_count = [
-            (v['name'], len(v['bricks'])) for v in c['volumes']]
+    topology = get_heketi_topology(
+        heketi_client_node, heketi_server_url, use_cache=use_cache, **kwargs)
+    volume_name_brick_count = [
+        (v['name'], len(v['bricks'])) for v in topology.volumes.values()]
     return volume_name_brick_count
 
 
@@ -1849,13 +2489,15 @@ def get_vol_file_servers_and_hosts(
 
 
 def get_bricks_on_heketi_node(
-        heketi_client_node, heketi_server_url, node_id, **kwargs):
+        heketi_client_node, heketi_server_url, node_id, use_cache=False,
+        **kwargs):
     """Get bricks on heketi node.
 
     Args:
         heketi_client_node (str): Node on which cmd has to be executed.
         heketi_server_url (str): Heketi server url
         node_id (str): Node ID
+        use_cache (bool): defines whether cached Heketi topology can be used.
 
     Kwargs:
         The keys, values in kwargs are:
@@ -1872,10 +2514,17 @@ def get_bricks_on_heketi_node(
     if 'json' in kwargs:
         raise AssertionError("json is not expected parameter")
 
-    kwargs['json'] = True
-
-    node_info = heketi_node_info(
-        heketi_client_node, heketi_server_url, node_id, **kwargs)
+    if use_cache:
+        topology = get_heketi_topology(
+            heketi_client_node, heketi_server_url, use_cache=True, **kwargs)
+        node_info = topology.nodes.get(node_id)
+        if node_info is None:
+            raise AssertionError(
+                "Node %s not found in Heketi topology" % node_id)
+    else:
+        kwargs['json'] = True
+        node_info = heketi_node_info(
+            heketi_client_node, heketi_server_url, node_id, **kwargs)
 
     if len(node_info['devices']) < 1:
         raise AssertionError("No device found on node %s" % node_info)
@@ -0,0 +1,372 @@
+"""
+Use this module for talking to the Heketi server over its REST API.
+
+'heketi_ops' functions run 'heketi-cli' on the Heketi client node over
+SSH, paying for process spawn and new HTTP connection on each call.
+'HeketiRestClient' sends requests from the test runner host itself,
+reusing keep-alive HTTP connections and signing requests with JWT
+tokens the same way as 'heketi-cli' does.
+
+Usage example:
+
+    from openshiftstoragelibs import heketi_rest
+
+    client = heketi_rest.get_heketi_rest_client(
+        'http://heketi:8080', user='admin', secret='secret')
+    vol = client.volume_create({'size': 1})
+    client.volume_delete(vol['id'])
+
+Set 'common.use_heketi_rest_client' config option to 'True' to make
+the 'heketi_ops' functions, which support it, use the REST client when
+JSON output is requested. Heketi server URL must be reachable from the
+host where tests run in this case.
+"""
+try:
+    # py2/3
+    import simplejson as json
+except ImportError:
+    # py2
+    import json
+
+import base64
+import hashlib
+import hmac
+import socket
+import threading
+import time
+
+from glusto.core import Glusto as g
+import six
+from six.moves import http_client
+from six.moves import queue
+from six.moves.urllib import parse
+
+from openshiftstoragelibs import command_stats
+from openshiftstoragelibs import exceptions
+
+
+USE_HEKETI_REST_CLIENT = g.config.get("common", {}).get(
+    "use_heketi_rest_client", False)
+HEKETI_REST_POOL_SIZE = g.config.get("common", {}).get(
+    "heketi_rest_pool_size", 10)
+HEKETI_COMMAND_TIMEOUT = g.config.get("common", {}).get(
+    "heketi_command_timeout", 120)
+JWT_LIFETIME = 600
+
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def get_jwt_token(user, secret, method, path, now=None):
+    """Get JWT token for the Heketi request.
+
+    Args:
+        user (str): Heketi user, e.g. 'admin'.
+        secret (str): key of the user.
+        method (str): HTTP method of the request.
+        path (str): path of the request URL without query.
+        now (int|None): timestamp of the token issue. Current time is used
+            if not provided.
+    Returns:
+        str: token signed with HS256 algorithm.
+    """
+    now = int(time.time() if now is None else now)
+    claims = {
+        "iss": user,
+        "iat": now,
+        "exp": now + JWT_LIFETIME,
+        "qsh": hashlib.sha256(
+            ("%s&%s" % (method, path)).encode('utf-8')).hexdigest(),
+    }
+    signing_input = b'.'.join(
+        _b64encode(json.dumps(
+            part, separators=(',', ':'), sort_keys=True).encode('utf-8'))
+        for part in ({"alg": "HS256", "typ": "JWT"}, claims))
+    signature = hmac.new(
+        (secret or '').encode('utf-8'), signing_input, hashlib.sha256)
+    return (signing_input + b'.' + _b64encode(signature.digest())).decode(
+        'ascii')
+
+
+def _is_stale_connection_error(error, sent):
+    """Check whether request failed because of idle connection closed
+    by the server before receiving it.
+
+    Args:
+        error (Exception): error of sending request or reading response.
+        sent (bool): whether request was fully written to the socket.
+    Returns:
+        bool: True if request surely was not served by the server.
+    """
+    if not sent:
+        # NOTE: partially sent request could have reached the server
+        # if sending timed out
+        return not isinstance(error, socket.timeout)
+    # NOTE: connection closed without any byte of the response
+    if isinstance(error, getattr(http_client, "RemoteDisconnected", ())):
+        return True
+    return (isinstance(error, http_client.BadStatusLine)
+            and error.line in ("", "''"))
+
+
+class HeketiRestClient(object):
+    """Client of the Heketi REST API with pool of keep-alive connections.
+
+    Client is thread-safe. Each concurrent request uses its own connection,
+    up to 'pool_size' idle connections are kept open for further requests.
+    """
+
+    def __init__(self, server_url, user=None, secret=None, timeout=None,
+                 pool_size=None):
+        """Args:
+            server_url (str): Heketi server URL, e.g. 'http://heketi:8080'.
+            user (str|None): Heketi user. Requests are not signed if None.
+            secret (str|None): key of the Heketi user.
+            timeout (int|None): seconds to wait for the single HTTP request
+                and for the async Heketi operation to finish. Defaults to
+                the 'common.heketi_command_timeout' config option.
+            pool_size (int|None): max amount of idle connections to keep.
+                Defaults to the 'common.heketi_rest_pool_size' config option.
+        """
+        url = parse.urlparse(server_url)
+        if url.scheme not in ("http", "https"):
+            raise exceptions.ConfigError(
+                "Unsupported Heketi server URL '%s'." % server_url)
+        self.server_url = server_url
+        self.scheme, self.netloc = url.scheme, url.netloc
+        self.base_path = url.path.rstrip('/')
+        self.user = user
+        self.secret = secret
+        self.timeout = timeout or HEKETI_COMMAND_TIMEOUT
+        self._pool = queue.LifoQueue(pool_size or HEKETI_REST_POOL_SIZE)
+
+    def __repr__(self):
+        return "HeketiRestClient(%s)" % self.server_url
+
+    def _get_connection(self):
+        """Get idle connection from the pool or create new one.
+
+        Returns:
+            tuple: connection object and bool showing whether it was used
+                for previous requests.
+        """
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            conn_class = (
+                http_client.HTTPSConnection if self.scheme == "https"
+                else http_client.HTTPConnection)
+            return conn_class(self.netloc, timeout=self.timeout), False
+
+    def _release_connection(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        """Close all the idle connections."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _send(self, method, path, body=None):
+        """Send single HTTP request.
+
+        Returns:
+            tuple: status, headers with lowercase names and body of response.
+        """
+        path = self.base_path + path
+        headers = {"Accept": "application/json"}
+        if body is not None:
+            # NOTE: bytes body is sent together with headers in one packet
+            body = json.dumps(body).encode('utf-8')
+            headers["Content-Type"] = "application/json"
+        if self.user:
+            headers["Authorization"] = "bearer %s" % get_jwt_token(
+                self.user, self.secret, method, path.split('?')[0])
+
+        start_time = time.time()
+        for attempt in range(2):
+            conn, reused = self._get_connection()
+            sent = False
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                sent = True
+                resp = conn.getresponse()
+                data = resp.read()
+            except (http_client.HTTPException, socket.error) as e:
+                conn.close()
+                if reused and not attempt and _is_stale_connection_error(
+                        e, sent):
+                    # NOTE: idle connection was closed by the server,
+                    # request did not reach it, so it is safe to resend it.
+                    g.log.info(
+                        "Resending request using new connection to %r: "
+                        "%s" % (self, e))
+                    continue
+                raise exceptions.ExecutionError(
+                    "Failed to send '%s %s' request to %r: %s" % (
+                        method, path, self, e))
+            break
+
+        resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+        if resp_headers.get("connection", "").lower() == "close":
+            conn.close()
+        else:
+            self._release_connection(conn)
+        if six.PY3:
+            data = data.decode('utf-8')
+        command_stats.record(
+            self.netloc,
+            "heketi-rest %s %s" % (method, path[len(self.base_path):].split(
+                '/')[1].split('?')[0]),
+            time.time() - start_time, len(data), retries=attempt)
+        g.log.info("%s %s://%s%s: %s" % (
+            method, self.scheme, self.netloc, path, resp.status))
+        return resp.status, resp_headers, data
+
+    def _get_location(self, headers):
+        """Get path of the 'Location' header relative to the server URL."""
+        path = parse.urlparse(headers["location"]).path
+        if self.base_path and path.startswith(self.base_path + '/'):
+            path = path[len(self.base_path):]
+        return path
+
+    def _wait_for_operation(self, location):
+        """Wait for the async Heketi operation to finish.
+
+        Returns:
+            str: body of the operation's result or None if it has no body.
+        """
+        deadline, interval = time.time() + self.timeout, 0.1
+        while time.time() < deadline:
+            status, headers, data = self._send("GET", location)
+            if status == 200 and headers.get("x-pending") == "true":
+                time.sleep(interval)
+                interval = min(interval * 2, 2)
+                continue
+            if status == 303:
+                result_path = self._get_location(headers)
+                return self._check_response(
+                    "GET", result_path, *self._send("GET", result_path))
+            if status in (200, 204):
+                return data or None
+            return self._check_response("GET", location, status, headers, data)
+        raise exceptions.ExecutionError(
+            "Heketi operation '%s' didn't finish in %s seconds." % (
+                location, self.timeout))
+
+    def _check_response(self, method, path, status, headers, data):
+        if status == 202:
+            return self._wait_for_operation(self._get_location(headers))
+        if status >= 300:
+            msg = ("Heketi request '%s %s' to '%s' failed with '%s' "
+                   "status. Err: %s" % (
+                       method, path, self.server_url, status, data.strip()))
+            g.log.error(msg)
+            raise AssertionError(msg)
+        return data or None
+
+    def request(self, method, path, body=None):
+        """Send request to Heketi and wait for its operation to finish.
+
+        Args:
+            method (str): HTTP method.
+            path (str): path relative to the server URL, e.g. '/volumes'.
+            body (dict|None): request data to be sent as JSON.
+        Returns:
+            dict|None: parsed JSON response or None if it has no body.
+        Raises:
+            AssertionError: when Heketi rejects request, as 'heketi-cli'
+                based functions do.
+            exceptions.ExecutionError: when Heketi is not reachable or
+                operation didn't finish in time.
+        """
+        data = self._check_response(
+            method, path, *self._send(method, path, body))
+        return json.loads(data) if data else None
+
+    def hello(self):
+        return self._check_response("GET", "/hello", *self._send(
+            "GET", "/hello"))
+
+    def cluster_list(self):
+        return self.request("GET", "/clusters")
+
+    def cluster_info(self, cluster_id):
+        return self.request("GET", "/clusters/%s" % cluster_id)
+
+    def node_info(self, node_id):
+        return self.request("GET", "/nodes/%s" % node_id)
+
+    def device_info(self, device_id):
+        return self.request("GET", "/devices/%s" % device_id)
+
+    def topology_info(self):
+        """Get topology the same way as 'heketi-cli topology info' does."""
+        clusters = []
+        for cluster_id in self.cluster_list()["clusters"]:
+            cluster = self.cluster_info(cluster_id)
+            cluster["nodes"] = [
+                self.node_info(node_id) for node_id in cluster["nodes"]]
+            cluster["volumes"] = [
+                self.volume_info(vol_id) for vol_id in cluster["volumes"]]
+            clusters.append(cluster)
+        return {"clusters": clusters}
+
+    def volume_list(self):
+        return self.request("GET", "/volumes")
+
+    def volume_info(self, volume_id):
+        return self.request("GET", "/volumes/%s" % volume_id)
+
+    def volume_create(self, body):
+        """Create volume.
+
+        Args:
+            body (dict): volume create request, e.g. {'size': 1}.
+        Returns:
+            dict: info of the created volume.
+        """
+        return self.request("POST", "/volumes", body)
+
+    def volume_expand(self, volume_id, expand_size):
+        return self.request(
+            "POST", "/volumes/%s/expand" % volume_id,
+            {"expand_size": int(expand_size)})
+
+    def volume_delete(self, volume_id):
+        return self.request("DELETE", "/volumes/%s" % volume_id)
+
+    def blockvolume_list(self):
+        return self.request("GET", "/blockvolumes")
+
+    def blockvolume_info(self, volume_id):
+        return self.request("GET", "/blockvolumes/%s" % volume_id)
+
+
+def get_heketi_rest_client(server_url, user=None, secret=None):
+    """Get shared REST client for the Heketi server.
+
+    Args:
+        server_url (str): Heketi server URL.
+        user (str|None): Heketi user.
+        secret (str|None): key of the Heketi user.
+    Returns:
+        HeketiRestClient: client shared by all the callers with the same
+            arguments.
+    """
+    key = (server_url, user, secret)
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = _CLIENTS[key] = HeketiRestClient(
+                server_url, user=user, secret=secret)
+    return client
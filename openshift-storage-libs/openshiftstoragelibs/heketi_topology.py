@@ -0,0 +1,201 @@
+"""
+Use this module for indexed access to the Heketi topology.
+
+'HeketiTopology' object is built from single 'heketi-cli topology info
+--json' output and provides maps of clusters, nodes, devices, bricks and
+volumes by their IDs, so helpers which need info about several Heketi
+objects don't have to query each of them separately.
+
+Snapshots are built and cached by the 'heketi_ops.get_heketi_topology'
+function. Cached snapshots are dropped by the 'heketi_ops' functions,
+which change Heketi topology, using the 'invalidates_topology' decorator,
+and by the 'openshift_ops' functions, which create or delete OCP
+resources, because it may cause provisioning or deletion of volumes.
+
+Usage example:
+
+    from openshiftstoragelibs import heketi_ops
+
+    topology = heketi_ops.get_heketi_topology(
+        h_node, h_url, use_cache=True)
+    bricks = topology.get_node_bricks(node_id)
+"""
+
+import functools
+import threading
+import time
+
+from glusto.core import Glusto as g
+
+
+HEKETI_TOPOLOGY_CACHE_TTL = g.config.get("common", {}).get(
+    "heketi_topology_cache_ttl", 60)
+
+_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+
+class HeketiTopology(object):
+    """Snapshot of the Heketi topology indexed by object IDs."""
+
+    def __init__(self, topology_info):
+        """Args:
+            topology_info (dict): output of the 'heketi_topology_info'
+                function called with 'json=True'.
+        """
+        self.topology_info = topology_info
+        self.clusters, self.nodes, self.devices = {}, {}, {}
+        self.bricks, self.volumes = {}, {}
+        for cluster in topology_info.get("clusters") or []:
+            self.clusters[cluster["id"]] = cluster
+            for node in cluster.get("nodes") or []:
+                self.nodes[node["id"]] = node
+                for device in node.get("devices") or []:
+                    self.devices[device["id"]] = device
+                    for brick in device.get("bricks") or []:
+                        self.bricks[brick["id"]] = brick
+            for volume in cluster.get("volumes") or []:
+                self.volumes[volume["id"]] = volume
+
+    def __repr__(self):
+        return "HeketiTopology(%s clusters, %s nodes, %s volumes)" % (
+            len(self.clusters), len(self.nodes), len(self.volumes))
+
+    def get_node_bricks(self, node_id):
+        """Get bricks placed on devices of the node.
+
+        Args:
+            node_id (str): Heketi node ID.
+        Returns:
+            list: brick dicts.
+        Raises:
+            KeyError: if node is not found.
+        """
+        return [
+            brick for device in self.nodes[node_id].get("devices") or []
+            for brick in device.get("bricks") or []]
+
+    def get_volume_bricks(self, volume_id):
+        """Get bricks of the volume.
+
+        Args:
+            volume_id (str): Heketi volume ID.
+        Returns:
+            list: brick dicts.
+        Raises:
+            KeyError: if volume is not found.
+        """
+        return list(self.volumes[volume_id].get("bricks") or [])
+
+    def get_block_hosting_volumes(self):
+        """Get volumes which host block volumes.
+
+        Returns:
+            dict: volume dicts with volume IDs as keys.
+        """
+        return {
+            vol_id: vol for vol_id, vol in self.volumes.items()
+            if vol.get("block")}
+
+    def get_capacity(self, online_only=True):
+        """Get free, used and total space of nodes, devices and zones.
+
+        Args:
+            online_only (bool): defines whether offline nodes and devices
+                should be skipped.
+        Returns:
+            dict: with 'total', 'nodes' and 'zones' keys. Sizes are in KiB,
+                as Heketi reports them. Example:
+                {'total': {'free': 2, 'used': 1, 'total': 3},
+                 'nodes': {'<node-id>': {
+                     'cluster': '<cluster-id>', 'zone': 1,
+                     'hostname': 'node1', 'free': 2, 'used': 1, 'total': 3,
+                     'devices': {'<device-id>': {
+                         'name': '/dev/sdb', 'free': 2, 'used': 1,
+                         'total': 3}}}},
+                 'zones': {1: {'nodes': 1, 'free': 2, 'used': 1,
+                               'total': 3}}}
+        """
+        def _is_online(obj):
+            return (not online_only
+                    or obj.get("state", "").strip().lower() == "online")
+
+        def _sizes():
+            return {"free": 0, "used": 0, "total": 0}
+
+        def _add(target, sizes):
+            for key in ("free", "used", "total"):
+                target[key] += sizes[key]
+
+        capacity = {"total": _sizes(), "nodes": {}, "zones": {}}
+        for node_id, node in self.nodes.items():
+            if not _is_online(node):
+                continue
+            node_capacity = _sizes()
+            node_capacity.update({
+                "cluster": node.get("cluster"),
+                "zone": node.get("zone"),
+                "hostname": (node.get("hostnames", {}).get("manage")
+                             or [None])[0],
+                "devices": {},
+            })
+            for device in node.get("devices") or []:
+                if not _is_online(device):
+                    continue
+                storage = device.get("storage") or _sizes()
+                device_capacity = {"name": device.get("name")}
+                device_capacity.update(
+                    (key, storage.get(key, 0))
+                    for key in ("free", "used", "total"))
+                node_capacity["devices"][device["id"]] = device_capacity
+                _add(node_capacity, device_capacity)
+            capacity["nodes"][node_id] = node_capacity
+            _add(capacity["total"], node_capacity)
+            zone_capacity = capacity["zones"].setdefault(
+                node.get("zone"), dict(_sizes(), nodes=0))
+            zone_capacity["nodes"] += 1
+            _add(zone_capacity, node_capacity)
+        return capacity
+
+
+def get_cached(key):
+    """Get cached snapshot if it is not older than TTL.
+
+    Args:
+        key (tuple): key of the snapshot.
+    Returns:
+        HeketiTopology|None: cached snapshot if any.
+    """
+    if not HEKETI_TOPOLOGY_CACHE_TTL:
+        return None
+    with _CACHE_LOCK:
+        cached_at, topology = _CACHE.get(key, (0, None))
+    if time.time() - cached_at < HEKETI_TOPOLOGY_CACHE_TTL:
+        return topology
+    return None
+
+
+def set_cached(key, topology):
+    with _CACHE_LOCK:
+        _CACHE[key] = (time.time(), topology)
+
+
+def invalidate():
+    """Drop all the cached snapshots."""
+    with _CACHE_LOCK:
+        _CACHE.clear()
+
+
+def invalidates_topology(func):
+    """Decorator dropping cached snapshots after the call of 'func'.
+
+    Snapshots are dropped even if the call fails, because failed
+    operations may change topology partially.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            invalidate()
+    return wrapper
@@ -27,6 +27,7 @@ import six
 
 from openshiftstoragelibs import command
 from openshiftstoragelibs import exceptions
+from openshiftstoragelibs import version_cache
 
 
 HEKETI_VERSION_RE = r"(\d+)(?:\.)(\d+)(?:\.)(\d+)(?:\-)(\d+)$"
@@ -238,9 +239,13 @@ def get_heketi_version(hostname=None, ocp_client_node=None):
     global HEKETI_CLIENT_VERSION
     global HEKETI_SERVER_VERSION
     if not (HEKETI_SERVER_VERSION and HEKETI_CLIENT_VERSION):
-        client_version_str = _get_heketi_client_version_str(hostname=hostname)
-        server_version_str = _get_heketi_server_version_str(
-            ocp_client_node=ocp_client_node)
+        client_version_str = version_cache.get_version_str(
+            "heketi_client",
+            lambda: _get_heketi_client_version_str(hostname=hostname))
+        server_version_str = version_cache.get_version_str(
+            "heketi_server",
+            lambda: _get_heketi_server_version_str(
+                ocp_client_node=ocp_client_node))
         HEKETI_CLIENT_VERSION = HeketiVersion(client_version_str)
         HEKETI_SERVER_VERSION = HeketiVersion(server_version_str)
     return HEKETI_SERVER_VERSION
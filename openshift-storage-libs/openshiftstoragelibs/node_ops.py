@@ -7,10 +7,14 @@ import six
 from openshiftstoragelibs.cloundproviders.vmware import VmWare
 from openshiftstoragelibs import command
 from openshiftstoragelibs import exceptions
+from openshiftstoragelibs import openshift_ops
 from openshiftstoragelibs import waiter
 
 
 CLOUD_PROVIDER = None
+CONNECTIONS_HEALTH_CHECK_INTERVAL = g.config.get("common", {}).get(
+    "connections_health_check_interval", 300)
+_CONNECTIONS_CHECKED_AT = {}
 
 
 def node_reboot_by_command(node, timeout=600, wait_step=10):
@@ -36,6 +40,9 @@ def node_reboot_by_command(node, timeout=600, wait_step=10):
                     "with error: %s" % (node, e))
         raise
 
+    # Gluster PODs get restarted together with the node
+    openshift_ops.invalidate_gluster_pods_cache()
+
     # added sleep as node will restart after 3 sec
     time.sleep(3)
 
@@ -77,6 +84,68 @@ def wait_for_ssh_connection(hostname, timeout=600, interval=10):
     raise exceptions.CloudProviderError(msg)
 
 
+def _get_configured_hostnames():
+    hostnames = []
+    for servers in (
+            g.config.get("ocp_servers", {}).get("master", {}),
+            g.config.get("ocp_servers", {}).get("client", {}),
+            g.config.get("ocp_servers", {}).get("nodes", {}),
+            g.config.get("gluster_servers", {})):
+        hostnames.extend(servers.keys())
+    openshift_config = g.config.get("cns", g.config.get("openshift", {}))
+    heketi_client_node = openshift_config.get(
+        "heketi_config", {}).get("heketi_client_node")
+    if heketi_client_node:
+        hostnames.append(heketi_client_node.strip())
+    return [
+        hostname for i, hostname in enumerate(hostnames)
+        if hostname not in hostnames[:i]]
+
+
+def _check_connection(hostname, rpyc=False):
+    try:
+        command.cmd_run("true", hostname=hostname)
+        if rpyc and not g.rpyc_get_connection(hostname, user="root"):
+            return "Failed to establish rpyc connection."
+    except Exception as e:
+        return six.text_type(e)
+    _CONNECTIONS_CHECKED_AT[hostname] = time.time()
+
+
+def warm_up_connections(hostnames=None, rpyc=False, force=False):
+    """Open and health-check connections to the hosts in parallel.
+
+    Opened connections are kept by Glusto for reuse by the following
+    commands. Hosts which were successfully checked less than
+    'common.connections_health_check_interval' seconds ago are skipped.
+
+    Args:
+        hostnames (list|None): hostnames to connect to. Defaults to all
+            the OCP and Gluster hosts and Heketi client node from config.
+        rpyc (bool): defines whether rpyc connections should be opened too.
+        force (bool): defines whether recently checked hosts should be
+            checked once again.
+    Returns:
+        dict: unreachable hostnames as keys and error messages as values.
+    """
+    if g._command_backend is not None:
+        return {}
+    now = time.time()
+    hostnames = [
+        hostname for hostname in (hostnames or _get_configured_hostnames())
+        if force or (now - _CONNECTIONS_CHECKED_AT.get(hostname, 0)
+                     >= CONNECTIONS_HEALTH_CHECK_INTERVAL)]
+    errors = command.run_in_parallel(
+        lambda hostname: _check_connection(hostname, rpyc=rpyc), hostnames)
+    unreachable = {
+        hostname: error for hostname, error in zip(hostnames, errors)
+        if error}
+    if unreachable:
+        g.log.error("Following hosts are unreachable:\n%s" % "\n".join(
+            "%s: %s" % host_error for host_error in unreachable.items()))
+    return unreachable
+
+
 def _get_cloud_provider():
     """Gather cloud provider facts"""
 
@@ -138,6 +207,7 @@ def power_off_vm_by_name(name):
     cloudProvider = _get_cloud_provider()
     g.log.info('powering off the vm "%s"' % name)
     cloudProvider.power_off_vm_by_name(name)
+    openshift_ops.invalidate_gluster_pods_cache()
     g.log.info('powered off the vm "%s" successfully' % name)
 
 
@@ -155,6 +225,7 @@ def power_on_vm_by_name(name, timeout=600, interval=10):
     cloudProvider = _get_cloud_provider()
     g.log.info('powering on the VM "%s"' % name)
     cloudProvider.power_on_vm_by_name(name)
+    openshift_ops.invalidate_gluster_pods_cache()
     g.log.info('Powered on the VM "%s" successfully' % name)
 
     # Wait for hostname to get assigned
@@ -0,0 +1,268 @@
+"""
+Use this module for reading OCP objects from the local cache.
+
+'ObjectCache' keeps objects of one type of the current project in memory,
+listing them with 'oc get -o json' and then applying changes got from
+the 'oc get -w -o json' stream in background thread. Stream is restarted
+each 'common.object_cache_resync_interval' seconds, which relists
+objects, so changes missed by the watch get fixed.
+
+Cache is used by the read helpers of the 'openshift_ops' module, such as
+'get_pvc_status', 'get_pv_name_from_pvc', 'oc_get_pods',
+'get_pod_names_from_dc_or_rc' and 'oc_get_custom_resource', which fall
+back to the 'oc' commands when cache can not answer the query, e.g.
+when object is not found in it yet or watch is not running.
+
+Objects get relisted on the next read after they are changed by the
+library, e.g. by 'oc_create' or 'oc_delete' functions, and while some
+of them are being deleted, because 'oc' clients older than 4.3 do not
+report types of watch events, so deletions are not seen in the stream.
+
+Usage example:
+
+    from openshiftstoragelibs import object_cache
+
+    pvcs = object_cache.get_cached_objects(ocp_node, 'pvc')
+    if pvcs is None:
+        # Cache is disabled or is not ready, use 'oc' command
+        ...
+
+Set 'common.use_object_cache' config option to 'True' to enable it.
+"""
+try:
+    # py2/3
+    import simplejson as json
+except ImportError:
+    # py2
+    import json
+
+import threading
+import time
+
+from glusto.core import Glusto as g
+import six
+
+from openshiftstoragelibs import command
+from openshiftstoragelibs import openshift_version
+
+
+USE_OBJECT_CACHE = g.config.get("common", {}).get("use_object_cache", False)
+OBJECT_CACHE_RESYNC_INTERVAL = g.config.get("common", {}).get(
+    "object_cache_resync_interval", 60)
+# Resource types, which can be cached, with their aliases
+RTYPES = {
+    "pods": ("po", "pod", "pods"),
+    "pvc": ("pvc", "persistentvolumeclaim", "persistentvolumeclaims"),
+    "pv": ("pv", "persistentvolume", "persistentvolumes"),
+    "dc": ("dc", "deploymentconfig", "deploymentconfigs"),
+    "events": ("ev", "event", "events"),
+}
+RTYPE_ALIASES = {
+    alias: rtype for rtype, aliases in RTYPES.items() for alias in aliases}
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def _get_resource_version(obj):
+    try:
+        return int(obj["metadata"]["resourceVersion"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class ObjectCache(object):
+    """Objects of one type of the current project kept current by watch."""
+
+    def __init__(self, hostname, rtype, resync_interval=None):
+        """Args:
+            hostname (str): node where 'oc' commands run.
+            rtype (str): resource type, one of the 'RTYPES' keys.
+            resync_interval (int|None): seconds after which watch stream
+                is restarted and objects are relisted. Defaults to the
+                'common.object_cache_resync_interval' config option.
+        """
+        self.hostname = hostname
+        self.rtype = rtype
+        self.resync_interval = int(
+            resync_interval or OBJECT_CACHE_RESYNC_INTERVAL)
+        self.watching = False
+        self._objects = {}
+        self._listed_version = None
+        self._stale = True
+        self._lock = threading.Lock()
+        self._list_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._watch_events = None
+
+    def __repr__(self):
+        return "ObjectCache(%s, %s)" % (self.hostname, self.rtype)
+
+    def start(self):
+        """Start watching objects in background thread."""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="object-cache-%s" % self.rtype)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop using the cache.
+
+        Watch command exits on its own within 'resync_interval' seconds.
+        """
+        self._stop_event.set()
+        self.watching = False
+        self._thread = None
+
+    def mark_stale(self):
+        """Make the next read relist objects."""
+        self._stale = True
+
+    def _list(self):
+        with self._list_lock:
+            out = command.cmd_run(
+                "oc get %s -o json" % self.rtype, hostname=self.hostname)
+            items = json.loads(out).get("items") or []
+            versions = list(filter(None, map(_get_resource_version, items)))
+            with self._lock:
+                self._objects = {
+                    obj["metadata"]["name"]: obj for obj in items}
+                self._listed_version = max(versions) if versions else None
+                self._stale = False
+
+    def _apply(self, event_type, obj):
+        name, version = obj["metadata"]["name"], _get_resource_version(obj)
+        with self._lock:
+            current = self._objects.get(name)
+            if version is not None:
+                if current is None:
+                    # NOTE: skip late events of objects deleted before list
+                    if (self._listed_version is not None
+                            and version <= self._listed_version):
+                        return
+                elif version <= (_get_resource_version(current) or 0):
+                    return
+            if event_type == "DELETED":
+                self._objects.pop(name, None)
+            else:
+                self._objects[name] = obj
+
+    def _watch(self):
+        if self._watch_events is None:
+            self._watch_events = (
+                openshift_version.get_openshift_version() >= '4.3')
+        cmd = "timeout %s oc get %s -w -o json%s || true" % (
+            self.resync_interval, self.rtype,
+            " --output-watch-events" if self._watch_events else "")
+        start_time, lines = time.time(), []
+        self.watching = True
+        for line in command.cmd_run_stream(cmd, self.hostname):
+            if self._stop_event.is_set():
+                return
+            lines.append(line)
+            # NOTE: each object is printed as indented JSON document
+            if line.rstrip() != "}":
+                continue
+            data, lines = json.loads("".join(lines)), []
+            if self._watch_events:
+                self._apply(data["type"], data["object"])
+            else:
+                self._apply("MODIFIED", data)
+        if time.time() - start_time < self.resync_interval / 2.0:
+            raise AssertionError(
+                "Watch of '%s' objects on '%s' node exited too early." % (
+                    self.rtype, self.hostname))
+
+    def _run(self):
+        # NOTE: test body may patch shared 'g.run' using 'podcmd.GlustoPod'
+        with command.direct_run():
+            self._watch_until_stopped()
+
+    def _watch_until_stopped(self):
+        while not self._stop_event.is_set():
+            try:
+                self._list()
+                self._watch()
+            except Exception as e:
+                self.watching = False
+                g.log.error("Failed to watch '%s' objects on '%s' node, "
+                            "reads are not served from cache: %s" % (
+                                self.rtype, self.hostname, e))
+                self._stop_event.wait(min(10, self.resync_interval))
+
+    def get_objects(self):
+        """Get cached objects.
+
+        Returns:
+            list|None: objects or None if cache can not be used now.
+        """
+        if not self.watching:
+            return None
+        if self._stale:
+            self._list()
+        with self._lock:
+            objects = list(self._objects.values())
+        if not self._watch_events and any(
+                obj["metadata"].get("deletionTimestamp") for obj in objects):
+            # NOTE: deletion of objects is not seen in the watch stream
+            self._list()
+            with self._lock:
+                objects = list(self._objects.values())
+        return objects
+
+
+def get_cached_objects(hostname, rtype):
+    """Get objects of the current project from the cache.
+
+    Cache of the resource type gets started on the first call.
+
+    Args:
+        hostname (str): node where 'oc' commands run.
+        rtype (str): resource type, e.g. 'pvc' or 'pod'.
+    Returns:
+        list|None: objects or None if cache is disabled, does not support
+            the resource type or is not ready.
+    """
+    rtype = RTYPE_ALIASES.get(six.text_type(rtype).lower())
+    if (not USE_OBJECT_CACHE or rtype is None
+            or g._command_backend is not None):
+        return None
+    with _CACHES_LOCK:
+        cache = _CACHES.get((hostname, rtype))
+        if cache is None:
+            cache = _CACHES[(hostname, rtype)] = ObjectCache(hostname, rtype)
+            cache.start()
+    return cache.get_objects()
+
+
+def mark_stale(hostname=None):
+    """Make the next reads relist objects.
+
+    Should be called after changes of the objects done by the library.
+
+    Args:
+        hostname (str|None): node which caches should be marked. All the
+            caches are marked if None.
+    """
+    with _CACHES_LOCK:
+        caches = list(_CACHES.items())
+    for (cache_hostname, _), cache in caches:
+        if hostname in (None, cache_hostname):
+            cache.mark_stale()
+
+
+def drop_caches(hostname=None):
+    """Stop and drop caches, e.g. when current project gets switched.
+
+    Args:
+        hostname (str|None): node which caches should be dropped. All the
+            caches are dropped if None.
+    """
+    with _CACHES_LOCK:
+        for key in list(_CACHES):
+            if hostname in (None, key[0]):
+                _CACHES.pop(key).stop()
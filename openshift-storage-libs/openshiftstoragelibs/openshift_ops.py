@@ -4,6 +4,7 @@ Various utility functions for interacting with OCP/OpenShift.
 """
 
 import base64
+import calendar
 try:
     # py2/3
     import simplejson as json
@@ -11,32 +12,45 @@ except ImportError:
     # py2
     import json
 import re
+import shlex
 
 from glusto.core import Glusto as g
 from glustolibs.gluster import volume_ops
 import mock
 import six
 import time
-import yaml
 
 from openshiftstoragelibs import command
+from openshiftstoragelibs import event_feed
 from openshiftstoragelibs import exceptions
+from openshiftstoragelibs import heketi_topology
+from openshiftstoragelibs import object_cache
 from openshiftstoragelibs import openshift_version
+from openshiftstoragelibs import pod_session
 from openshiftstoragelibs import utils
 from openshiftstoragelibs import waiter
 from openshiftstoragelibs.heketi_ops import (
     heketi_blockvolume_info,
     heketi_volume_info,
+    invalidate_heketi_pod_cache,
 )
 
 PODS_WIDE_RE = re.compile(
     r'(\S+)\s+(\S+)\s+(\w+)\s+(\d+)\s+(\S+)\s+(\S+)\s+(\S+).*\n')
+SIMPLE_SELECTOR_RE = re.compile(r"^[\w./-]+((==?|!=)[\w./-]*)?$")
 SERVICE_STATUS = "systemctl status %s"
 SERVICE_RESTART = "systemctl restart %s"
 SERVICE_STATUS_REGEX = r"Active: (.*) \((.*)\) since .*;.*"
 PGREP_SERVICE = "pgrep %s"
 KILL_SERVICE = "kill -9 %s"
 IS_ACTIVE_SERVICE = "systemctl is-active %s"
+# Max size of JSON of resources created by one 'oc create' command, which
+# is passed as single argument of remote shell limited to 128 KiB
+OC_CREATE_LIST_MAX_SIZE = 64 * 1024
+APP_DC_WITH_IO_NAME_PREFIX = "autotests-dc-with-app-io"
+GLUSTER_PODS_CACHE_TTL = g.config.get("common", {}).get(
+    "gluster_pods_cache_ttl", 60)
+_GLUSTER_PODS_CACHE = {}
 
 
 def oc_get_pods(ocp_node, selector=None):
@@ -51,15 +65,88 @@ def oc_get_pods(ocp_node, selector=None):
         dict : dict of pods info in the current project.
     """
 
+    pods = _get_cached_objects(ocp_node, 'pods', selector=selector)
+    if pods is not None:
+        return _parse_wide_pods_output(
+            [_get_wide_pod_line(pod) for pod in pods])
+
     cmd = "oc get -o wide --no-headers=true pods"
     if selector:
         cmd += " --selector %s" % selector
-    out = command.cmd_run(cmd, hostname=ocp_node)
-    return _parse_wide_pods_output(out)
+    return _parse_wide_pods_output(
+        command.cmd_run_stream(cmd, hostname=ocp_node))
+
+
+def _get_cached_objects(ocp_node, rtype, selector=None):
+    """Get objects from the cache filtering them by label selector.
+
+    Returns:
+        list|None: objects sorted by name or None if cache can not be used.
+    """
+    if isinstance(selector, list):
+        selector = ','.join(selector)
+    if selector and not all(
+            SIMPLE_SELECTOR_RE.match(requirement)
+            for requirement in selector.split(',')):
+        return None
+    objects = object_cache.get_cached_objects(ocp_node, rtype)
+    if objects is None:
+        return None
+    return sorted(
+        (obj for obj in objects if utils.match_label_selector(
+            obj['metadata'].get('labels') or {}, selector)),
+        key=lambda obj: obj['metadata']['name'])
+
+
+def _get_age(timestamp):
+    """Get age of the object in the 'oc get' output format."""
+    try:
+        seconds = int(time.time() - calendar.timegm(
+            time.strptime(timestamp, '%Y-%m-%dT%H:%M:%SZ')))
+    except (TypeError, ValueError):
+        return '<unknown>'
+    for unit, unit_seconds, limit in (
+            ('s', 1, 120), ('m', 60, 180), ('h', 3600, 48),
+            ('d', 86400, 730)):
+        if seconds < unit_seconds * limit:
+            return '%d%s' % (max(seconds, 0) // unit_seconds, unit)
+    return '%dy' % (seconds // (86400 * 365))
+
+
+def _get_wide_pod_line(pod):
+    """Build line of the 'oc get -o wide pods' output for the POD."""
+    status, spec = pod.get('status') or {}, pod.get('spec') or {}
+    container_statuses = status.get('containerStatuses') or []
+    reason = status.get('reason') or status.get('phase') or 'Unknown'
+    for container_status in reversed(container_statuses):
+        state = container_status.get('state') or {}
+        if (state.get('waiting') or {}).get('reason'):
+            reason = state['waiting']['reason']
+        elif (state.get('terminated') or {}).get('reason'):
+            reason = state['terminated']['reason']
+    if pod['metadata'].get('deletionTimestamp'):
+        reason = (
+            'Unknown' if status.get('reason') == 'NodeLost'
+            else 'Terminating')
+    return '%s %s/%s %s %s %s %s %s\n' % (
+        pod['metadata']['name'],
+        len([c for c in container_statuses if c.get('ready')]),
+        len(spec.get('containers') or []),
+        reason,
+        sum(c.get('restartCount', 0) for c in container_statuses),
+        _get_age(pod['metadata'].get('creationTimestamp')),
+        status.get('podIP') or '<none>',
+        spec.get('nodeName') or '<none>')
 
 
 def _parse_wide_pods_output(output):
     """Parse the output of `oc get -o wide pods`.
+
+    Args:
+        output (str|iterable): whole output or iterable over its lines,
+            such as the one returned by 'command.cmd_run_stream'.
+    Returns:
+        dict: pod names as keys and dicts with pod info as values.
     """
     # Interestingly, the output of get pods is "cooked" in such a way that
     # the values in the ready, status, & restart fields are not accessible
@@ -72,9 +159,13 @@ def _parse_wide_pods_output(output):
     #
     # TODO: Add unit tests for this parser
     pods_info = {}
-    if not output.endswith('\n'):
-        output = output + '\n'
-    for each_pod_info in PODS_WIDE_RE.findall(output):
+    if isinstance(output, six.string_types):
+        output = output.splitlines()
+    for line in output:
+        each_pod_info = PODS_WIDE_RE.match(line.rstrip('\n') + '\n')
+        if not each_pod_info:
+            continue
+        each_pod_info = each_pod_info.groups()
         pods_info[each_pod_info[0]] = {
             'ready': each_pod_info[1],
             'status': each_pod_info[2],
@@ -87,26 +178,29 @@ def _parse_wide_pods_output(output):
 
 
 def oc_get_pods_full(ocp_node):
-    """Gets all the pod info via YAML in the current project.
+    """Gets all the pod info via JSON in the current project.
 
     Args:
         ocp_node (str): Node in which ocp command will be executed.
 
     Returns:
-        dict: The YAML output converted to python objects
+        dict: The JSON output converted to python objects
             (a top-level dict)
     """
 
-    cmd = "oc get -o yaml pods"
+    cmd = "oc get -o json pods"
     out = command.cmd_run(cmd, hostname=ocp_node)
-    return yaml.load(out)
+    return json.loads(out)
 
 
-def get_ocp_gluster_pod_details(ocp_node):
+def get_ocp_gluster_pod_details(ocp_node, use_cache=False):
     """Gets the gluster pod names in the current project.
 
     Args:
         ocp_node (str): Node in which ocp command will be executed.
+        use_cache (bool): defines whether data cached less than
+            'common.gluster_pods_cache_ttl' seconds ago can be returned
+            instead of querying the cluster.
 
     Returns:
         list: List of dicts, which consist of following key-value pairs:
@@ -124,10 +218,18 @@ def get_ocp_gluster_pod_details(ocp_node):
         ".:status.containerStatuses[0].restartCount"]
     pod_selector = "glusterfs-node=pod"
 
+    if use_cache and GLUSTER_PODS_CACHE_TTL:
+        cached_at, gluster_pod_details = _GLUSTER_PODS_CACHE.get(
+            ocp_node, (0, None))
+        if (gluster_pod_details is not None
+                and time.time() - cached_at < GLUSTER_PODS_CACHE_TTL):
+            return [dict(pod) for pod in gluster_pod_details]
+
     gluster_pods = oc_get_custom_resource(
         ocp_node, "pod", pod_columns, selector=pod_selector)
 
     if not gluster_pods[0]:
+        _GLUSTER_PODS_CACHE[ocp_node] = (time.time(), [])
         return []
 
     gluster_pod_details = list(map(
@@ -140,10 +242,28 @@ def get_ocp_gluster_pod_details(ocp_node):
             "pod_restarts": pod[5],
         }, gluster_pods
     ))
+    _GLUSTER_PODS_CACHE[ocp_node] = (
+        time.time(), [dict(pod) for pod in gluster_pod_details])
 
     return gluster_pod_details
 
 
+def invalidate_gluster_pods_cache(ocp_node=None):
+    """Drop cached Gluster PODs data.
+
+    Should be called when Gluster PODs may get changed, for example,
+    on POD restarts and node reboots.
+
+    Args:
+        ocp_node (str): node which cached data should be dropped for.
+            If not specified, then whole cache gets dropped.
+    """
+    if ocp_node:
+        _GLUSTER_PODS_CACHE.pop(ocp_node, None)
+    else:
+        _GLUSTER_PODS_CACHE.clear()
+
+
 def get_amount_of_gluster_nodes(ocp_node):
     """Calculate amount of Gluster nodes.
 
@@ -182,6 +302,8 @@ def switch_oc_project(ocp_node, project_name):
 
     cmd = "oc project %s" % project_name
     command.cmd_run(cmd, hostname=ocp_node)
+    object_cache.drop_caches(ocp_node)
+    event_feed.drop_feeds(ocp_node)
     return True
 
 
@@ -196,6 +318,10 @@ def oc_rsh(ocp_node, pod_name, cmd):
     Returns:
         A tuple consisting of the command return code, stdout, and stderr.
     """
+    if pod_session.USE_POD_SESSIONS:
+        stdout = pod_session.cmd_run_in_pod(cmd, ocp_node, pod_name=pod_name)
+        return (0, stdout, '')
+
     prefix = ['oc', 'rsh', pod_name]
     if isinstance(cmd, six.string_types):
         cmd = ' '.join(prefix + [cmd])
@@ -205,6 +331,7 @@ def oc_rsh(ocp_node, pod_name, cmd):
     return (0, stdout, '')
 
 
+@heketi_topology.invalidates_topology
 def oc_create(ocp_node, value, value_type='file'):
     """Create a resource based on the contents of the given file name.
 
@@ -216,14 +343,71 @@ def oc_create(ocp_node, value, value_type='file'):
     Raises:
         AssertionError: Raised when resource fails to create.
     """
-    if value_type == 'file':
-        cmd = ['oc', 'create', '-f', value]
-    else:
-        cmd = ['echo', '\'%s\'' % value, '|', 'oc', 'create', '-f', '-']
-    command.cmd_run(cmd, hostname=ocp_node)
+    command.cmd_run(_get_oc_create_cmd(value, value_type), hostname=ocp_node)
+    object_cache.mark_stale(ocp_node)
     g.log.info('Created resource from %s.' % value_type)
 
 
+def oc_create_list(ocp_node, items):
+    """Create bunch of resources using 'List' objects.
+
+    Resources are split into Lists, which JSON does not exceed
+    'OC_CREATE_LIST_MAX_SIZE' bytes, each one is created using one
+    'oc create' command.
+
+    Args:
+        ocp_node (str): Node on which the ocp command will run
+        items (list): dicts with definitions of the resources.
+    Returns:
+        list: names of the resources in the order of 'items'.
+    Raises:
+        AssertionError: Raised when any of resources fails to create.
+    """
+    chunks, chunk_size = [[]], 0
+    for item in items:
+        item_size = len(json.dumps(item)) + 2
+        if chunks[-1] and chunk_size + item_size > OC_CREATE_LIST_MAX_SIZE:
+            chunks.append([])
+            chunk_size = 0
+        chunks[-1].append(item)
+        chunk_size += item_size
+    for chunk in filter(None, chunks):
+        oc_create(ocp_node, json.dumps({
+            "kind": "List",
+            "apiVersion": "v1",
+            "items": chunk,
+        }), 'stdin')
+    return [item["metadata"]["name"] for item in items]
+
+
+def oc_create_async(ocp_node, value, value_type='file'):
+    """Non-blocking variant of the 'oc_create' function.
+
+    Args:
+        ocp_node (str): Node on which the ocp command will run
+        value (str): Filename (on remote) or file data
+            to be passed to oc create command.
+        value_type (str): either 'file' or 'stdin'.
+    Returns:
+        command.AsyncCmd: handle of the command. Its 'result' method
+            raises AssertionError when resource fails to create.
+    """
+    def _processor(out):
+        object_cache.mark_stale(ocp_node)
+        g.log.info('Created resource from %s.' % value_type)
+        return out
+
+    return command.cmd_run_async(
+        _get_oc_create_cmd(value, value_type), ocp_node,
+        processor=_processor)
+
+
+def _get_oc_create_cmd(value, value_type):
+    if value_type == 'file':
+        return ['oc', 'create', '-f', value]
+    return ['echo', '\'%s\'' % value, '|', 'oc', 'create', '-f', '-']
+
+
 def oc_process(ocp_node, params, filename):
     """Create a resource template based on the contents of the
        given filename and params provided.
@@ -314,6 +498,7 @@ def oc_create_sc(hostname, sc_name_prefix="autotests-sc",
     return sc_name
 
 
+@heketi_topology.invalidates_topology
 def oc_create_pvc(hostname, sc_name=None, pvc_name_prefix="autotests-pvc",
                   pvc_size=1):
     """Create PVC using data provided as stdin input.
@@ -325,6 +510,31 @@ def oc_create_pvc(hostname, sc_name=None, pvc_name_prefix="autotests-pvc",
                                random str.
         pvc_size (int/str): size of PVC in Gb
     """
+    pvc_data = _get_pvc_data(sc_name, pvc_name_prefix, pvc_size)
+    oc_create(hostname, json.dumps(pvc_data), 'stdin')
+    return pvc_data["metadata"]["name"]
+
+
+def oc_create_pvcs(hostname, sc_name=None, pvc_name_prefix="autotests-pvc",
+                   pvc_size=1, pvc_amount=1):
+    """Create bunch of PVCs using one 'oc create' command.
+
+    Args:
+        hostname (str): Node on which 'oc create' command will be executed.
+        sc_name (str): name of a storage class to create PVCs in.
+        pvc_name_prefix (str): PVC names will consist of this prefix and
+                               random str.
+        pvc_size (int/str): size of each PVC in Gb
+        pvc_amount (int): amount of PVCs to create.
+    Returns:
+        list: names of the created PVCs.
+    """
+    return oc_create_list(hostname, [
+        _get_pvc_data(sc_name, pvc_name_prefix, pvc_size)
+        for i in range(pvc_amount)])
+
+
+def _get_pvc_data(sc_name, pvc_name_prefix, pvc_size):
     pvc_name = "%s-%s" % (pvc_name_prefix, utils.get_random_str())
     metadata = {"name": pvc_name}
     if sc_name:
@@ -332,7 +542,7 @@ def oc_create_pvc(hostname, sc_name=None, pvc_name_prefix="autotests-pvc",
             "volume.kubernetes.io/storage-class": sc_name,
             "volume.beta.kubernetes.io/storage-class": sc_name,
         }
-    pvc_data = json.dumps({
+    return {
         "kind": "PersistentVolumeClaim",
         "apiVersion": "v1",
         "metadata": metadata,
@@ -340,13 +550,23 @@ def oc_create_pvc(hostname, sc_name=None, pvc_name_prefix="autotests-pvc",
             "accessModes": ["ReadWriteOnce"],
             "resources": {"requests": {"storage": "%sGi" % pvc_size}}
         },
-    })
-    oc_create(hostname, pvc_data, 'stdin')
-    return pvc_name
+    }
+
+
+def get_app_dc_with_io_name(dc_name_prefix=APP_DC_WITH_IO_NAME_PREFIX):
+    """Generate name for the DC with app PODs running I/O.
+
+    Args:
+        dc_name_prefix (str): DC name will consist of this prefix and
+                              random str.
+    Returns:
+        str: name of the DC.
+    """
+    return "%s-%s" % (dc_name_prefix, utils.get_random_str())
 
 
 def oc_create_app_dc_with_io(
-        hostname, pvc_name, dc_name_prefix="autotests-dc-with-app-io",
+        hostname, pvc_name, dc_name_prefix=APP_DC_WITH_IO_NAME_PREFIX,
         replicas=1, space_to_use=1048576):
     """Create DC with app PODs and attached PVC, constantly running I/O.
 
@@ -359,7 +579,44 @@ def oc_create_app_dc_with_io(
         replicas (int): amount of application POD replicas.
         space_to_use (int): value in bytes which will be used for I/O.
     """
-    dc_name = "%s-%s" % (dc_name_prefix, utils.get_random_str())
+    dc_data = _get_app_dc_with_io_data(
+        pvc_name, dc_name_prefix, replicas, space_to_use)
+    oc_create(hostname, json.dumps(dc_data), 'stdin')
+    return dc_data["metadata"]["name"]
+
+
+def oc_create_app_dcs_with_io(
+        hostname, pvc_names, dc_name_prefix=APP_DC_WITH_IO_NAME_PREFIX,
+        replicas=1, space_to_use=1048576, dc_names=None):
+    """Create bunch of DCs using one 'oc create' command.
+
+    Each DC gets its own PVC attached to the app PODs running I/O.
+
+    Args:
+        hostname (str): Node on which 'oc create' command will be executed.
+        pvc_names (iterable): names of the PVCs, one per DC.
+        dc_name_prefix (str): DC names will consist of this prefix and
+                              random str.
+        replicas (int): amount of application POD replicas of each DC.
+        space_to_use (int): value in bytes which will be used for I/O.
+        dc_names (iterable|None): names of the DCs, one per PVC, e.g.
+            generated by the caller to register cleanups before creation.
+            'dc_name_prefix' is ignored if provided.
+    Returns:
+        list: names of the created DCs in the order of 'pvc_names'.
+    """
+    pvc_names = list(pvc_names)
+    dc_names = list(dc_names or [None] * len(pvc_names))
+    return oc_create_list(hostname, [
+        _get_app_dc_with_io_data(
+            pvc_name, dc_name_prefix, replicas, space_to_use,
+            dc_name=dc_name)
+        for pvc_name, dc_name in zip(pvc_names, dc_names)])
+
+
+def _get_app_dc_with_io_data(pvc_name, dc_name_prefix, replicas,
+                             space_to_use, dc_name=None):
+    dc_name = dc_name or get_app_dc_with_io_name(dc_name_prefix)
     container_data = {
         "name": dc_name,
         "image": "cirros",
@@ -385,7 +642,7 @@ def oc_create_app_dc_with_io(
             ]},
         },
     }
-    dc_data = json.dumps({
+    return {
         "kind": "DeploymentConfig",
         "apiVersion": "v1",
         "metadata": {"name": dc_name},
@@ -407,16 +664,35 @@ def oc_create_app_dc_with_io(
                 }
             }
         }
-    })
-    oc_create(hostname, dc_data, 'stdin')
-    return dc_name
+    }
 
 
 def oc_create_tiny_pod_with_volume(hostname, pvc_name, pod_name_prefix='',
                                    mount_path='/mnt'):
     """Create tiny POD from image in 10Mb with attached volume at /mnt"""
+    pod_data = _get_tiny_pod_with_volume_data(
+        pvc_name, pod_name_prefix, mount_path)
+    oc_create(hostname, json.dumps(pod_data), 'stdin')
+    return pod_data["metadata"]["name"]
+
+
+def oc_create_tiny_pods_with_volume(hostname, pvc_names, pod_name_prefix='',
+                                    mount_path='/mnt'):
+    """Create bunch of tiny PODs using one 'oc create' command.
+
+    Each POD gets its own PVC attached at 'mount_path'.
+
+    Returns:
+        list: names of the created PODs in the order of 'pvc_names'.
+    """
+    return oc_create_list(hostname, [
+        _get_tiny_pod_with_volume_data(pvc_name, pod_name_prefix, mount_path)
+        for pvc_name in pvc_names])
+
+
+def _get_tiny_pod_with_volume_data(pvc_name, pod_name_prefix, mount_path):
     pod_name = "%s-%s" % (pod_name_prefix, utils.get_random_str())
-    pod_data = json.dumps({
+    return {
         "apiVersion": "v1",
         "kind": "Pod",
         "metadata": {
@@ -440,11 +716,10 @@ def oc_create_tiny_pod_with_volume(hostname, pvc_name, pod_name_prefix='',
             }],
             "restartPolicy": "Never",
         }
-    })
-    oc_create(hostname, pod_data, 'stdin')
-    return pod_name
+    }
 
 
+@heketi_topology.invalidates_topology
 def oc_delete(ocp_node, rtype, name, raise_on_absence=True):
     """Delete an OCP resource by name.
 
@@ -465,6 +740,10 @@ def oc_delete(ocp_node, rtype, name, raise_on_absence=True):
         cmd.append('--wait=false')
 
     command.cmd_run(cmd, hostname=ocp_node)
+    object_cache.mark_stale(ocp_node)
+    if rtype in ('pod', 'pods', 'po'):
+        invalidate_gluster_pods_cache()
+        invalidate_heketi_pod_cache()
     g.log.info('Deleted resource: %r %r', rtype, name)
 
 
@@ -491,6 +770,12 @@ def oc_get_custom_resource(ocp_node, rtype, custom, name=None, selector=None,
                 ocp_node, "pvc", ":.metadata.name"
             )
     """
+    out = _get_cached_custom_columns_output(
+        ocp_node, rtype, custom, name=name, selector=selector,
+        field_selector=field_selector)
+    if out is not None:
+        return _parse_custom_columns_output(out, name, field_selector)
+
     cmd = ['oc', 'get', rtype, '--no-headers']
 
     if name:
@@ -514,6 +799,13 @@ def oc_get_custom_resource(ocp_node, rtype, custom, name=None, selector=None,
         ','.join(custom) if isinstance(custom, list) else custom))
 
     out = command.cmd_run(cmd, hostname=ocp_node)
+    return _parse_custom_columns_output(out, name, field_selector)
+
+
+def _parse_custom_columns_output(out, name=None, field_selector=None):
+    if field_selector:
+        field_selector = (field_selector.split(',') if isinstance(
+            field_selector, six.string_types) else field_selector)
 
     if name:
         return list(filter(None, map(str.strip, (out.strip()).split(' '))))
@@ -539,6 +831,40 @@ def oc_get_custom_resource(ocp_node, rtype, custom, name=None, selector=None,
     return out_list
 
 
+def _get_cached_custom_columns_output(ocp_node, rtype, custom, name=None,
+                                      selector=None, field_selector=None):
+    """Build 'oc get -o custom-columns' output using cached objects.
+
+    Returns:
+        str|None: output or None if cache can not be used for the query.
+    """
+    custom = ','.join(custom) if isinstance(custom, list) else custom
+    field_selector = (field_selector.split(',') if isinstance(
+        field_selector, six.string_types) else field_selector or [])
+    try:
+        # NOTE: custom columns are unquoted by shell for 'oc' command
+        paths = [
+            column.partition(':')[2]
+            for column in shlex.split(custom)[0].split(',')] + [
+            re.split('=|!=', fs)[0] for fs in field_selector]
+    except (IndexError, ValueError):
+        return None
+    if not all(map(utils.is_json_path_supported, paths)):
+        return None
+    objects = _get_cached_objects(ocp_node, rtype, selector=selector)
+    if objects is None:
+        return None
+    if name:
+        objects = [obj for obj in objects if obj['metadata']['name'] == name]
+        if not objects:
+            return None
+    return '\n'.join(
+        ' '.join(
+            utils.format_json_path_value(utils.get_by_json_path(obj, path))
+            for path in paths)
+        for obj in objects)
+
+
 def get_block_provisioner(ocp_node):
     return oc_get_custom_resource(
         ocp_node, 'dc', selector="glusterblock",
@@ -562,12 +888,38 @@ def oc_get_yaml(ocp_node, rtype, name=None, raise_on_error=True):
         AssertionError: Raised when unable to get resource and
             `raise_on_error` is true.
     """
-    cmd = ['oc', 'get', '-oyaml', rtype]
+    out = command.cmd_run(
+        _get_oc_get_json_cmd(rtype, name), hostname=ocp_node,
+        raise_on_error=raise_on_error)
+    return json.loads(out) if out else {}
+
+
+def oc_get_yaml_async(ocp_node, rtype, name=None, raise_on_error=True):
+    """Non-blocking variant of the 'oc_get_yaml' function.
+
+    Args:
+        ocp_node (str): Node on which the ocp command will run.
+        rtype (str): Name of the resource type (pod, storageClass, etc).
+        name (str|None): Name of the resource to fetch.
+        raise_on_error (bool): If set to true a failure to fetch
+            resource inforation will raise an error, otherwise
+            an empty dict will be returned.
+    Returns:
+        command.AsyncCmd: handle of the command. Its 'result' method
+            returns dict with data about the resource.
+    """
+    return command.cmd_run_async(
+        _get_oc_get_json_cmd(rtype, name), ocp_node,
+        raise_on_error=raise_on_error,
+        processor=lambda out: json.loads(out) if out else {})
+
+
+def _get_oc_get_json_cmd(rtype, name=None):
+    # NOTE: JSON is parsed many times faster than YAML with the same data
+    cmd = ['oc', 'get', '-ojson', rtype]
     if name is not None:
         cmd.append(name)
-    out = command.cmd_run(
-        cmd, hostname=ocp_node, raise_on_error=raise_on_error)
-    return yaml.load(out) if out else {}
+    return cmd
 
 
 def oc_get_pvc(ocp_node, name):
@@ -617,6 +969,7 @@ def oc_label(hostname, rtype, rname, label):
     """
     cmd = "oc label %s %s %s" % (rtype, rname, label)
     out = command.cmd_run(cmd, hostname=hostname)
+    object_cache.mark_stale(hostname)
 
     return out
 
@@ -626,6 +979,9 @@ def wait_for_resources_absence(ocp_node, rtype, names,
     """Wait for an absence of any set of resources of one type.
 
     If provided resource type is 'pvc' then 'pv's are also checked.
+    On each step all the resources of the type are listed using one
+    command and compared with the names still being waited for.
+    PVCs and PVs bound to them are listed together.
 
     Args:
         ocp_node (str): OCP node to perform oc client operations on.
@@ -638,44 +994,68 @@ def wait_for_resources_absence(ocp_node, rtype, names,
     if len(names[0]) == 1:
         names = (names, )
     resources = {name: {'resource': 'not_checked'} for name in names}
-    for name in names:
-        for w in _waiter:
-            try:
-                resources[name]['resource'] = oc_get_yaml(
-                    ocp_node, rtype, name, raise_on_error=True)
-            except AssertionError:
-                # NOTE(vponomar): Reset attempts for waiter to avoid redundant
-                # sleep equal to 'interval' on the next usage.
-                _waiter._attempt = 0
-                resources[name]['resource'] = 'absent'
-                break
     if rtype == 'pvc':
         for name in names:
             resources[name]['pv_name'] = '?'
-            for w in _waiter:
-                try:
-                    _pv_name = get_pv_name_from_pvc(ocp_node, name)
-                    if resources[name]['pv_name'] == '?':
-                        resources[name]['pv_name'] = _pv_name
-                except AssertionError:
-                    _waiter._attempt = 0
-                    resources[name]['pv_name'] = 'absent'
-                    break
+    cmd = ("oc get %s --no-headers -o=custom-columns="
+           ":.kind,:.metadata.name,:.spec.claimRef.name,"
+           ":.spec.claimRef.namespace" % (
+               'pvc,pv' if rtype == 'pvc' else rtype))
+    namespace, remaining_names = None, list(names)
+    for w in _waiter:
+        present_names, present_pv_names = set(), {}
+        try:
+            if rtype == 'pvc' and namespace is None:
+                namespace = command.cmd_run(
+                    "oc project -q", hostname=ocp_node).strip()
+            out = command.cmd_run(cmd, hostname=ocp_node)
+        except (AssertionError, exceptions.ExecutionError) as e:
+            # NOTE: API server may be unavailable for a while, e.g. during
+            # failover, so let the timeout report the failure.
+            g.log.info("Failed to list '%s' resources: %s" % (rtype, e))
+            continue
+        for line in out.splitlines():
+            columns = line.split()
+            if len(columns) < 4:
+                continue
+            if rtype == 'pvc' and columns[0] == 'PersistentVolume':
+                if columns[2] in resources and columns[3] == namespace:
+                    present_pv_names[columns[2]] = columns[1]
+            else:
+                present_names.add(columns[1])
+        for name in names:
+            resources[name]['resource'] = (
+                'present' if name in present_names else 'absent')
+            if name in present_pv_names:
+                resources[name]['pv_name'] = present_pv_names[name]
+        remaining_names = [
+            name for name in names
+            if name in present_names or name in present_pv_names]
+        if not remaining_names:
+            break
+        g.log.info("%s of %s '%s' resources are still present." % (
+            len(remaining_names), len(names), rtype))
     if _waiter.expired:
         # Gather more info for ease of debugging
-        for name in names:
-            try:
-                r_events = get_events(ocp_node, obj_name=name)
-            except Exception:
-                r_events = '?'
-            resources[name]['events'] = r_events
-            if rtype == 'pvc' and resources[name]['pv_name'] != '?':
+        for name in remaining_names:
+            if resources[name]['resource'] == 'present':
                 try:
-                    pv_events = get_events(
-                        ocp_node, obj_name=resources[name]['pv_name'])
+                    resources[name]['resource'] = oc_get_yaml(
+                        ocp_node, rtype, name)
                 except Exception:
-                    pv_events = '?'
-                resources[name]['pv_events'] = pv_events
+                    pass
+        try:
+            events = get_events(ocp_node)
+        except Exception:
+            events = None
+        for name in names:
+            resources[name]['events'] = (
+                '?' if events is None else _filter_events(
+                    events, obj_name=name))
+            if rtype == 'pvc' and resources[name]['pv_name'] != '?':
+                resources[name]['pv_events'] = (
+                    '?' if events is None else _filter_events(
+                        events, obj_name=resources[name]['pv_name']))
         error_msg = (
             "Failed to wait %d seconds for some of the provided resources "
             "to be absent.\nResource type: '%s'\nResource names:  %s\n"
@@ -721,6 +1101,8 @@ def scale_dcs_pod_amount_and_wait(hostname, dc_names, pod_amount=1,
         namespace_arg, pod_amount, " dc/".join(dc_names))
 
     command.cmd_run(scale_cmd, hostname=hostname)
+    object_cache.mark_stale(hostname)
+    invalidate_heketi_pod_cache()
 
     for dc_name in dc_names:
         dc_and_pod_names[dc_name] = get_pod_names_from_dc(hostname, dc_name)
@@ -849,6 +1231,7 @@ def wait_for_gluster_pod_be_ready_on_specific_node(
         ocp_client_node, gluster_hostname, selector=selector)
     wait_for_pod_be_ready(
         ocp_client_node, g_pod_name, timeout=timeout, wait_step=wait_step)
+    invalidate_gluster_pods_cache()
 
 
 def get_gluster_pod_name_for_specific_node(
@@ -903,6 +1286,10 @@ def cmd_run_on_gluster_pod_or_node(
 
         for gluster_pod_name in gluster_pod_names:
             try:
+                if pod_session.USE_POD_SESSIONS:
+                    return pod_session.cmd_run_in_pod(
+                        cmd, ocp_client_node, pod_name=gluster_pod_name,
+                        raise_on_error=raise_on_error)
                 pod_cmd = "oc exec %s -- %s" % (gluster_pod_name, cmd)
                 return command.cmd_run(
                     pod_cmd, hostname=ocp_client_node,
@@ -1086,12 +1473,13 @@ def wait_for_pods_be_ready(
                 "Unable to find pod with selector %s" % selector)
         status = [status for _, status in pod_status]
         if len(status) == pod_count == status.count("True"):
+            invalidate_gluster_pods_cache()
             return
     try:
+        events = get_events(hostname, obj_type="Pod")
         pod_events = ""
         for pod_name, _ in pod_status:
-            pod_events += (
-                "\n" + get_events(hostname, obj_name=pod_name, obj_type="Pod"))
+            pod_events += "\n%s" % _filter_events(events, obj_name=pod_name)
     except Exception:
         pod_events = "?"
 
@@ -1126,9 +1514,20 @@ def get_pod_names_from_dc_or_rc(
         "oc get pods --all-namespaces -o=custom-columns=:.metadata.name "
         "--no-headers=true --selector %s=%s" % (
             "deploymentconfig" if rtype == "dc" else "name", rname))
-    replicas = int(command.cmd_run(get_replicas_amount_cmd, hostname=hostname))
+    dcs = (_get_cached_objects(hostname, 'dc') or []) if rtype == 'dc' else []
+    dc = ([d for d in dcs if d['metadata']['name'] == rname] or [None])[0]
+    if dc is not None:
+        replicas = int(dc['spec'].get('replicas', 1))
+    else:
+        replicas = int(
+            command.cmd_run(get_replicas_amount_cmd, hostname=hostname))
     for w in waiter.Waiter(timeout, wait_step):
-        out = command.cmd_run(get_pod_names_cmd, hostname=hostname)
+        pods = dc and _get_cached_objects(
+            hostname, 'pods', selector='deploymentconfig=%s' % rname)
+        if pods is not None:
+            out = '\n'.join(pod['metadata']['name'] for pod in pods)
+        else:
+            out = command.cmd_run(get_pod_names_cmd, hostname=hostname)
         pod_names = [o.strip() for o in out.split('\n') if o.strip()]
         if len(pod_names) != replicas:
             continue
@@ -1170,15 +1569,42 @@ def get_pvc_status(hostname, pvc_name):
          bool, status (str): True, status of pvc
                otherwise False, error message.
     '''
+    pvcs = [pvc for pvc in _get_cached_objects(hostname, 'pvc') or []
+            if pvc['metadata']['name'] == pvc_name]
+    if pvcs:
+        if pvcs[0]['metadata'].get('deletionTimestamp'):
+            return 'Terminating'
+        return pvcs[0].get('status', {}).get('phase', '')
+
     cmd = "oc get pvc | grep %s | awk '{print $2}'" % pvc_name
     out = command.cmd_run(cmd, hostname=hostname)
     output = out.split("\n")[0].strip()
     return output
 
 
+def get_pvcs_phases(hostname):
+    """Get phases of all the PVCs of the current project using one command.
+
+    Args:
+        hostname (str): hostname on which oc command will be executed.
+    Returns:
+        dict: PVC phases, like 'Bound' or 'Pending', with PVC names as keys.
+    """
+    cmd = ("oc get pvc --no-headers "
+           "-o=custom-columns=:.metadata.name,:.status.phase")
+    out = command.cmd_run(cmd, hostname=hostname)
+    return dict(
+        line.split()[:2] for line in out.splitlines()
+        if len(line.split()) > 1)
+
+
 def wait_for_pvcs_be_bound(hostname, pvc_names, timeout=120, wait_step=3):
     """Wait for bunch of PVCs to be in 'Bound' state.
 
+    States of all the PVCs are got using single command on each step,
+    so PVCs are waited for together and ones bound earlier than others
+    do not cost separate checks.
+
     Args:
         hostname (str): hostname on which oc commands will be executed.
         pvc_names (iterable): bunch of PVC names to be waited for.
@@ -1191,29 +1617,27 @@ def wait_for_pvcs_be_bound(hostname, pvc_names, timeout=120, wait_step=3):
     if len(pvc_names[0]) == 1:
         pvc_names = (pvc_names, )
     pvc_data = {pvc_name: {'state': 'not_checked'} for pvc_name in pvc_names}
-    for pvc_name in pvc_names:
-        pvc_not_found_counter = 0
-        for w in _waiter:
-            output = get_pvc_status(hostname, pvc_name)
+    not_bound_pvc_names, not_found_pvc_names = set(pvc_names), set()
+    for w in _waiter:
+        pvcs_phases = get_pvcs_phases(hostname)
+        for pvc_name in sorted(not_bound_pvc_names):
+            output, msg = pvcs_phases.get(pvc_name), None
             pvc_data[pvc_name]['state'] = output
             if not output:
-                g.log.info("PVC '%s' not found, sleep for %ssec." % (
-                    pvc_name, wait_step))
                 pvc_data[pvc_name]['state'] = 'not_found'
-                if pvc_not_found_counter > 0:
+                if pvc_name in not_found_pvc_names:
                     msg = ("PVC '%s' has not been found 2 times already. Make "
                            "sure you provided correct PVC name." % pvc_name)
                 else:
-                    pvc_not_found_counter += 1
+                    g.log.info("PVC '%s' not found." % pvc_name)
+                    not_found_pvc_names.add(pvc_name)
                     continue
             elif output == "Pending":
-                g.log.info("PVC '%s' is in Pending state, sleep for %ssec" % (
-                    pvc_name, wait_step))
                 continue
             elif output == "Bound":
                 g.log.info("PVC '%s' is in Bound state." % pvc_name)
-                _waiter._attempt = 0
-                break
+                not_bound_pvc_names.discard(pvc_name)
+                continue
             elif output == "Error":
                 msg = "PVC '%s' is in 'Error' state." % pvc_name
                 g.log.error(msg)
@@ -1222,14 +1646,21 @@ def wait_for_pvcs_be_bound(hostname, pvc_names, timeout=120, wait_step=3):
                 g.log.error(msg)
             if msg:
                 raise AssertionError(msg)
+        if not not_bound_pvc_names:
+            break
+        g.log.info("%s of %s PVCs are not in Bound state yet, sleep for "
+                   "%ssec." % (
+                       len(not_bound_pvc_names), len(pvc_data), wait_step))
     if _waiter.expired:
         # Gather more info for ease of debugging
+        try:
+            events = get_events(hostname)
+        except Exception:
+            events = None
         for pvc_name in pvc_names:
-            try:
-                pvc_events = get_events(hostname, obj_name=pvc_name)
-            except Exception:
-                pvc_events = '?'
-            pvc_data[pvc_name]['events'] = pvc_events
+            pvc_data[pvc_name]['events'] = (
+                '?' if events is None else _filter_events(
+                    events, obj_name=pvc_name))
         error_msg = (
             "Failed to wait %d seconds for some of the provided PVCs "
             "to be in 'Bound' state.\nPVC names: %s\nPVCs info: \n%s" % (
@@ -1363,6 +1794,15 @@ def get_pv_name_from_pvc(hostname, pvc_name):
          pv_name (str): pv name if successful,
                         otherwise raise Exception
     '''
+    pv_names = [
+        pv['metadata']['name']
+        for pv in _get_cached_objects(hostname, 'pv') or []
+        if (pv.get('spec', {}).get('claimRef') or {}).get('name') == pvc_name]
+    if pv_names:
+        pv_name = ' '.join(pv_names)
+        g.log.info("pv name is %s for pvc %s" % (pv_name, pvc_name))
+        return pv_name
+
     # NOTE(vponomar): following command allows to get PV even if PVC is deleted
     cmd = ("oc get pv -o jsonpath='{.items[?(@.spec.claimRef.name==\"%s\")]"
            ".metadata.name}'" % pvc_name)
@@ -1412,11 +1852,52 @@ def get_vol_names_from_pv(hostname, pv_name, vol_type='file'):
     return vol_dict
 
 
+def _iter_json_list_items(lines):
+    """Parse items of the JSON 'List' object one by one.
+
+    Args:
+        lines (iterable): lines of the 'oc get -o json' command output
+            for list of objects.
+    Yields:
+        dict: items of the list, each one is parsed as soon as
+            its last line is read.
+    """
+    lines, head_lines = iter(lines), []
+    for line in lines:
+        head_lines.append(line)
+        if line.strip() == '"items": [':
+            break
+    else:
+        # NOTE: list is empty or its output is not pretty-printed
+        data = json.loads(''.join(head_lines)) if head_lines else {}
+        for item in data.get('items') or []:
+            yield item
+        return
+
+    item_lines, item_indent, in_items = [], None, True
+    for line in lines:
+        if not in_items:
+            # NOTE: read the rest of output to let command finish
+            continue
+        stripped, indent = line.strip(), len(line) - len(line.lstrip())
+        if item_indent is None:
+            item_indent = indent
+        item_lines.append(line)
+        # NOTE: 'oc' pretty-prints JSON, so item ends with the line having
+        # closing brace with the same indentation as the opening one
+        if stripped in ('}', '},') and indent == item_indent:
+            yield json.loads(''.join(item_lines).rstrip().rstrip(','))
+            item_lines, in_items = [], stripped == '},'
+
+
 def get_events(hostname,
                obj_name=None, obj_namespace=None, obj_type=None,
                event_reason=None, event_type=None):
     """Return filtered list of events.
 
+    Only changes of events made since the previous call are fetched when
+    the shared event feed is enabled, see 'event_feed' module.
+
     Args:
         hostname (str): hostname of oc client
         obj_name (str): name of an object
@@ -1446,6 +1927,17 @@ def get_events(hostname,
             "type": "Normal"
         }
     """
+    feed = event_feed.get_event_feed(hostname)
+    if feed is not None:
+        try:
+            return _filter_events(
+                feed.get_events(), obj_name=obj_name,
+                obj_namespace=obj_namespace, obj_type=obj_type,
+                event_reason=event_reason, event_type=event_type)
+        except Exception as e:
+            g.log.error("Failed to get events using event feed, "
+                        "listing them instead: %s" % e)
+
     field_selector = []
     if obj_name:
         field_selector.append('involvedObject.name=%s' % obj_name)
@@ -1457,20 +1949,31 @@ def get_events(hostname,
         field_selector.append('reason=%s' % event_reason)
     if event_type:
         field_selector.append('type=%s' % event_type)
-    cmd = "oc get events -o yaml"
+    cmd = "oc get events -o json"
     if openshift_version.get_openshift_version() >= '3.9':
         cmd += " --field-selector %s" % ",".join(field_selector or "''")
-    objects = yaml.load(command.cmd_run(cmd, hostname=hostname))['items']
+    objects = _iter_json_list_items(
+        command.cmd_run_stream(cmd, hostname=hostname))
     if openshift_version.get_openshift_version() >= '3.9':
-        return objects
+        return list(objects)
 
     # Backup approach for OCP3.6 and OCP3.7 which do not have
     # '--field-selector' feature.
+    return _filter_events(
+        objects, obj_name=obj_name, obj_namespace=obj_namespace,
+        obj_type=obj_type, event_reason=event_reason, event_type=event_type)
+
+
+def _filter_events(events,
+                   obj_name=None, obj_namespace=None, obj_type=None,
+                   event_reason=None, event_type=None):
+    """Filter events the same way as 'get_events' function does."""
     filtered_objects = []
-    for o in objects:
+    for o in events:
         if obj_name and o["involvedObject"]["name"] != obj_name:
             continue
-        if obj_namespace and o["involvedObject"]["namespace"] != obj_namespace:
+        if obj_namespace and (
+                o["involvedObject"].get("namespace") != obj_namespace):
             continue
         if obj_type and o["involvedObject"]["kind"] != obj_type:
             continue
@@ -1851,6 +2354,7 @@ def oc_annotate(hostname, rtype, rname, annotations):
     for annotation in annotations:
         cmd = 'oc annotate %s %s %s --overwrite' % (rtype, rname, annotation)
         command.cmd_run(cmd, hostname=hostname)
+    object_cache.mark_stale(hostname)
 
 
 def oc_adm_add_role_to_user(hostname, role, user,
@@ -1964,4 +2468,5 @@ def oc_patch(ocp_node, rtype, rname, changes, raise_on_error=True):
     cmd = ['oc', 'patch', rtype, rname, '-p', '\'%s\'' % changes]
     out = command.cmd_run(
         cmd, hostname=ocp_node, raise_on_error=raise_on_error)
+    object_cache.mark_stale(ocp_node)
     return out or None
@@ -1,12 +1,15 @@
 from glusto.core import Glusto as g
-import yaml
 
-from openshiftstoragelibs.command import cmd_run
+from openshiftstoragelibs.command import (
+    cmd_run,
+    cmd_run_batch,
+)
 from openshiftstoragelibs.exceptions import (
     ExecutionError,
     NotSupportedException,
 )
 from openshiftstoragelibs.openshift_version import get_openshift_version
+from openshiftstoragelibs import utils
 from openshiftstoragelibs import waiter
 
 
@@ -30,14 +33,13 @@ def validate_multipath_pod(hostname, podname, hacount, mpath):
     pod_nodename = cmd_run(cmd, hostname)
 
     active_node_count, enable_node_count = (1, hacount - 1)
-    cmd = "multipath -ll %s | grep 'status=active' | wc -l" % mpath
-    active_count = int(cmd_run(cmd, pod_nodename))
+    cmd = "multipath -ll %s | grep 'status=%s' | wc -l"
+    active_count, enable_count = map(int, cmd_run_batch(
+        [cmd % (mpath, 'active'), cmd % (mpath, 'enabled')], pod_nodename))
     assert active_node_count == active_count, (
         "Active node count on %s for %s is %s and not 1" % (
             pod_nodename, podname, active_count))
 
-    cmd = "multipath -ll %s | grep 'status=enabled' | wc -l" % mpath
-    enable_count = int(cmd_run(cmd, pod_nodename))
     assert enable_node_count == enable_count, (
         "Passive node count on %s for %s is %s and not %s" % (
             pod_nodename, podname, enable_count, enable_node_count))
@@ -75,7 +77,8 @@ def enable_pvc_resize(master_node):
             raise ExecutionError(err_msg)
 
         with conn.builtin.open(MASTER_CONFIG_FILEPATH, 'r') as f:
-            data = yaml.load(f)
+            # NOTE: read file in one remote call instead of one per chunk
+            data = utils.yaml_load(f.read())
             dict_add = data['admissionConfig']['pluginConfig']
             if "PersistentVolumeClaimResize" in dict_add:
                 g.log.info("master-config.yaml file is already edited")
@@ -94,7 +97,7 @@ def enable_pvc_resize(master_node):
                 value = ['ExpandPersistentVolumes=true']
                 kube_config[key]['feature-gates'] = value
         with conn.builtin.open(MASTER_CONFIG_FILEPATH, 'w+') as f:
-            yaml.dump(data, f, default_flow_style=False)
+            f.write(utils.yaml_dump(data, default_flow_style=False))
     except Exception as err:
         raise ExecutionError("failed to edit master-config.yaml file "
                              "%s on %s" % (err, master_node))
@@ -211,8 +214,9 @@ def get_active_and_enabled_devices_from_mpath(node, mpath):
     cmd = ("set -o pipefail && ((multipath -ll %s | grep -A 1 status=%s)"
            r" | grep -v '\-\-' | cut -d ':' -f 4 | awk '{print $2}')")
 
-    active = cmd_run(cmd % (mpath, 'active'), node).split('\n')[1::2]
-    enabled = cmd_run(cmd % (mpath, 'enabled'), node).split('\n')[1::2]
+    active, enabled = [
+        out.split('\n')[1::2] for out in cmd_run_batch(
+            [cmd % (mpath, 'active'), cmd % (mpath, 'enabled')], node)]
 
     out_dic = {
         'active': active,
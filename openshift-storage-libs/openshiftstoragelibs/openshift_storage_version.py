@@ -30,6 +30,7 @@ import six
 
 from openshiftstoragelibs import command
 from openshiftstoragelibs import exceptions
+from openshiftstoragelibs import version_cache
 
 
 OPENSHIFT_STORAGE_VERSION_RE = r"(?:v?)(\d+)(?:\.)(\d+)(?:\.(\d+))?.*"
@@ -184,6 +185,8 @@ def get_openshift_storage_version(hostname=None):
     """
     global OPENSHIFT_STORAGE_VERSION
     if not OPENSHIFT_STORAGE_VERSION:
-        version_str = _get_openshift_storage_version_str(hostname=hostname)
+        version_str = version_cache.get_version_str(
+            "openshift_storage",
+            lambda: _get_openshift_storage_version_str(hostname=hostname))
         OPENSHIFT_STORAGE_VERSION = OpenshiftStorageVersion(version_str)
     return OPENSHIFT_STORAGE_VERSION
@@ -29,6 +29,7 @@ from glusto.core import Glusto as g
 import six
 
 from openshiftstoragelibs import exceptions
+from openshiftstoragelibs import version_cache
 
 
 OPENSHIFT_VERSION_RE = r"(?:v?)(\d+)(?:\.)(\d+)(?:\.(\d+))?.*"
@@ -168,6 +169,7 @@ def get_openshift_version(hostname=None):
     """
     global OPENSHIFT_VERSION
     if not OPENSHIFT_VERSION:
-        version_str = _get_openshift_version_str(hostname=hostname)
+        version_str = version_cache.get_version_str(
+            "openshift", lambda: _get_openshift_version_str(hostname=hostname))
         OPENSHIFT_VERSION = OpenshiftVersion(version_str)
     return OPENSHIFT_VERSION
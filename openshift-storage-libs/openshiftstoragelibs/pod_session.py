@@ -0,0 +1,328 @@
+"""Persistent shell sessions opened in OCP PODs.
+
+Each 'oc exec' call goes through API server authentication and container
+exec setup, which often takes more time than the command itself.
+'PodSession' keeps one shell open inside a POD and runs many commands
+over it, separating results of the commands using framed output.
+
+Usage example:
+
+    from openshiftstoragelibs import pod_session
+
+    session = pod_session.get_pod_session(ocp_node, pod_name='glusterfs-x')
+    ret, out, err = session.run('gluster volume list')
+
+Sessions are disabled by default for the generic helpers, such as
+'oc_rsh', 'cmd_run_on_gluster_pod_or_node' and 'cmd_run_on_heketi_pod'.
+Set 'common.use_persistent_pod_sessions' config option to 'True'
+to make them use sessions.
+"""
+
+import atexit
+import errno
+import os
+import select
+import threading
+import time
+
+from glusto.core import Glusto as g
+import six
+
+from openshiftstoragelibs import command_stats
+from openshiftstoragelibs import exceptions
+from openshiftstoragelibs import utils
+
+
+USE_POD_SESSIONS = g.config.get("common", {}).get(
+    "use_persistent_pod_sessions", False)
+ERR_FILE_VAR = "__err_file"
+
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+class _BrokenSession(Exception):
+    pass
+
+
+class PodSession(object):
+    """Long-living shell opened in a POD using 'oc exec'.
+
+    Session is (re)opened lazily on the first command and after failures
+    of the shell process, for example, when the POD gets restarted.
+    In the latter case the POD name is resolved once again using
+    'pod_resolver' if it was provided.
+    """
+
+    def __init__(self, ocp_node, pod_name=None, pod_resolver=None,
+                 user="root", shell="/bin/sh"):
+        """Args:
+            ocp_node (str): node where 'oc exec' command should run.
+            pod_name (str): name of the POD to open shell in.
+            pod_resolver (callable): function without arguments, which
+                returns POD name. Used when 'pod_name' is not provided.
+            user (str): user to connect to the 'ocp_node' as.
+            shell (str): shell to be run in the POD.
+        """
+        if not (pod_name or pod_resolver):
+            raise ValueError(
+                "Either 'pod_name' or 'pod_resolver' should be provided.")
+        self.ocp_node = ocp_node
+        self.pod_name = pod_name
+        self.pod_resolver = pod_resolver
+        self.user = user
+        self.shell = shell
+        self._proc = None
+        self._marker = None
+        self._index = 0
+        self._shell_err = ''
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "PodSession(%s@%s:%s)" % (
+            self.user, self.ocp_node, self.pod_name)
+
+    @property
+    def is_alive(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def _open(self):
+        if self.pod_resolver:
+            self.pod_name = self.pod_resolver()
+        if not self.pod_name:
+            raise exceptions.ExecutionError(
+                "Failed to find POD to open session in on the '%s' "
+                "node." % self.ocp_node)
+        g.log.info("Opening shell session in the '%s' POD on the '%s' "
+                   "node." % (self.pod_name, self.ocp_node))
+        self._proc = g._popen(
+            self.ocp_node, self.user,
+            "oc exec -i %s -- %s" % (self.pod_name, self.shell),
+            universal_newlines=False)
+        self._marker = "session-%s" % utils.get_random_str()
+        self._index = 0
+        self._shell_err = ''
+        self._write('%s=$(mktemp)\n' % ERR_FILE_VAR)
+
+    def close(self):
+        """Close shell opened in the POD."""
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            if proc.poll() is None:
+                proc.stdin.write(
+                    ('rm -f "$%s"; exit\n' % ERR_FILE_VAR).encode('utf-8'))
+                proc.stdin.flush()
+                for _ in range(10):
+                    if proc.poll() is not None:
+                        break
+                    time.sleep(0.1)
+                else:
+                    proc.kill()
+            proc.communicate()
+        except Exception as e:
+            g.log.error("Failed to properly close %r: %s" % (self, e))
+
+    def _write(self, data):
+        try:
+            self._proc.stdin.write(data.encode('utf-8'))
+            self._proc.stdin.flush()
+        except (IOError, OSError) as e:
+            raise _BrokenSession(
+                "Failed to send command to the session: %s" % e)
+
+    def _read_frame(self, end_line, timeout):
+        """Read stdout of the shell till the 'end_line' line is found.
+
+        Raises:
+            _BrokenSession: when shell process exits before the 'end_line'
+                line was found. Output read so far is stored in the
+                'output' attribute of the exception.
+            exceptions.ExecutionError: when timeout is reached.
+        """
+        out_fd = self._proc.stdout.fileno()
+        err_fd = self._proc.stderr.fileno()
+        fds, stdout = [out_fd, err_fd], bytearray()
+        end_line = ("\n%s\n" % end_line).encode('utf-8')
+        deadline = time.time() + timeout if timeout else None
+        while out_fd in fds:
+            wait_time = None
+            if deadline is not None:
+                wait_time = deadline - time.time()
+                if wait_time <= 0:
+                    raise exceptions.ExecutionError(
+                        "Command in %r didn't finish in %s seconds." % (
+                            self, timeout))
+            try:
+                ready = select.select(fds, [], [], wait_time)[0]
+            except (IOError, OSError, select.error) as e:
+                if e.args and e.args[0] == errno.EINTR:
+                    continue
+                raise
+            for fd in ready:
+                data = os.read(fd, 65536)
+                if not data:
+                    fds.remove(fd)
+                elif fd == out_fd:
+                    stdout += data
+                else:
+                    self._shell_err += self._decode(data)
+            if stdout.endswith(end_line):
+                return self._decode(bytes(stdout))
+
+        error = _BrokenSession(
+            "Shell in %r exited unexpectedly. Err: %s" % (
+                self, self._shell_err))
+        error.output = self._decode(bytes(stdout))
+        raise error
+
+    @staticmethod
+    def _decode(data):
+        return data.decode('utf-8', 'replace') if six.PY3 else data
+
+    def run(self, cmd, log_level=None, timeout=None):
+        """Run shell command in the POD.
+
+        If the shell is found broken before the command was started, then
+        session gets reopened and command is sent once again.
+
+        Args:
+            cmd (str|list): shell command to run.
+            log_level (str|None): log level for the results of the command.
+            timeout (int|None): seconds to wait for the command results.
+                Session gets closed on timeout.
+        Returns:
+            tuple: return code, stdout and stderr of the command.
+        Raises:
+            exceptions.ExecutionError: when command results were not
+                received.
+        """
+        if not isinstance(cmd, six.string_types):
+            cmd = ' '.join(cmd)
+        if g._command_backend is not None:
+            pod_name = (
+                self.pod_resolver() if self.pod_resolver else self.pod_name)
+            return g.run(
+                self.ocp_node, "oc exec %s -- %s" % (pod_name, cmd),
+                self.user, log_level=log_level)
+        start_time = time.time()
+        with self._lock:
+            for attempt in range(2):
+                if not self.is_alive:
+                    self._close()
+                    self._open()
+                g.log.info("%s@%s (session %s): %s" % (
+                    self.user, self.ocp_node, self.pod_name, cmd))
+                index, self._index = self._index, self._index + 1
+                frame = "%s:%s" % (self._marker, index)
+                try:
+                    self._write(utils.get_framed_cmd(
+                        cmd, self._marker, index, ERR_FILE_VAR))
+                    output = self._read_frame("%s:end" % frame, timeout)
+                except _BrokenSession as e:
+                    self._close()
+                    output = getattr(e, 'output', '')
+                    if attempt or ("%s:out\n" % frame) in output:
+                        # NOTE: command was started, so we can't safely
+                        # rerun it not knowing its results.
+                        raise exceptions.ExecutionError(
+                            "Failed to get results of the '%s' command. "
+                            "%s" % (cmd, e))
+                    g.log.error("%s. Reopening session." % e)
+                    continue
+                except Exception:
+                    self._close()
+                    raise
+                break
+
+        command_stats.record(
+            self.ocp_node, cmd, time.time() - start_time, len(output),
+            retries=attempt)
+        result = utils.parse_framed_output(output, self._marker, index)
+        if result is None:
+            raise exceptions.ExecutionError(
+                "Failed to parse results of the '%s' command in %r. "
+                "Output: %s" % (cmd, self, output))
+        g._log_results(
+            "%s@%s:%s" % (self.user, self.ocp_node, self.pod_name),
+            *result, log_level=log_level)
+        return result
+
+
+def get_pod_session(ocp_node, pod_name=None, pod_resolver=None, key=None):
+    """Get existing or create new session for the POD.
+
+    Args:
+        ocp_node (str): node where 'oc exec' command should run.
+        pod_name (str): name of the POD to open shell in.
+        pod_resolver (callable): function without arguments, which
+            returns POD name. Used when 'pod_name' is not provided.
+        key (str): identifier of the session when 'pod_resolver' is used.
+            Defaults to the name of the 'pod_resolver' function.
+    Returns:
+        PodSession: session object, which may be shared with other callers.
+    """
+    if pod_name:
+        key = (ocp_node, pod_name)
+    else:
+        key = (ocp_node, key or getattr(pod_resolver, '__name__', None))
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            session = _SESSIONS[key] = PodSession(
+                ocp_node, pod_name=pod_name, pod_resolver=pod_resolver)
+    return session
+
+
+def close_pod_sessions(ocp_node=None):
+    """Close sessions opened using 'get_pod_session' function.
+
+    Args:
+        ocp_node (str|None): node to close sessions for.
+            Sessions for all the nodes are closed if not provided.
+    """
+    with _SESSIONS_LOCK:
+        keys = [key for key in _SESSIONS if ocp_node in (None, key[0])]
+        sessions = [_SESSIONS.pop(key) for key in keys]
+    for session in sessions:
+        session.close()
+
+
+atexit.register(close_pod_sessions)
+
+
+def cmd_run_in_pod(cmd, ocp_node, pod_name=None, pod_resolver=None,
+                   raise_on_error=True, key=None):
+    """Run shell command in the POD using persistent session.
+
+    Args:
+        cmd (str|list): shell command to run in the POD.
+        ocp_node (str): node where 'oc exec' command should run.
+        pod_name (str): name of the POD to run command in.
+        pod_resolver (callable): function without arguments, which
+            returns POD name. Used when 'pod_name' is not provided.
+        raise_on_error (bool): defines whether we should raise exception
+            in case command execution failed.
+        key (str): identifier of the session when 'pod_resolver' is used.
+    Returns:
+        str: Stripped shell command's stdout value if not None.
+    """
+    session = get_pod_session(
+        ocp_node, pod_name=pod_name, pod_resolver=pod_resolver, key=key)
+    ret, out, err = session.run(cmd)
+    msg = ("Failed to execute command '%s' in '%s' POD on '%s' node. Got "
+           "non-zero return code '%s'. Err: %s" % (
+               cmd, session.pod_name, ocp_node, ret, err))
+    if int(ret) != 0:
+        g.log.error(msg)
+    if raise_on_error:
+        assert int(ret) == 0, msg
+
+    out = out.strip() if out else out
+
+    return out
@@ -43,23 +43,50 @@ Similarly it can be used as a context manager:
 Because the custom run fuction only runs commands in pods when passed
 a Pod object it is fairly safe to enable the monkey-patch over the
 lifetime of a function that addresses both hosts and pods.
+
+Patched 'g.run' method is shared by all the threads, so background
+threads, which run commands only on nodes, should use the
+'command.direct_run' context manager to skip resolving of their targets.
+
+Gluster PODs, which are used for resolving of hosts and the
+'auto_get_gluster_endpoint' target, are cached for the
+'common.gluster_pods_cache_ttl' seconds. Use
+'openshift_ops.invalidate_gluster_pods_cache' to drop the cache
+when Gluster PODs are changed.
 """
 
 from collections import namedtuple
 from functools import partial, wraps
+import threading
 
 from glusto.core import Glusto as g
-import mock
 import six
 
+from openshiftstoragelibs.command import (
+    direct_run,
+    is_direct_run,
+)
 from openshiftstoragelibs import openshift_ops
 
 # Define a namedtuple that allows us to address pods instead of just
 # hosts,
 Pod = namedtuple('Pod', 'node podname')
 
+# Depth of active 'GlustoPod' managers and original run method
+# per glusto object
+_PATCHES = {}
+_PATCHES_LOCK = threading.Lock()
+
+
+def _get_pod_cmd(target, command):
+    prefix = ['oc', 'rsh', target.podname]
+    if isinstance(command, six.string_types):
+        return ' '.join(prefix + [command])
+    return prefix + command
+
 
-def run(target, command, user=None, log_level=None, orig_run=g.run):
+def run(target, command, user=None, log_level=None, orig_run=g.run,
+        _retry_on_stale_pod=True):
     """Function that runs a command on a host or in a pod via a host.
     Wraps glusto's run function.
 
@@ -86,10 +113,19 @@ def run(target, command, user=None, log_level=None, orig_run=g.run):
     # definition time in order to capture the method before
     # any additional monkeypatching by other code
 
+    if is_direct_run():
+        if isinstance(target, Pod):
+            return orig_run(target.node, _get_pod_cmd(target, command),
+                            user=user, log_level=log_level)
+        return orig_run(target, command, user=user, log_level=log_level)
+
     ocp_client_node = list(g.config['ocp_servers']['client'].keys())[0]
-    with mock.patch.object(g, 'run', new=orig_run):
+    # NOTE: 'g' object is shared by all the threads, so it is not patched
+    # back here, commands of the lookup skip routing using thread state
+    with direct_run():
         gluster_pods = openshift_ops.get_ocp_gluster_pod_details(
-            ocp_client_node)
+            ocp_client_node, use_cache=True)
+    orig_target = target
 
     if target == 'auto_get_gluster_endpoint':
         if gluster_pods:
@@ -103,15 +139,18 @@ def run(target, command, user=None, log_level=None, orig_run=g.run):
                 break
 
     if isinstance(target, Pod):
-        prefix = ['oc', 'rsh', target.podname]
-        if isinstance(command, six.string_types):
-            cmd = ' '.join(prefix + [command])
-        else:
-            cmd = prefix + command
-
         # unpack the tuple to make sure our return value exactly matches
         # our docstring
-        return g.run(target.node, cmd, user=user, log_level=log_level)
+        ret, out, err = g.run(
+            target.node, _get_pod_cmd(target, command),
+            user=user, log_level=log_level)
+        if (_retry_on_stale_pod and ret != 0 and orig_target is not target
+                and 'not found' in err and target.podname in err):
+            # NOTE: cached Gluster POD may have been replaced with new one
+            openshift_ops.invalidate_gluster_pods_cache(ocp_client_node)
+            return run(orig_target, command, user=user, log_level=log_level,
+                       orig_run=orig_run, _retry_on_stale_pod=False)
+        return ret, out, err
     else:
         return orig_run(target, command, user=user, log_level=log_level)
 
@@ -127,16 +166,29 @@ class GlustoPod(object):
 
     def __enter__(self):
         """Patch glusto to use the wrapped run method.
+
+        Glusto object is shared by all the threads, so it gets patched
+        by the first entered manager and restored by the last exited one.
         """
-        self.runfunc = self._g.run
-        # we "capture" the prior glusto run method here in order to
-        # stack on top of any previous monkeypatches if they exist
-        self._g.run = partial(run, orig_run=self.runfunc)
+        with _PATCHES_LOCK:
+            depth, runfunc = _PATCHES.get(id(self._g), (0, None))
+            if not depth:
+                # we "capture" the prior glusto run method here in order to
+                # stack on top of any previous monkeypatches if they exist
+                runfunc = self._g.run
+                self._g.run = partial(run, orig_run=runfunc)
+            _PATCHES[id(self._g)] = (depth + 1, runfunc)
+        self.runfunc = runfunc
 
     def __exit__(self, etype, value, tb):
         """Restore the orginal run method.
         """
-        self._g.run = self.runfunc
+        with _PATCHES_LOCK:
+            depth, runfunc = _PATCHES.pop(id(self._g))
+            if depth > 1:
+                _PATCHES[id(self._g)] = (depth - 1, runfunc)
+            else:
+                self._g.run = runfunc
         self.runfunc = None
 
     def __call__(self, func):
@@ -0,0 +1,281 @@
+"""
+Use this module for retrying remote calls, which fail with transient errors.
+
+All the retrying helpers of the library share policies defined here:
+
+    - 'ssh': commands failed because of broken SSH connection.
+    - 'ssh_connect': failures of opening SSH channel in Glusto.
+    - 'heketi': Heketi client calls failed because Heketi server was not
+      reachable from the node, which get retried in the Heketi POD.
+    - 'heketi_mutation': the same for calls changing Heketi state, which
+      are retried only if request surely did not reach Heketi server,
+      because timed out request may still be served by it.
+    - 'heketi_throttle': Heketi calls rejected because Heketi server
+      already runs max amount of operations.
+
+Each policy defines which errors are transient, exponential backoff with
+jitter between attempts, deadline for all the attempts of a call and
+retry budget, which is amount of retries allowed for all the calls
+using the policy within a time period. Budget prevents retry storms when
+service is down for long, failing calls fast instead.
+
+Usage example:
+
+    from openshiftstoragelibs import retry
+
+    policy = retry.get_policy('heketi')
+    out = policy.call(
+        lambda: command.cmd_run(cmd, node),
+        fallback=lambda: cmd_run_on_heketi_pod(cmd))
+
+Defaults of the policies can be overridden using the
+'common.retry_policies' config option, which has policy names as keys
+and dicts with 'RetryPolicy' constructor arguments as values.
+"""
+
+from collections import deque
+import random
+import sys
+import threading
+import time
+
+from glusto.core import Glusto as g
+import six
+
+from openshiftstoragelibs import command_stats
+
+
+DEFAULT_POLICIES = {
+    "ssh": {
+        "transient_errors": ("no ssh connection", "tls handshake timeout"),
+        "max_attempts": 3,
+        "initial_delay": 0.5,
+        "max_delay": 5,
+        "deadline": 60,
+        "budget": 30,
+    },
+    "ssh_connect": {
+        # NOTE: any error of opening SSH channel is treated as transient
+        "transient_errors": None,
+        "max_attempts": 2,
+        "initial_delay": 0.5,
+        "max_delay": 5,
+        "deadline": 60,
+        "budget": 30,
+    },
+    "heketi": {
+        "transient_errors": ("connection refused", "operation timed out"),
+        "max_attempts": 4,
+        "initial_delay": 0.5,
+        "max_delay": 8,
+        "deadline": 120,
+        "budget": 30,
+    },
+    "heketi_mutation": {
+        "transient_errors": ("connection refused", ),
+        "max_attempts": 2,
+        "initial_delay": 1,
+        "max_delay": 1,
+        "deadline": 120,
+        "budget": 30,
+    },
+    "heketi_throttle": {
+        "transient_errors": (
+            "server busy", "too many requests", "retry operation later"),
+        "max_attempts": 10,
+        "initial_delay": 1,
+        "max_delay": 15,
+        "deadline": 600,
+        "budget": 300,
+    },
+}
+RETRY_POLICIES_CONFIG = g.config.get("common", {}).get("retry_policies") or {}
+
+_POLICIES = {}
+_POLICIES_LOCK = threading.Lock()
+
+
+class RetryPolicy(object):
+    """Rules of retrying calls failed with transient errors."""
+
+    def __init__(self, name, transient_errors=(), max_attempts=3,
+                 initial_delay=0.5, max_delay=10, multiplier=2, jitter=0.5,
+                 deadline=None, budget=None, budget_period=60):
+        """Args:
+            name (str): name of the policy used in logs.
+            transient_errors (iterable|None): case insensitive substrings
+                of errors, which are worth retrying. All the errors are
+                considered transient if None.
+            max_attempts (int): max amount of attempts including first one.
+            initial_delay (float): seconds to wait before the first retry.
+            max_delay (float): upper limit of the delay between attempts.
+            multiplier (float): delay growth factor for each next retry.
+            jitter (float): share of the delay, from 0 to 1, which is
+                randomly subtracted from it to spread concurrent retries.
+            deadline (float|None): seconds since the first attempt after
+                which retries are not started. First call of the fallback
+                is made regardless of it.
+            budget (int|None): max amount of retries of all the calls using
+                the policy within 'budget_period' seconds.
+            budget_period (float): length of the budget window in seconds.
+        """
+        self.name = name
+        self.transient_errors = (
+            None if transient_errors is None
+            else tuple(e.lower() for e in transient_errors))
+        self.max_attempts = int(max_attempts)
+        self.initial_delay = float(initial_delay)
+        self.max_delay = float(max_delay)
+        self.multiplier = float(multiplier)
+        self.jitter = float(jitter)
+        self.deadline = deadline
+        self.budget = budget
+        self.budget_period = budget_period
+        self._retry_times = deque()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "RetryPolicy(%s)" % self.name
+
+    def is_transient(self, error):
+        """Check whether error is worth retrying.
+
+        Args:
+            error (str|Exception): error message or exception.
+        Returns:
+            bool: True if error is transient.
+        """
+        if self.transient_errors is None:
+            return True
+        error = six.text_type(error).lower()
+        return any(e in error for e in self.transient_errors)
+
+    def get_delay(self, attempt):
+        """Get seconds to wait after the failed attempt.
+
+        Args:
+            attempt (int): number of the failed attempt starting from 1.
+        Returns:
+            float: delay with applied jitter.
+        """
+        delay = min(
+            self.max_delay,
+            self.initial_delay * self.multiplier ** (attempt - 1))
+        return delay - random.uniform(0, delay * self.jitter)
+
+    def _take_budget(self):
+        if self.budget is None:
+            return True
+        now = time.time()
+        with self._lock:
+            while (self._retry_times
+                    and self._retry_times[0] <= now - self.budget_period):
+                self._retry_times.popleft()
+            if len(self._retry_times) >= self.budget:
+                return False
+            self._retry_times.append(now)
+        return True
+
+    def get_retry_delay(self, error, attempt, start_time,
+                        ignore_deadline=False):
+        """Decide whether failed call should be retried.
+
+        Consumes retry budget and logs the error if the call should be
+        retried.
+
+        Args:
+            error (str|Exception): error of the failed attempt.
+            attempt (int): number of the failed attempt starting from 1.
+            start_time (float): time of the first attempt.
+            ignore_deadline (bool): whether call should be retried even
+                if deadline of the policy is exceeded.
+        Returns:
+            float|None: seconds to wait before the next attempt or None
+                if call should not be retried.
+        """
+        if not error or not self.is_transient(error):
+            return None
+        if attempt >= self.max_attempts:
+            return None
+        delay = self.get_delay(attempt)
+        if (self.deadline is not None and not ignore_deadline
+                and time.time() + delay - start_time > self.deadline):
+            g.log.error(
+                "Not retrying call according to the '%s' retry policy, "
+                "because its deadline of %s seconds would be exceeded." % (
+                    self.name, self.deadline))
+            return None
+        if not self._take_budget():
+            g.log.error(
+                "Not retrying call according to the '%s' retry policy, "
+                "because its budget of %s retries per %s seconds is "
+                "exhausted." % (self.name, self.budget, self.budget_period))
+            return None
+        g.log.error(
+            "Attempt %s of %s failed with transient error, retrying "
+            "in %.2f seconds according to the '%s' retry policy. "
+            "Error: %s" % (
+                attempt, self.max_attempts, delay, self.name, error))
+        return delay
+
+    def call(self, func, fallback=None, get_error=None, on_retry=None):
+        """Call function retrying it on transient errors.
+
+        Args:
+            func (callable): function without arguments to be called.
+            fallback (callable): function without arguments, which is
+                called instead of 'func' on retries. It is called at least
+                once on transient error, even if the first attempt took
+                longer than deadline of the policy, e.g. hung on connect.
+            get_error (callable): function which gets result of the call
+                and returns error to be checked, for the functions
+                reporting errors using returned values. Only raised
+                exceptions are checked if not provided.
+            on_retry (callable): function which gets error and number of
+                the failed attempt and is called before each retry.
+        Returns:
+            Result of the last call.
+        Raises:
+            Exception raised by the last call.
+        """
+        start_time, attempt = time.time(), 0
+        while True:
+            attempt += 1
+            target = fallback if fallback and attempt > 1 else func
+            exc_info = None
+            try:
+                result = target()
+                error = get_error(result) if get_error else None
+            except Exception as e:
+                exc_info, error = sys.exc_info(), e
+
+            delay = self.get_retry_delay(
+                error, attempt, start_time,
+                ignore_deadline=bool(fallback) and attempt == 1)
+            if delay is None:
+                if exc_info is not None:
+                    six.reraise(*exc_info)
+                return result
+
+            if on_retry:
+                on_retry(error, attempt)
+            command_stats.add_retry()
+            time.sleep(delay)
+
+
+def get_policy(name):
+    """Get shared retry policy by its name.
+
+    Args:
+        name (str): name of the policy, one of the 'DEFAULT_POLICIES' keys
+            or of the 'common.retry_policies' config option keys.
+    Returns:
+        RetryPolicy: policy object shared by all the callers.
+    """
+    with _POLICIES_LOCK:
+        policy = _POLICIES.get(name)
+        if policy is None:
+            kwargs = dict(DEFAULT_POLICIES.get(name, {}))
+            kwargs.update(RETRY_POLICIES_CONFIG.get(name) or {})
+            policy = _POLICIES[name] = RetryPolicy(name, **kwargs)
+    return policy
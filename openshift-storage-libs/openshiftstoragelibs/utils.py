@@ -4,10 +4,26 @@ Generic utility functions not specifc to a larger suite of tools.
 For example, not specific to OCP, Gluster, Heketi, etc.
 """
 
+try:
+    # py2/3
+    import simplejson as json
+except ImportError:
+    # py2
+    import json
+
 import random
+import re
 import string
 
 from prometheus_client.parser import text_string_to_metric_families
+import six
+import yaml
+
+JSON_PATH_TOKEN_RE = re.compile(
+    r'\[\?\(@\.(\w+)=="([^"]*)"\)\]|\[(\d+)\]|\.((?:\\.|[^.\[\\])+)')
+# NOTE: LibYAML based classes are many times faster than pure Python ones
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
 
 
 def get_random_str(size=14):
@@ -15,6 +31,106 @@ def get_random_str(size=14):
     return ''.join(random.choice(chars) for _ in range(size))
 
 
+def yaml_load(stream):
+    """Parse YAML document using LibYAML when it is available.
+
+    Args:
+        stream (str|file): YAML document.
+    Returns:
+        Python object built from the document.
+    """
+    return yaml.load(stream, Loader=YAML_LOADER)
+
+
+def yaml_dump(data, stream=None, **kwargs):
+    """Serialize data to YAML using LibYAML when it is available.
+
+    Args:
+        data: Python object to be serialized.
+        stream (file|None): file to write YAML to.
+        kwargs: options of the 'yaml.dump' function,
+            e.g. default_flow_style=False.
+    Returns:
+        str|None: YAML document if 'stream' is None.
+    """
+    return yaml.dump(data, stream, Dumper=YAML_DUMPER, **kwargs)
+
+
+def is_json_path_supported(path):
+    """Check whether 'get_by_json_path' function supports the path.
+
+    Supported are keys, indexes and '[?(@.key=="value")]' filters.
+    """
+    if not path.startswith((".", "[")):
+        path = "." + path
+    return "".join(
+        match.group(0) for match in JSON_PATH_TOKEN_RE.finditer(path)) == path
+
+
+def get_by_json_path(obj, path):
+    """Get value of the object using custom-columns-like path.
+
+    Args:
+        obj (dict): object, e.g. parsed 'oc get -o json' output.
+        path (str): path like '.metadata.name', '.spec.ports[0].port'
+            or '.env[?(@.name=="FOO")].value'.
+    Returns:
+        Value found by the path or None if there is no such value.
+    """
+    if not path.startswith((".", "[")):
+        path = "." + path
+    for filter_key, filter_value, index, key in JSON_PATH_TOKEN_RE.findall(
+            path):
+        if key:
+            key = re.sub(r"\\(.)", r"\1", key.strip("'"))
+            obj = obj.get(key) if isinstance(obj, dict) else None
+        elif index:
+            obj = (obj[int(index)]
+                   if isinstance(obj, list) and len(obj) > int(index)
+                   else None)
+        else:
+            obj = next((
+                item for item in (obj if isinstance(obj, list) else [])
+                if six.text_type(item.get(filter_key)) == filter_value), None)
+        if obj is None:
+            return None
+    return obj
+
+
+def format_json_path_value(value):
+    """Format value the way 'oc get -o custom-columns' does."""
+    if value is None:
+        return "<none>"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return six.text_type(value)
+
+
+def match_label_selector(labels, selector):
+    """Check whether labels match equality-based label selector.
+
+    Args:
+        labels (dict): labels of the object.
+        selector (str|None): selector like 'app=foo,tier!=db,bar'.
+    Returns:
+        bool: True if all the requirements of the selector are met.
+    """
+    for requirement in filter(None, (selector or "").split(",")):
+        if "!=" in requirement:
+            key, value = requirement.split("!=", 1)
+            if labels.get(key) == value:
+                return False
+        elif "=" in requirement:
+            key, value = requirement.split("=", 1)
+            if labels.get(key) != value.lstrip("="):
+                return False
+        elif requirement not in labels:
+            return False
+    return True
+
+
 def parse_prometheus_data(text):
     """Parse prometheus-formatted text to the python objects
 
@@ -38,3 +154,49 @@ def parse_prometheus_data(text):
                 metrics[key] = val
 
     return metrics
+
+
+def get_framed_cmd(cmd, marker, index=0, err_file_var="__err_file"):
+    """Wrap shell command so that its results can be found in shared output.
+
+    Stdout of the command goes first, then goes its return code and then
+    goes its stderr, which is expected to be collected in the file, which
+    path is stored in the 'err_file_var' shell variable.
+    Stdin of the command is closed to avoid consumption of the other
+    commands when several of them are sent to the same shell.
+
+    Args:
+        cmd (str): shell command to be framed.
+        marker (str): unique string used for building frame delimiters.
+        index (int): sequence number of the command in the shared output.
+        err_file_var (str): name of the shell variable with path to the
+            file, which should be used for temporary storing of stderr.
+    Returns:
+        str: framed shell command.
+    """
+    frame = "%s:%s" % (marker, index)
+    return (
+        "printf '%%s\\n' '%(frame)s:out'; ( %(cmd)s\n) </dev/null "
+        "2>\"$%(err)s\"; __rc=$?; printf '\\n%%s:%%s\\n' '%(frame)s:rc' "
+        "\"$__rc\"; cat \"$%(err)s\"; printf '\\n%%s\\n' '%(frame)s:end'\n" % {
+            "frame": frame, "cmd": cmd, "err": err_file_var})
+
+
+def parse_framed_output(output, marker, index=0):
+    """Find results of a framed command in the shared output.
+
+    Args:
+        output (str): output produced by one or more framed commands.
+        marker (str): marker used for framing of the command.
+        index (int): sequence number of the command in the shared output.
+    Returns:
+        tuple: (ret, out, err) if results were found, None otherwise.
+    """
+    frame = re.escape("%s:%s" % (marker, index))
+    match = re.search(
+        r"%(frame)s:out\n(.*?)\n%(frame)s:rc:(-?\d+)\n(.*?)\n%(frame)s:end" % {
+            "frame": frame},
+        output, re.DOTALL)
+    if not match:
+        return None
+    return int(match.group(2)), match.group(1), match.group(3)
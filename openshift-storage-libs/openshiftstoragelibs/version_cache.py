@@ -0,0 +1,186 @@
+"""
+Use this module for caching versions of the cluster components on disk.
+
+'heketi_version', 'openshift_version' and 'openshift_storage_version'
+modules keep versions in module globals, so each new process, e.g. each
+'pytest-xdist' worker, got them using remote commands. Version strings
+are stored in the JSON file shared by all the processes of the host,
+with cluster identity built from the config as the key.
+
+On a cache miss all the missing versions are fetched in parallel and
+processes, which miss the cache at the same time, wait for the one
+fetching them, using lock file.
+
+Usage example:
+
+    from openshiftstoragelibs import version_cache
+
+    version_str = version_cache.get_version_str(
+        "openshift", lambda: _get_openshift_version_str(hostname))
+
+Cache file is defined by the 'common.version_cache_file' config option.
+Versions are reused for 'common.version_cache_ttl' seconds, set it to 0
+to disable the cache.
+"""
+try:
+    # py2/3
+    import simplejson as json
+except ImportError:
+    # py2
+    import json
+
+import contextlib
+import fcntl
+import importlib
+import os
+import sys
+import tempfile
+import time
+
+from glusto.core import Glusto as g
+import six
+
+from openshiftstoragelibs import command
+
+
+VERSION_CACHE_FILE = g.config.get("common", {}).get(
+    "version_cache_file") or os.path.join(
+        tempfile.gettempdir(), "openshift-storage-libs-versions.json")
+VERSION_CACHE_TTL = g.config.get("common", {}).get("version_cache_ttl", 3600)
+
+# Functions, which get version strings using config defaults
+FETCHERS = {
+    "heketi_client": (
+        "openshiftstoragelibs.heketi_version",
+        "_get_heketi_client_version_str"),
+    "heketi_server": (
+        "openshiftstoragelibs.heketi_version",
+        "_get_heketi_server_version_str"),
+    "openshift": (
+        "openshiftstoragelibs.openshift_version",
+        "_get_openshift_version_str"),
+    "openshift_storage": (
+        "openshiftstoragelibs.openshift_storage_version",
+        "_get_openshift_storage_version_str"),
+}
+
+
+def get_cluster_id():
+    """Get identity of the cluster defined in the config.
+
+    Returns:
+        str: OCP master nodes, Heketi server URL, Heketi client node and
+            storage project name joined with '|' symbol.
+    """
+    openshift_config = g.config.get("cns", g.config.get("openshift")) or {}
+    heketi_config = openshift_config.get("heketi_config") or {}
+    return "|".join(six.text_type(part) for part in (
+        ",".join(sorted(g.config.get("ocp_servers", {}).get("master") or {})),
+        heketi_config.get("heketi_server_url"),
+        heketi_config.get("heketi_client_node"),
+        openshift_config.get(
+            "storage_project_name",
+            openshift_config.get("setup", {}).get("cns_project_name")),
+    ))
+
+
+def _read_cache():
+    try:
+        with open(VERSION_CACHE_FILE) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def _get_cached(cache, name):
+    entry = cache.get(get_cluster_id(), {}).get(name)
+    if entry and time.time() - entry["cached_at"] < VERSION_CACHE_TTL:
+        return entry["version"]
+    return None
+
+
+def _write_cache(versions):
+    cache = _read_cache()
+    entries = cache.setdefault(get_cluster_id(), {})
+    now = time.time()
+    for name, version_str in versions.items():
+        entries[name] = {"version": version_str, "cached_at": now}
+    tmp_path = "%s.%s" % (VERSION_CACHE_FILE, os.getpid())
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f)
+        # NOTE: readers never see partially written file
+        os.rename(tmp_path, VERSION_CACHE_FILE)
+    except (IOError, OSError) as e:
+        g.log.error("Failed to write versions cache file '%s': %s" % (
+            VERSION_CACHE_FILE, e))
+
+
+@contextlib.contextmanager
+def _cache_lock():
+    try:
+        lock_file = open(VERSION_CACHE_FILE + ".lock", "a")
+    except (IOError, OSError) as e:
+        g.log.error("Failed to lock versions cache file '%s': %s" % (
+            VERSION_CACHE_FILE, e))
+        yield
+        return
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+
+def get_version_str(name, fetcher):
+    """Get version string from the cache or fetch it.
+
+    On a cache miss all the other missing versions from 'FETCHERS' are
+    fetched concurrently with the requested one and are cached too.
+
+    Args:
+        name (str): name of the version, one of the 'FETCHERS' keys.
+        fetcher (callable): function without arguments, which gets
+            the version string.
+    Returns:
+        str: version string.
+    Raises:
+        Exception raised by the 'fetcher'.
+    """
+    if not VERSION_CACHE_TTL or g._command_backend is not None:
+        return fetcher()
+    version_str = _get_cached(_read_cache(), name)
+    if version_str:
+        return version_str
+
+    with _cache_lock():
+        cache = _read_cache()
+        version_str = _get_cached(cache, name)
+        if version_str:
+            return version_str
+
+        fetchers = {
+            n: getattr(importlib.import_module(module_name), func_name)
+            for n, (module_name, func_name) in FETCHERS.items()
+            if not _get_cached(cache, n)}
+        fetchers[name] = fetcher
+        names = sorted(fetchers)
+
+        def _fetch(n):
+            try:
+                return fetchers[n](), None
+            except Exception as e:
+                if n != name:
+                    g.log.info("Failed to prefetch '%s' version: %s" % (n, e))
+                return None, sys.exc_info()
+
+        results = dict(zip(names, command.run_in_parallel(_fetch, names)))
+        _write_cache({
+            n: version_str for n, (version_str, exc_info) in results.items()
+            if exc_info is None})
+
+    version_str, exc_info = results[name]
+    if exc_info is not None:
+        six.reraise(*exc_info)
+    return version_str
@@ -16,7 +16,9 @@ from openshiftstoragelibs.heketi_ops import (
     get_block_hosting_volume_list,
     get_total_free_space,
     heketi_blockvolume_create,
+    heketi_blockvolume_create_many,
     heketi_blockvolume_delete,
+    heketi_blockvolume_delete_many,
     heketi_blockvolume_info,
     heketi_blockvolume_list,
     heketi_node_info,
@@ -97,15 +99,16 @@ class TestBlockVolumeOps(BaseClass):
 
     def test_block_volume_list(self):
         """Validate heketi blockvolume list command works as expected"""
-        created_vol_ids = []
-        for count in range(3):
-            block_vol = heketi_blockvolume_create(
-                self.heketi_client_node, self.heketi_server_url, 1, json=True)
-            self.addCleanup(
-                heketi_blockvolume_delete, self.heketi_client_node,
-                self.heketi_server_url, block_vol["id"])
-
-            created_vol_ids.append(block_vol["id"])
+        results = heketi_blockvolume_create_many(
+            self.heketi_client_node, self.heketi_server_url, [1] * 3,
+            raise_on_error=False)
+        created_vol_ids = [r.result["id"] for r in results if not r.error]
+        self.addCleanup(
+            heketi_blockvolume_delete_many, self.heketi_client_node,
+            self.heketi_server_url, created_vol_ids)
+        errors = [r.error for r in results if r.error]
+        self.assertFalse(
+            errors, "Failed to create block volumes: %s" % errors)
 
         volumes = heketi_blockvolume_list(
             self.heketi_client_node, self.heketi_server_url, json=True)
@@ -295,15 +298,18 @@ class TestBlockVolumeOps(BaseClass):
                 block_host_create_info["blockinfo"]["freesize"] / num_of_bv)
 
             # Create specified number of BV's in BHV's created
-            for i in range(0, num_of_bv):
-                block_vol = heketi_blockvolume_create(
-                    self.heketi_client_node, self.heketi_server_url,
-                    block_vol_size, json=True, ha=3, auth=True)
-                self.addCleanup(
-                    heketi_blockvolume_delete, self.heketi_client_node,
-                    self.heketi_server_url, block_vol["id"],
-                    raise_on_error=False)
-                bv_list.append(block_vol["id"])
+            results = heketi_blockvolume_create_many(
+                self.heketi_client_node, self.heketi_server_url,
+                [block_vol_size] * num_of_bv, raise_on_error=False,
+                ha=3, auth=True)
+            created_bv_ids = [r.result["id"] for r in results if not r.error]
+            self.addCleanup(
+                heketi_blockvolume_delete_many, self.heketi_client_node,
+                self.heketi_server_url, created_bv_ids, raise_on_error=False)
+            bv_list.extend(created_bv_ids)
+            errors = [r.error for r in results if r.error]
+            self.assertFalse(
+                errors, "Failed to create block volumes: %s" % errors)
             free_space_available = int(free_space_available - default_bhv_size)
 
         # Get gluster node ips
@@ -7,6 +7,7 @@ from glustolibs.gluster.volume_ops import get_volume_list, get_volume_info
 
 from openshiftstoragelibs.baseclass import BaseClass
 from openshiftstoragelibs.heketi_ops import (
+    get_heketi_capacity,
     heketi_device_disable,
     heketi_device_enable,
     heketi_node_disable,
@@ -30,18 +31,11 @@ class TestHeketiVolume(BaseClass):
 
     def _get_free_space(self):
         """Get free space in each heketi device"""
-        free_spaces = []
-        heketi_node_id_list = heketi_node_list(
-            self.heketi_client_node, self.heketi_server_url)
-        for node_id in heketi_node_id_list:
-            node_info_dict = heketi_node_info(self.heketi_client_node,
-                                              self.heketi_server_url,
-                                              node_id, json=True)
-            total_free_space = 0
-            for device in node_info_dict["devices"]:
-                total_free_space += device["storage"]["free"]
-            free_spaces.append(total_free_space)
-        total_free_space = int(math.floor(sum(free_spaces) / (1024**2)))
+        capacity = get_heketi_capacity(
+            self.heketi_client_node, self.heketi_server_url,
+            online_only=False)
+        total_free_space = int(
+            math.floor(capacity["total"]["free"] / (1024**2)))
         return total_free_space
 
     def _get_vol_size(self):
@@ -118,21 +118,11 @@ class TestVolumeExpansionAndDevicesTestCases(BaseClass):
         returns total free space across all devices
         """
 
-        free_spaces = []
-
-        heketi_node_id_list = heketi_ops.heketi_node_list(
-            self.heketi_client_node, self.heketi_server_url)
-
-        for node_id in heketi_node_id_list:
-            node_info_dict = heketi_ops.heketi_node_info(
-                self.heketi_client_node, self.heketi_server_url,
-                node_id, json=True)
-            total_free_space = 0
-            for device in node_info_dict["devices"]:
-                total_free_space += device["storage"]["free"]
-            free_spaces.append(total_free_space)
+        capacity = heketi_ops.get_heketi_capacity(
+            self.heketi_client_node, self.heketi_server_url,
+            online_only=False)
 
-        total_free_space = sum(free_spaces) / (1024 ** 2)
+        total_free_space = capacity["total"]["free"] / (1024 ** 2)
         total_free_space = int(math.floor(total_free_space))
 
         return total_free_space
@@ -2,28 +2,37 @@
 """
 
 import contextlib
+try:
+    # py2/3
+    import simplejson as json
+except ImportError:
+    # py2
+    import json
 import random
 import threading
 import time
 
 import ddt
-import yaml
+import six
 
 from glusto.core import Glusto as g
 
 from openshiftstoragelibs.baseclass import BaseClass
-from openshiftstoragelibs.heketi_ops import heketi_volume_list
+from openshiftstoragelibs.command import wait_for_async_cmds
+from openshiftstoragelibs.heketi_ops import get_heketi_volume_list_index
 from openshiftstoragelibs.naming import (
     make_unique_label,
     extract_method_name,
 )
 from openshiftstoragelibs.openshift_ops import (
     oc_create,
+    oc_create_async,
     oc_delete,
     oc_get_all_pvs,
     oc_get_pv,
     oc_get_pvc,
 )
+from openshiftstoragelibs.utils import yaml_dump
 from openshiftstoragelibs.waiter import Waiter
 
 
@@ -96,7 +105,7 @@ def temp_config(ocp_node, cfg):
     conn = g.rpyc_get_connection(ocp_node, user="root")
     tmp = conn.modules.tempfile.NamedTemporaryFile()
     try:
-        tmp.write(yaml.safe_dump(cfg))
+        tmp.write(yaml_dump(cfg))
         tmp.flush()
         filename = tmp.name
         yield filename
@@ -155,6 +164,11 @@ class ClaimInfo(object):
         with temp_config(ocp_node, self.req) as tmpfn:
             oc_create(ocp_node, tmpfn)
 
+    def create_pvc_async(self, ocp_node):
+        assert self.req
+        return oc_create_async(
+            ocp_node, json.dumps(self.req), value_type='stdin')
+
     def update_pvc_info(self, ocp_node, timeout=60):
         self.info = wait_for_claim(ocp_node, self.pvc_name, timeout)
 
@@ -174,27 +188,13 @@ class ClaimInfo(object):
 
 
 def _heketi_vols(ocp_node, url):
-    # Unfortunately, getting json from heketi-cli only gets the ids
-    # To get a mapping of ids & volume names without a lot of
-    # back and forth between the test and the ocp_node we end up having
-    # to scrape the output of 'volume list'
-    # TODO: This probably should be made into a utility function
-    out = heketi_volume_list(ocp_node, url, json=False)
-    res = []
-    for line in out.splitlines():
-        if not line.startswith('Id:'):
-            continue
-        row = {}
-        for section in line.split():
-            if ':' in section:
-                key, value = section.split(':', 1)
-                row[key.lower()] = value.strip()
-        res.append(row)
-    return res
+    # Unfortunately, getting json from heketi-cli only gets the ids,
+    # so indexed plain output of 'volume list' is used instead.
+    return get_heketi_volume_list_index(ocp_node, url)
 
 
 def _heketi_name_id_map(vols):
-    return {vol['name']: vol['id'] for vol in vols}
+    return dict(vols.by_name)
 
 
 @ddt.ddt
@@ -341,7 +341,7 @@ class TestVolumeMultiReq(BaseClass):
     @ddt.data(2, 4, 8)
     def test_threaded_multi_request(self, count):
         """Test creating volumes via PVCs where the pvc create
-        commands are launched in parallell via threads.
+        commands are launched in parallell as non-blocking commands.
         """
         self.addCleanup(self.wait_to_settle)
         tname = make_unique_label(extract_method_name(self.id()))
@@ -364,16 +364,18 @@ class TestVolumeMultiReq(BaseClass):
             for n in range(count)]
 
         # create a "bunch" of pvc all at once
-        def create(ci):
-            ci.create_pvc(ocp_node)
-            self.addCleanup(ci.delete_pvc, ocp_node)
-        threads = [
-            threading.Thread(target=create, args=[c])
-            for c in claims]
-        for t in threads:
-            t.start()
-        for t in threads:
-            t.join()
+        handles = wait_for_async_cmds(
+            [c.create_pvc_async(ocp_node) for c in claims],
+            max_in_flight=count)
+        errors = []
+        for c, handle in zip(claims, handles):
+            try:
+                handle.result()
+            except AssertionError as e:
+                errors.append(six.text_type(e))
+                continue
+            self.addCleanup(c.delete_pvc, ocp_node)
+        self.assertFalse(errors, "\n".join(errors))
 
         for c in claims:
             c.update_pvc_info(ocp_node, timeout=120)